@@ -1,15 +1,24 @@
 use actix_web::{web, HttpResponse};
 use serde::{Deserialize, Serialize};
-use std::process::Command;
+use std::io::{BufRead, BufReader, Write};
+use std::os::unix::net::UnixStream;
+use std::time::Duration;
 use crate::models::common::ErrorResponse;
 
+/// Unix socket of the batch worker (Database/scripts/batch_worker.py)
+const DEFAULT_BATCH_WORKER_SOCKET: &str = "../Database/batch_worker.sock";
+
+/// Month-end runs over a large book take minutes, not seconds
+const BATCH_WORKER_TIMEOUT: Duration = Duration::from_secs(1800);
+
 #[derive(Debug, Deserialize)]
 pub struct RunAccrualsRequest {
     pub month: Option<String>,  // Optional: YYYY-MM format
     pub dry_run: Option<bool>,
+    pub apply_plan: Option<bool>,  // Post the plan saved by the last dry run
 }
 
-#[derive(Debug, Serialize)]
+#[derive(Debug, Serialize, Deserialize)]
 pub struct AccrualResult {
     pub account_number: String,
     pub months: i32,
@@ -23,7 +32,24 @@ pub struct RunAccrualsResponse {
     pub months_processed: i32,
     pub total_interest: f64,
     pub results: Vec<AccrualResult>,
-    pub output: String,
+}
+
+/// Summary dict returned by process_monthly_accruals
+#[derive(Debug, Deserialize)]
+struct MonthlyAccrualsSummary {
+    accounts_processed: i32,
+    months_processed: i32,
+    total_interest: f64,
+    #[serde(default)]
+    results: Vec<AccrualResult>,
+}
+
+/// One response line from the batch worker (the job's printed report stays in the worker's log)
+#[derive(Debug, Deserialize)]
+struct WorkerResponse<T> {
+    ok: bool,
+    result: Option<T>,
+    error: Option<String>,
 }
 
 #[derive(Debug, Serialize)]
@@ -40,75 +66,77 @@ pub struct AccrualHistoryItem {
     pub processing_status: String,
 }
 
+/// Send one job to the batch worker and read its JSON response line
+fn submit_batch_job(job: &serde_json::Value) -> std::io::Result<String> {
+    let socket_path = std::env::var("BATCH_WORKER_SOCKET")
+        .unwrap_or_else(|_| DEFAULT_BATCH_WORKER_SOCKET.to_string());
+
+    let mut stream = UnixStream::connect(&socket_path)?;
+    stream.set_read_timeout(Some(BATCH_WORKER_TIMEOUT))?;
+
+    stream.write_all(format!("{}\n", job).as_bytes())?;
+    stream.flush()?;
+
+    let mut line = String::new();
+    BufReader::new(stream).read_line(&mut line)?;
+    Ok(line)
+}
+
 pub async fn run_monthly_accruals(
     request: web::Json<RunAccrualsRequest>,
 ) -> HttpResponse {
     log::info!("Running monthly accruals batch process");
 
-    // Build command
-    let script_path = "../Database/scripts/batch_monthly_accruals.py";
-    let mut cmd = Command::new("python3");
-    cmd.arg(script_path);
-
-    if let Some(ref month) = request.month {
-        cmd.arg("--month").arg(month);
-    }
+    let job = serde_json::json!({
+        "job": "monthly_accruals",
+        "month": request.month,
+        "dry_run": request.dry_run.unwrap_or(false),
+        "apply_plan": request.apply_plan.unwrap_or(false),
+    });
 
-    if request.dry_run.unwrap_or(false) {
-        cmd.arg("--dry-run");
-    }
+    // The worker call blocks until the job finishes, so keep it off the async executor
+    let line = match web::block(move || submit_batch_job(&job)).await {
+        Ok(Ok(line)) => line,
+        Ok(Err(e)) => {
+            log::error!("Failed to reach batch worker: {}", e);
+            return HttpResponse::ServiceUnavailable().json(ErrorResponse::new(
+                "BATCH_WORKER_UNAVAILABLE",
+                &format!("Batch worker not reachable (start Database/scripts/batch_worker.py): {}", e),
+            ));
+        }
+        Err(e) => {
+            log::error!("Batch worker call failed: {}", e);
+            return HttpResponse::InternalServerError().json(ErrorResponse::internal_error(
+                "Batch worker call failed"
+            ));
+        }
+    };
 
-    // Execute the Python script
-    match cmd.output() {
-        Ok(output) => {
-            let stdout = String::from_utf8_lossy(&output.stdout).to_string();
-            let stderr = String::from_utf8_lossy(&output.stderr).to_string();
-
-            if output.status.success() {
-                log::info!("Monthly accruals completed successfully");
-
-                // Parse output to extract summary (simple approach)
-                let mut accounts_processed = 0;
-                let mut months_processed = 0;
-                let mut total_interest = 0.0;
-
-                for line in stdout.lines() {
-                    if line.contains("Accounts Processed:") {
-                        if let Some(num) = line.split(':').nth(1) {
-                            accounts_processed = num.trim().parse().unwrap_or(0);
-                        }
-                    } else if line.contains("Months Processed:") {
-                        if let Some(num) = line.split(':').nth(1) {
-                            months_processed = num.trim().parse().unwrap_or(0);
-                        }
-                    } else if line.contains("Total Interest Posted:") {
-                        if let Some(amount) = line.split('$').nth(1) {
-                            total_interest = amount.trim().replace(',', "").parse().unwrap_or(0.0);
-                        }
-                    }
-                }
-
-                HttpResponse::Ok().json(RunAccrualsResponse {
-                    success: true,
-                    accounts_processed,
-                    months_processed,
-                    total_interest,
-                    results: Vec::new(), // Could parse detailed results if needed
-                    output: stdout,
-                })
-            } else {
-                log::error!("Monthly accruals failed: {}", stderr);
-                HttpResponse::InternalServerError().json(ErrorResponse::new(
-                    "BATCH_PROCESSING_ERROR",
-                    &format!("Batch processing failed: {}", stderr),
-                ))
-            }
+    match serde_json::from_str::<WorkerResponse<MonthlyAccrualsSummary>>(&line) {
+        Ok(WorkerResponse { ok: true, result: Some(summary), .. }) => {
+            log::info!("Monthly accruals completed successfully");
+
+            HttpResponse::Ok().json(RunAccrualsResponse {
+                success: true,
+                accounts_processed: summary.accounts_processed,
+                months_processed: summary.months_processed,
+                total_interest: summary.total_interest,
+                results: summary.results,
+            })
+        }
+        Ok(response) => {
+            let error = response.error.unwrap_or_else(|| "no result returned".to_string());
+            log::error!("Monthly accruals failed: {}", error);
+            HttpResponse::InternalServerError().json(ErrorResponse::new(
+                "BATCH_PROCESSING_ERROR",
+                &format!("Batch processing failed: {}", error),
+            ))
         }
         Err(e) => {
-            log::error!("Failed to execute batch script: {}", e);
+            log::error!("Invalid batch worker response: {}", e);
             HttpResponse::InternalServerError().json(ErrorResponse::new(
-                "SCRIPT_EXECUTION_ERROR",
-                &format!("Failed to execute batch script: {}", e),
+                "BATCH_WORKER_ERROR",
+                &format!("Invalid batch worker response: {}", e),
             ))
         }
     }
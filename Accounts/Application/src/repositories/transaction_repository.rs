@@ -2,16 +2,106 @@ use crate::domain::transaction::{Transaction, TransactionType, TransactionCatego
 use crate::error::AppError;
 use rusqlite::{params, Connection, OptionalExtension, Row};
 use rust_decimal::Decimal;
+use std::path::Path;
 use std::str::FromStr;
 
+/// Columns of transactions read through the transactions_all view
+const TRANSACTION_COLUMNS: &str = "transaction_id, account_id, type, category, amount, currency,
+    running_balance, description, reference, channel, transaction_date,
+    value_date, created_at, created_by";
+
+/// SQLite's default limit on attached databases per connection
+const MAX_ATTACHED_ARCHIVES: usize = 10;
+
 pub struct TransactionRepository {
     connection: Connection,
+    /// Why transactions_all cannot cover every archived year, if it cannot
+    history_unavailable: Option<String>,
+}
+
+/// Attach the ledger archives (Database/scripts/ledger_archive.py) read-only
+/// and create the temporary view transactions_all over the hot and archived
+/// transactions, so history reads still see years moved out of accounts.db.
+///
+/// An archive file that is missing is skipped with a warning: its year is
+/// absent from history, but every other read keeps working. If more archives
+/// hold transactions than SQLite can attach, none are attached and the reason
+/// is returned, so history reads fail instead of silently leaving years out.
+fn attach_ledger_archives(connection: &Connection, db_path: &str) -> Result<Option<String>, AppError> {
+    let has_archives: i64 = connection.query_row(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'ledger_archives'",
+        [],
+        |row| row.get(0),
+    )?;
+
+    // Archives that only hold compacted interest accruals have no transactions
+    let archives = if has_archives > 0 {
+        let mut stmt = connection.prepare(
+            "SELECT archive_year, archive_file FROM ledger_archives
+             WHERE transaction_count > 0
+             ORDER BY archive_year",
+        )?;
+        let rows = stmt
+            .query_map([], |row| Ok((row.get::<_, i64>(0)?, row.get::<_, String>(1)?)))?
+            .collect::<Result<Vec<_>, _>>()?;
+        rows
+    } else {
+        Vec::new()
+    };
+
+    if archives.len() > MAX_ATTACHED_ARCHIVES {
+        return Ok(Some(format!(
+            "{} ledger archives hold transactions, but at most {} can be attached",
+            archives.len(),
+            MAX_ATTACHED_ARCHIVES
+        )));
+    }
+
+    let archive_dir = Path::new(db_path)
+        .parent()
+        .unwrap_or_else(|| Path::new(""))
+        .join("archive");
+
+    let mut selects = vec![format!("SELECT {} FROM main.transactions", TRANSACTION_COLUMNS)];
+    for (year, archive_file) in &archives {
+        let archive_path = archive_dir.join(archive_file);
+        if !archive_path.is_file() {
+            log::warn!(
+                "Ledger archive {} is missing; {} transactions are left out of history",
+                archive_path.display(),
+                year
+            );
+            continue;
+        }
+        let uri = format!("file:{}?mode=ro", archive_path.display());
+        connection.execute(&format!("ATTACH DATABASE ?1 AS archive_{}", year), params![uri])?;
+        selects.push(format!("SELECT {} FROM archive_{}.transactions", TRANSACTION_COLUMNS, year));
+    }
+
+    connection.execute_batch(&format!(
+        "DROP VIEW IF EXISTS temp.transactions_all;
+         CREATE TEMP VIEW transactions_all AS {};",
+        selects.join(" UNION ALL ")
+    ))?;
+    Ok(None)
 }
 
 impl TransactionRepository {
     pub fn new(db_path: &str) -> Result<Self, AppError> {
         let connection = Connection::open(db_path)?;
-        Ok(TransactionRepository { connection })
+        let history_unavailable = attach_ledger_archives(&connection, db_path)?;
+        Ok(TransactionRepository { connection, history_unavailable })
+    }
+
+    /// Fail a history read if transactions_all cannot include every archived year
+    fn check_history(&self) -> Result<(), AppError> {
+        match &self.history_unavailable {
+            Some(reason) => Err(AppError::InternalError(format!(
+                "Transaction history unavailable: {}",
+                reason
+            ))),
+            None => Ok(()),
+        }
     }
 
     pub fn create(&self, transaction: &Transaction) -> Result<(), AppError> {
@@ -44,11 +134,13 @@ impl TransactionRepository {
     }
 
     pub fn find_by_id(&self, transaction_id: &str) -> Result<Option<Transaction>, AppError> {
+        self.check_history()?;
+
         let mut stmt = self.connection.prepare(
             "SELECT transaction_id, account_id, type, category, amount, currency,
                     running_balance, description, reference, channel, transaction_date,
                     value_date, created_at, created_by
-             FROM transactions WHERE transaction_id = ?1",
+             FROM transactions_all WHERE transaction_id = ?1",
         )?;
 
         let transaction = stmt
@@ -59,12 +151,14 @@ impl TransactionRepository {
     }
 
     pub fn find_by_account(&self, account_id: &str, limit: Option<usize>) -> Result<Vec<Transaction>, AppError> {
+        self.check_history()?;
+
         let query = if let Some(lim) = limit {
             format!(
                 "SELECT transaction_id, account_id, type, category, amount, currency,
                         running_balance, description, reference, channel, transaction_date,
                         value_date, created_at, created_by
-                 FROM transactions WHERE account_id = ?1
+                 FROM transactions_all WHERE account_id = ?1
                  ORDER BY created_at DESC LIMIT {}",
                 lim
             )
@@ -72,7 +166,7 @@ impl TransactionRepository {
             "SELECT transaction_id, account_id, type, category, amount, currency,
                     running_balance, description, reference, channel, transaction_date,
                     value_date, created_at, created_by
-             FROM transactions WHERE account_id = ?1
+             FROM transactions_all WHERE account_id = ?1
              ORDER BY created_at DESC".to_string()
         };
 
@@ -86,11 +180,13 @@ impl TransactionRepository {
     }
 
     pub fn find_by_reference(&self, reference: &str) -> Result<Option<Transaction>, AppError> {
+        self.check_history()?;
+
         let mut stmt = self.connection.prepare(
             "SELECT transaction_id, account_id, type, category, amount, currency,
                     running_balance, description, reference, channel, transaction_date,
                     value_date, created_at, created_by
-             FROM transactions WHERE reference = ?1",
+             FROM transactions_all WHERE reference = ?1",
         )?;
 
         let transaction = stmt
@@ -106,11 +202,13 @@ impl TransactionRepository {
         start_date: &str,
         end_date: &str,
     ) -> Result<Vec<Transaction>, AppError> {
+        self.check_history()?;
+
         let mut stmt = self.connection.prepare(
             "SELECT transaction_id, account_id, type, category, amount, currency,
                     running_balance, description, reference, channel, transaction_date,
                     value_date, created_at, created_by
-             FROM transactions
+             FROM transactions_all
              WHERE account_id = ?1 AND created_at BETWEEN ?2 AND ?3
              ORDER BY created_at DESC",
         )?;
@@ -125,8 +223,10 @@ impl TransactionRepository {
     }
 
     pub fn get_account_balance(&self, account_id: &str) -> Result<Option<Decimal>, AppError> {
+        self.check_history()?;
+
         let mut stmt = self.connection.prepare(
-            "SELECT running_balance FROM transactions
+            "SELECT running_balance FROM transactions_all
              WHERE account_id = ?1
              ORDER BY created_at DESC LIMIT 1",
         )?;
@@ -0,0 +1,54 @@
+-- Migration 004: Add Batch Run Ledger
+-- Description: Tracks batch runs and their committed chunks so an interrupted
+--              run can resume from its last checkpoint instead of starting over
+-- Created: 2025-10-06
+
+-- ============================================================================
+-- BATCH RUNS TABLE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS batch_runs (
+    run_id TEXT PRIMARY KEY,
+
+    -- Which batch and which business date it covers (e.g., 'EOD', '2025-10-06')
+    run_type TEXT NOT NULL,
+    processing_date TEXT NOT NULL,
+
+    status TEXT NOT NULL DEFAULT 'Running' CHECK(status IN ('Running', 'Completed', 'Failed')),
+    chunk_size INTEGER NOT NULL CHECK(chunk_size > 0),
+
+    -- Audit fields
+    started_at TEXT NOT NULL DEFAULT (datetime('now')),
+    completed_at TEXT,
+    error_message TEXT,
+
+    -- One run per batch type per business date; a rerun resumes this row
+    UNIQUE(run_type, processing_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_batch_runs_status ON batch_runs(status);
+
+-- ============================================================================
+-- BATCH RUN CHECKPOINTS TABLE
+-- ============================================================================
+-- One row per committed chunk, written in the same transaction as the chunk's
+-- postings. last_account_id is the keyset position to resume after (NULL for
+-- stages that are not processed in account_id order).
+CREATE TABLE IF NOT EXISTS batch_run_checkpoints (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,  -- e.g., 'interest_accrual', 'monthly_fees'
+    chunk_number INTEGER NOT NULL,
+
+    last_account_id TEXT,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    amount_total REAL NOT NULL DEFAULT 0.0,
+    stage_complete INTEGER NOT NULL DEFAULT 0 CHECK(stage_complete IN (0, 1)),
+
+    committed_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    PRIMARY KEY (run_id, stage, chunk_number),
+    FOREIGN KEY (run_id) REFERENCES batch_runs(run_id) ON DELETE CASCADE
+);
+
+-- Rollback:
+--   DROP TABLE IF EXISTS batch_run_checkpoints;
+--   DROP TABLE IF EXISTS batch_runs;
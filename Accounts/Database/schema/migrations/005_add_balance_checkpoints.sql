@@ -0,0 +1,27 @@
+-- Migration 005: Add Balance Checkpoints
+-- Description: Records each account's last verified balance and the last
+--              transaction it covered, so nightly verification only sums the
+--              transactions posted since
+-- Created: 2025-10-07
+
+-- ============================================================================
+-- BALANCE CHECKPOINTS TABLE
+-- ============================================================================
+-- last_transaction_rowid is the transactions rowid the verification covered up
+-- to. transactions has a TEXT primary key, so VACUUM may renumber rowids; the
+-- matching last_transaction_id lets the verifier detect that and fall back to
+-- a full recomputation for the account.
+CREATE TABLE IF NOT EXISTS balance_checkpoints (
+    account_id TEXT PRIMARY KEY,
+
+    verified_balance REAL NOT NULL,
+    last_transaction_rowid INTEGER NOT NULL,
+    last_transaction_id TEXT NOT NULL,
+
+    verified_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+-- Rollback:
+--   DROP TABLE IF EXISTS balance_checkpoints;
@@ -0,0 +1,31 @@
+-- Migration 006: Add Fee Skip Report
+-- Description: Records accounts whose monthly maintenance fee was not charged
+--              (insufficient balance) instead of printing them to stdout
+-- Created: 2025-10-08
+
+-- ============================================================================
+-- FEE SKIP REPORT TABLE
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS fee_skip_report (
+    account_id TEXT NOT NULL,
+
+    -- Fee transaction reference for the month (FEE-YYYYMM)
+    fee_reference TEXT NOT NULL,
+    processing_date TEXT NOT NULL,
+
+    -- Account state when the fee was due
+    balance REAL NOT NULL,
+    monthly_fee REAL NOT NULL,
+    reason TEXT NOT NULL DEFAULT 'Insufficient balance',
+
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    -- One entry per account per fee month; a rerun refreshes it
+    PRIMARY KEY (account_id, fee_reference),
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_fee_skip_report_reference ON fee_skip_report(fee_reference);
+
+-- Rollback:
+--   DROP TABLE IF EXISTS fee_skip_report;
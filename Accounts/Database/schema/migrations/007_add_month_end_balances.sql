@@ -0,0 +1,46 @@
+-- Migration 007: Add Month-End Balance Snapshots
+-- Description: Keeps each account's closing balance per month so month-end
+--              balance lookups no longer scan transactions
+-- Created: 2025-10-10
+
+-- ============================================================================
+-- MONTH-END BALANCES TABLE
+-- ============================================================================
+-- One row per account and month that has at least one transaction. The
+-- closing balance is the running_balance of the month's last transaction
+-- (value_date DESC, created_at DESC). A month without transactions closes at
+-- the nearest earlier month's balance.
+CREATE TABLE IF NOT EXISTS month_end_balances (
+    account_id TEXT NOT NULL,
+    month_key TEXT NOT NULL,                -- YYYY-MM
+
+    closing_balance REAL NOT NULL,
+    last_transaction_id TEXT NOT NULL,
+    last_value_date TEXT NOT NULL,
+
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    PRIMARY KEY (account_id, month_key),
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+-- ============================================================================
+-- SNAPSHOT WATERMARKS TABLE
+-- ============================================================================
+-- Last transactions rowid a snapshot has absorbed. As with
+-- balance_checkpoints, the matching transaction_id detects rowids renumbered
+-- by VACUUM or a deleted and reloaded ledger, which forces a rebuild.
+CREATE TABLE IF NOT EXISTS snapshot_watermarks (
+    snapshot_name TEXT PRIMARY KEY,
+    last_transaction_rowid INTEGER NOT NULL,
+    last_transaction_id TEXT,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Recomputing one account's month reads only that month's transactions
+CREATE INDEX IF NOT EXISTS idx_transactions_account_value_date ON transactions(account_id, value_date);
+
+-- Rollback:
+--   DROP INDEX IF EXISTS idx_transactions_account_value_date;
+--   DROP TABLE IF EXISTS snapshot_watermarks;
+--   DROP TABLE IF EXISTS month_end_balances;
@@ -0,0 +1,15 @@
+-- Migration 008: Add Product Day Count Convention
+-- Description: Lets a product choose the day count convention its interest is
+--              computed with (see scripts/day_count.py)
+-- Created: 2025-10-12
+
+-- ============================================================================
+-- PRODUCTS: DAY COUNT CONVENTION
+-- ============================================================================
+-- NULL keeps each batch's historical convention: Actual/365 Fixed for the EOD
+-- daily accrual and 30/360 for the month-end interest posting.
+ALTER TABLE products ADD COLUMN day_count_convention TEXT
+    CHECK (day_count_convention IN ('30/360', '30E/360', 'ACT/365F', 'ACT/360', 'ACT/ACT ISDA'));
+
+-- Rollback:
+--   ALTER TABLE products DROP COLUMN day_count_convention;
@@ -0,0 +1,80 @@
+-- Migration 009: Add Integer Ledger Columns
+-- Description: Exposes money as integer cents and dates as integer day numbers
+--              so the batch scripts compute exactly and range-scan covering
+--              indexes instead of converting REAL and TEXT values row by row
+-- Created: 2025-10-14
+
+-- ============================================================================
+-- INTEGER COLUMNS
+-- ============================================================================
+-- Generated from the REAL and TEXT columns, which stay the columns every
+-- writer (API and batch) sets, so the integer values can never drift from
+-- them. VIRTUAL columns take no space in the table rows; the indexes below
+-- store them, which is where the batch scripts read them.
+--
+-- Cents: round(amount * 100). Every stored amount is a whole number of cents,
+--        so this is exact.
+-- Days:  days since 1970-01-01 (the numpy datetime64[D] epoch). julianday()
+--        also accepts 'YYYY-MM-DD HH:MM:SS' values, which truncate to their day.
+
+ALTER TABLE accounts ADD COLUMN balance_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(balance * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE accounts ADD COLUMN interest_accrued_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(interest_accrued * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE accounts ADD COLUMN opening_day INTEGER
+    GENERATED ALWAYS AS (CAST(julianday(opening_date) - 2440587.5 AS INTEGER)) VIRTUAL;
+
+ALTER TABLE transactions ADD COLUMN amount_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(amount * 100) AS INTEGER)) VIRTUAL;
+-- Credits positive, debits negative: an account's balance is SUM(signed_amount_cents)
+ALTER TABLE transactions ADD COLUMN signed_amount_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(CASE WHEN type = 'Credit' THEN amount ELSE -amount END * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE transactions ADD COLUMN running_balance_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(running_balance * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE transactions ADD COLUMN value_day INTEGER
+    GENERATED ALWAYS AS (CAST(julianday(value_date) - 2440587.5 AS INTEGER)) VIRTUAL;
+
+ALTER TABLE interest_accruals ADD COLUMN daily_interest_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(daily_interest * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE interest_accruals ADD COLUMN cumulative_accrued_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(cumulative_accrued * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE interest_accruals ADD COLUMN accrual_day INTEGER
+    GENERATED ALWAYS AS (CAST(julianday(accrual_date) - 2440587.5 AS INTEGER)) VIRTUAL;
+
+ALTER TABLE monthly_interest_accruals ADD COLUMN month_end_balance_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(month_end_balance * 100) AS INTEGER)) VIRTUAL;
+ALTER TABLE monthly_interest_accruals ADD COLUMN monthly_interest_cents INTEGER
+    GENERATED ALWAYS AS (CAST(round(monthly_interest * 100) AS INTEGER)) VIRTUAL;
+
+-- ============================================================================
+-- COVERING INDEXES
+-- ============================================================================
+-- Balance sums per account (integrity verification), optionally bounded by
+-- value day, read only this index
+CREATE INDEX IF NOT EXISTS idx_transactions_account_value_day
+    ON transactions(account_id, value_day, signed_amount_cents);
+
+-- Accruals already posted in a date range (catch-up EOD)
+CREATE INDEX IF NOT EXISTS idx_interest_accruals_day
+    ON interest_accruals(accrual_day, account_id);
+
+-- Interest-eligible accounts opened by a date (month-end accruals)
+CREATE INDEX IF NOT EXISTS idx_accounts_status_opening_day
+    ON accounts(status, opening_day, account_id);
+
+-- Rollback:
+--   DROP INDEX IF EXISTS idx_accounts_status_opening_day;
+--   DROP INDEX IF EXISTS idx_interest_accruals_day;
+--   DROP INDEX IF EXISTS idx_transactions_account_value_day;
+--   ALTER TABLE monthly_interest_accruals DROP COLUMN monthly_interest_cents;
+--   ALTER TABLE monthly_interest_accruals DROP COLUMN month_end_balance_cents;
+--   ALTER TABLE interest_accruals DROP COLUMN accrual_day;
+--   ALTER TABLE interest_accruals DROP COLUMN cumulative_accrued_cents;
+--   ALTER TABLE interest_accruals DROP COLUMN daily_interest_cents;
+--   ALTER TABLE transactions DROP COLUMN value_day;
+--   ALTER TABLE transactions DROP COLUMN running_balance_cents;
+--   ALTER TABLE transactions DROP COLUMN signed_amount_cents;
+--   ALTER TABLE transactions DROP COLUMN amount_cents;
+--   ALTER TABLE accounts DROP COLUMN opening_day;
+--   ALTER TABLE accounts DROP COLUMN interest_accrued_cents;
+--   ALTER TABLE accounts DROP COLUMN balance_cents;
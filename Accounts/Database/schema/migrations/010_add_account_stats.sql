@@ -0,0 +1,69 @@
+-- Migration 010: Add Account Statistics
+-- Description: Keeps per-account transaction statistics so v_account_summary
+--              no longer runs two correlated subqueries over transactions
+--              for every account it lists
+-- Created: 2025-10-15
+
+-- ============================================================================
+-- ACCOUNT STATS TABLE
+-- ============================================================================
+-- One row per account that has at least one transaction, maintained by
+-- account_stats.py from the transactions inserted since its watermark in
+-- snapshot_watermarks (migration 007). The batch scripts refresh it in the
+-- same transaction as their postings; postings by other writers are absorbed
+-- at the next refresh.
+CREATE TABLE IF NOT EXISTS account_stats (
+    account_id TEXT PRIMARY KEY,
+
+    transaction_count INTEGER NOT NULL,
+    last_transaction_date TEXT NOT NULL,
+    last_value_date TEXT NOT NULL,
+    total_credits_cents INTEGER NOT NULL,
+    total_debits_cents INTEGER NOT NULL,
+
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+-- ============================================================================
+-- ACCOUNT SUMMARY VIEW
+-- ============================================================================
+-- Replaces the view of migration 002, which selected a.opened_date and
+-- a.closed_date (the columns are opening_date and closing_date) and dropped
+-- accounts without a customers row. Accounts without transactions have no
+-- account_stats row and show a transaction_count of 0.
+DROP VIEW IF EXISTS v_account_summary;
+
+CREATE VIEW v_account_summary AS
+SELECT
+    a.account_id,
+    a.account_number,
+    a.customer_id,
+    c.customer_name,
+    a.status,
+    a.balance,
+    a.interest_accrued,
+    a.opening_date,
+    a.closing_date,
+    p.product_id,
+    p.product_name,
+    p.product_code,
+    p.currency,
+    p.interest_rate,
+    p.monthly_maintenance_fee,
+    p.transaction_fee,
+    s.last_transaction_date,
+    s.last_value_date,
+    COALESCE(s.transaction_count, 0) AS transaction_count,
+    COALESCE(s.total_credits_cents, 0) / 100.0 AS total_credits,
+    COALESCE(s.total_debits_cents, 0) / 100.0 AS total_debits
+FROM accounts a
+INNER JOIN products p ON a.product_id = p.product_id
+LEFT JOIN customers c ON a.customer_id = c.customer_id
+LEFT JOIN account_stats s ON a.account_id = s.account_id;
+
+-- Rollback:
+--   DROP VIEW IF EXISTS v_account_summary;
+--   (recreate the view of migration 002)
+--   DROP TABLE IF EXISTS account_stats;
@@ -0,0 +1,48 @@
+-- Migration 011: Add Ledger Archive
+-- Description: Records closed years of transactions and interest accruals
+--              moved out of accounts.db into per-year archive databases, and
+--              the per-account totals the hot ledger no longer holds
+-- Created: 2025-10-16
+
+-- ============================================================================
+-- LEDGER ARCHIVES TABLE
+-- ============================================================================
+-- One row per archived year. The archive file (archive/ledger_YYYY.db) holds
+-- that year's transactions (by value_date) and interest accruals (by
+-- accrual_date); the counts and cent sums are the archive's verified totals,
+-- checked again every time rows are added to it.
+CREATE TABLE IF NOT EXISTS ledger_archives (
+    archive_year INTEGER PRIMARY KEY,
+    archive_file TEXT NOT NULL,
+
+    transaction_count INTEGER NOT NULL,
+    transaction_amount_cents INTEGER NOT NULL,
+    accrual_count INTEGER NOT NULL,
+    accrual_interest_cents INTEGER NOT NULL,
+
+    archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- ============================================================================
+-- ARCHIVED ACCOUNT TOTALS TABLE
+-- ============================================================================
+-- Per account, the transactions moved to archives. Balance verification
+-- starts from credits - debits here, and account_stats rebuilds add these
+-- totals to the hot ledger's.
+CREATE TABLE IF NOT EXISTS archived_account_totals (
+    account_id TEXT PRIMARY KEY,
+
+    transaction_count INTEGER NOT NULL,
+    last_transaction_date TEXT NOT NULL,
+    last_value_date TEXT NOT NULL,
+    total_credits_cents INTEGER NOT NULL,
+    total_debits_cents INTEGER NOT NULL,
+
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+-- Rollback (move archived rows back into accounts.db first):
+--   DROP TABLE IF EXISTS archived_account_totals;
+--   DROP TABLE IF EXISTS ledger_archives;
@@ -0,0 +1,53 @@
+-- Migration 012: Add Interest Accrual Summaries
+-- Description: Rolls the daily interest_accruals rows of closed months up into
+--              one row per account and month, so the daily table only holds
+--              the open month
+-- Created: 2025-10-17
+
+-- ============================================================================
+-- INTEREST ACCRUAL SUMMARIES TABLE
+-- ============================================================================
+-- Written by accrual_compaction.py in the same transaction that deletes the
+-- month's daily rows. Amounts are integer cents.
+CREATE TABLE IF NOT EXISTS interest_accrual_summaries (
+    account_id TEXT NOT NULL,
+    accrual_month TEXT NOT NULL,            -- YYYY-MM
+
+    days_accrued INTEGER NOT NULL,
+    first_accrual_date TEXT NOT NULL,
+    last_accrual_date TEXT NOT NULL,
+    total_interest_cents INTEGER NOT NULL,
+    closing_accrued_cents INTEGER NOT NULL, -- cumulative_accrued of the last day
+
+    min_balance_cents INTEGER NOT NULL,
+    max_balance_cents INTEGER NOT NULL,
+    min_annual_rate REAL NOT NULL,
+    max_annual_rate REAL NOT NULL,
+    rate_changes INTEGER NOT NULL,          -- days whose rate differs from the previous accrual day's
+
+    compacted_at TEXT NOT NULL DEFAULT (datetime('now')),
+
+    PRIMARY KEY (account_id, accrual_month),
+    FOREIGN KEY (account_id) REFERENCES accounts(account_id) ON DELETE CASCADE
+);
+
+-- ============================================================================
+-- INTEREST ACCRUAL COMPACTIONS TABLE
+-- ============================================================================
+-- One row per compacted month with the reconciled totals of the daily rows it
+-- replaced. EOD refuses to accrue into a month listed here: the daily rows a
+-- rerun would check for are gone.
+CREATE TABLE IF NOT EXISTS interest_accrual_compactions (
+    accrual_month TEXT PRIMARY KEY,         -- YYYY-MM
+
+    account_count INTEGER NOT NULL,
+    daily_rows INTEGER NOT NULL,
+    total_interest_cents INTEGER NOT NULL,
+    archive_file TEXT,                      -- daily rows kept in archive/, or NULL if deleted
+
+    compacted_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Rollback (the compacted daily rows are not restored):
+--   DROP TABLE IF EXISTS interest_accrual_compactions;
+--   DROP TABLE IF EXISTS interest_accrual_summaries;
@@ -0,0 +1,52 @@
+-- Migration 013: Replace updated_at Triggers
+-- Description: The migration 001 triggers re-update every updated row to stamp
+--              updated_at, doubling the writes of batch loops that already
+--              set it. The replacements only fire when the writer left
+--              updated_at unchanged.
+-- Created: 2025-10-18
+
+-- ============================================================================
+-- UPDATED_AT FALLBACK TRIGGERS
+-- ============================================================================
+-- The API repositories and the batch scripts set updated_at in their UPDATE
+-- statements, so for them these triggers never run their body. An UPDATE that
+-- leaves updated_at as it was still gets it stamped, unless it already holds
+-- the current second and the stamp would not change it.
+DROP TRIGGER IF EXISTS trg_products_updated_at;
+DROP TRIGGER IF EXISTS trg_accounts_updated_at;
+DROP TRIGGER IF EXISTS trg_users_updated_at;
+
+CREATE TRIGGER IF NOT EXISTS trg_products_updated_at_fallback
+AFTER UPDATE ON products
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND OLD.updated_at IS NOT datetime('now')
+BEGIN
+    UPDATE products SET updated_at = datetime('now') WHERE product_id = NEW.product_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_accounts_updated_at_fallback
+AFTER UPDATE ON accounts
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND OLD.updated_at IS NOT datetime('now')
+BEGIN
+    UPDATE accounts SET updated_at = datetime('now') WHERE account_id = NEW.account_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_users_updated_at_fallback
+AFTER UPDATE ON users
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND OLD.updated_at IS NOT datetime('now')
+BEGIN
+    UPDATE users SET updated_at = datetime('now') WHERE user_id = NEW.user_id;
+END;
+
+-- Rollback (restores the unconditional triggers of migration 001):
+--   DROP TRIGGER IF EXISTS trg_products_updated_at_fallback;
+--   DROP TRIGGER IF EXISTS trg_accounts_updated_at_fallback;
+--   DROP TRIGGER IF EXISTS trg_users_updated_at_fallback;
+--   CREATE TRIGGER trg_products_updated_at AFTER UPDATE ON products FOR EACH ROW
+--   BEGIN UPDATE products SET updated_at = datetime('now') WHERE product_id = NEW.product_id; END;
+--   CREATE TRIGGER trg_accounts_updated_at AFTER UPDATE ON accounts FOR EACH ROW
+--   BEGIN UPDATE accounts SET updated_at = datetime('now') WHERE account_id = NEW.account_id; END;
+--   CREATE TRIGGER trg_users_updated_at AFTER UPDATE ON users FOR EACH ROW
+--   BEGIN UPDATE users SET updated_at = datetime('now') WHERE user_id = NEW.user_id; END;
@@ -0,0 +1,17 @@
+-- Migration 014: Add Archived Closing Balance
+-- Description: Records each account's running balance at the end of its
+--              archived ledger, so running-balance repairs that start after
+--              the archived years anchor on it instead of on zero
+-- Created: 2025-10-19
+
+-- ============================================================================
+-- ARCHIVED ACCOUNT TOTALS: CLOSING BALANCE
+-- ============================================================================
+-- running_balance, in cents, of the account's last archived transaction in
+-- ledger order (value_date, created_at, rowid), i.e. the one dated
+-- last_value_date. NULL for accounts archived before this migration;
+-- ledger_repair.py falls back to total_credits_cents - total_debits_cents.
+ALTER TABLE archived_account_totals ADD COLUMN closing_balance_cents INTEGER;
+
+-- Rollback:
+--   ALTER TABLE archived_account_totals DROP COLUMN closing_balance_cents;
@@ -0,0 +1,17 @@
+-- Migration 015: Add Ledger Archive Scope
+-- Description: Lets a ledger archive hold only the compacted daily interest
+--              accruals of a year whose transactions are still in accounts.db
+-- Created: 2025-10-20
+
+-- ============================================================================
+-- LEDGER ARCHIVES: TRANSACTIONS ARCHIVED
+-- ============================================================================
+-- 1 once ledger_archive.py has moved the year's transactions (the year is
+-- closed to postings); 0 while archive/ledger_YYYY.db only holds daily
+-- interest accruals moved there by accrual_compaction.py --archive-daily.
+-- Readers attach both kinds alike.
+ALTER TABLE ledger_archives ADD COLUMN transactions_archived INTEGER NOT NULL DEFAULT 1
+    CHECK (transactions_archived IN (0, 1));
+
+-- Rollback:
+--   ALTER TABLE ledger_archives DROP COLUMN transactions_archived;
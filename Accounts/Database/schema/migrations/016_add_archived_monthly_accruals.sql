@@ -0,0 +1,19 @@
+-- Migration 016: Add Archived Monthly Accruals
+-- Description: Moves month-end interest postings (monthly_interest_accruals)
+--              to the ledger archives together with the interest
+--              transactions they reference
+-- Created: 2025-10-21
+
+-- ============================================================================
+-- LEDGER ARCHIVES: MONTHLY INTEREST ACCRUALS
+-- ============================================================================
+-- Verified totals of the year's monthly_interest_accruals rows (by
+-- posting_date, the value_date of their interest transaction) in the archive.
+-- Years archived before this migration left their rows in accounts.db,
+-- pointing at archived transactions; archiving such a year again moves them.
+ALTER TABLE ledger_archives ADD COLUMN monthly_accrual_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE ledger_archives ADD COLUMN monthly_interest_cents INTEGER NOT NULL DEFAULT 0;
+
+-- Rollback (move archived monthly accruals back into accounts.db first):
+--   ALTER TABLE ledger_archives DROP COLUMN monthly_interest_cents;
+--   ALTER TABLE ledger_archives DROP COLUMN monthly_accrual_count;
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Account Statistics
+
+Maintains account_stats: per account, the number of transactions, the latest
+transaction and value dates and the total credits and debits in cents.
+v_account_summary reads these columns instead of counting and scanning each
+account's transactions.
+
+Like month_end_balances.py, the maintainer is incremental: a watermark in
+snapshot_watermarks records the last transactions rowid absorbed, and a
+refresh aggregates only the rows inserted since and adds them to the stored
+statistics. The EOD batch refreshes once after its last commit, however
+many pages or chunks it committed; the monthly accruals refresh in the same
+transaction as their postings. Postings by other writers (the API) are
+absorbed at the next refresh. If the
+watermark no longer points at the same transaction (VACUUM renumbered rowids,
+or the ledger was deleted and reloaded), the statistics are rebuilt.
+
+Transactions are append-only; the statistics do not follow deleted rows
+until the next rebuild. Rows moved to ledger archives (ledger_archive.py)
+stay counted: a rebuild adds their archived_account_totals.
+
+Usage:
+    python3 account_stats.py [--rebuild]
+
+Options:
+    --rebuild    Discard the statistics and rebuild them from all transactions
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+from db_connection import connect, ensure_table, ensure_integer_ledger_columns, ensure_ledger_archive, MIGRATIONS_DIR
+from month_end_balances import ensure_month_end_balances, get_watermark, watermark_is_valid, advance_watermark
+
+DB_PATH = Path(__file__).parent.parent / "accounts.db"
+
+ACCOUNT_STATS_MIGRATION = MIGRATIONS_DIR / "010_add_account_stats.sql"
+SNAPSHOT_NAME = "account_stats"
+
+# Aggregates of the transactions with rowid > ?, one row per account
+_STATS_SELECT = """
+    SELECT
+        account_id,
+        COUNT(*),
+        MAX(transaction_date),
+        MAX(value_date),
+        SUM(CASE WHEN type = 'Credit' THEN amount_cents ELSE 0 END),
+        SUM(CASE WHEN type = 'Credit' THEN 0 ELSE amount_cents END),
+        datetime('now')
+    FROM transactions
+    WHERE rowid > ?
+    GROUP BY account_id
+"""
+
+
+def ensure_account_stats(conn):
+    """Create account_stats (and the tables it reads) on databases initialised before migration 010."""
+    ensure_month_end_balances(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_ledger_archive(conn)
+    ensure_table(conn, "account_stats", ACCOUNT_STATS_MIGRATION)
+
+
+def _rebuild(cursor) -> int:
+    """
+    Recompute every account's statistics in one scan, adding the totals of
+    transactions moved to ledger archives. Returns accounts written.
+    """
+    cursor.execute("DELETE FROM account_stats")
+    cursor.execute(f"""
+        INSERT INTO account_stats (
+            account_id, transaction_count, last_transaction_date, last_value_date,
+            total_credits_cents, total_debits_cents, updated_at
+        )
+        SELECT account_id, SUM(transaction_count), MAX(last_transaction_date), MAX(last_value_date),
+               SUM(total_credits_cents), SUM(total_debits_cents), datetime('now')
+        FROM (
+            SELECT account_id, transaction_count, last_transaction_date, last_value_date,
+                   total_credits_cents, total_debits_cents, NULL
+            FROM archived_account_totals
+            UNION ALL
+            {_STATS_SELECT}
+        )
+        GROUP BY account_id
+    """, (0,))
+    return cursor.rowcount
+
+
+def _absorb(cursor, last_rowid: int) -> int:
+    """Add the transactions after last_rowid to the statistics. Returns accounts written."""
+    cursor.execute(f"""
+        INSERT INTO account_stats (
+            account_id, transaction_count, last_transaction_date, last_value_date,
+            total_credits_cents, total_debits_cents, updated_at
+        )
+        {_STATS_SELECT}
+        ON CONFLICT (account_id) DO UPDATE SET
+            transaction_count = transaction_count + excluded.transaction_count,
+            last_transaction_date = MAX(last_transaction_date, excluded.last_transaction_date),
+            last_value_date = MAX(last_value_date, excluded.last_value_date),
+            total_credits_cents = total_credits_cents + excluded.total_credits_cents,
+            total_debits_cents = total_debits_cents + excluded.total_debits_cents,
+            updated_at = excluded.updated_at
+    """, (last_rowid,))
+    return cursor.rowcount
+
+
+def refresh_account_stats(conn, rebuild: bool = False) -> dict:
+    """
+    Bring account_stats up to date with transactions. Caller commits.
+
+    Only transactions inserted after the watermark are read, through the
+    rowid range, so a refresh after a page of postings costs that page.
+
+    Args:
+        rebuild: Discard the statistics and rebuild from all transactions
+
+    Returns:
+        Dict with mode ('rebuild' or 'incremental'), new_transactions and
+        accounts_refreshed
+    """
+    ensure_account_stats(conn)
+    cursor = conn.cursor()
+
+    watermark = get_watermark(cursor, SNAPSHOT_NAME)
+    if rebuild or watermark is None or not watermark_is_valid(cursor, watermark):
+        new_transactions = cursor.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        accounts_refreshed = _rebuild(cursor)
+        advance_watermark(cursor, SNAPSHOT_NAME)
+        return {"mode": "rebuild", "new_transactions": new_transactions,
+                "accounts_refreshed": accounts_refreshed}
+
+    last_rowid = watermark[0]
+    new_transactions = cursor.execute(
+        "SELECT COUNT(*) FROM transactions WHERE rowid > ?", (last_rowid,)
+    ).fetchone()[0]
+    if not new_transactions:
+        return {"mode": "incremental", "new_transactions": 0, "accounts_refreshed": 0}
+
+    accounts_refreshed = _absorb(cursor, last_rowid)
+    advance_watermark(cursor, SNAPSHOT_NAME)
+    return {"mode": "incremental", "new_transactions": new_transactions,
+            "accounts_refreshed": accounts_refreshed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh account statistics')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the statistics from all transactions')
+
+    args = parser.parse_args()
+
+    try:
+        conn = connect(DB_PATH)
+        result = refresh_account_stats(conn, rebuild=args.rebuild)
+        conn.commit()
+        conn.close()
+
+        print(f"✓ Account statistics refreshed ({result['mode']}): "
+              f"{result['new_transactions']} transactions, {result['accounts_refreshed']} accounts")
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
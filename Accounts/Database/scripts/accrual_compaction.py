@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Interest Accrual Compaction
+
+EOD writes one interest_accruals row per account per day, and nothing reads
+a single day once its month has closed. Compaction rolls a closed month's
+daily rows up into one interest_accrual_summaries row per account - days
+accrued, total interest, closing accrued amount, minimum and maximum balance
+and rate, and the number of rate changes - and deletes the daily rows, so
+the table and its four indexes only hold the open month.
+
+A month is closed once EOD has accrued its last day. Each month is
+compacted in one transaction:
+
+1. (--archive-daily) The daily rows are copied to the year's ledger archive,
+   Database/archive/ledger_YYYY.db (ledger_archive.archive_accruals),
+   committed and checked there.
+2. The summaries are written.
+3. The summaries are reconciled with accounts.interest_accrued, which EOD
+   maintains alongside the daily rows: each account's closing accrued
+   amount must equal interest_accrued less everything accrued after the
+   month, and its opening amount plus the month's interest must equal the
+   closing amount. Otherwise the transaction is rolled back.
+4. The daily rows are deleted and the month is recorded, with its totals,
+   in interest_accrual_compactions; archived rows are added to the year's
+   ledger_archives totals, so interest_accruals_all and the API read them
+   like any other archived accruals.
+
+EOD refuses to accrue into a compacted month: its rerun protection looks for
+the daily rows, which are gone.
+
+Usage:
+    python3 accrual_compaction.py [--before YYYY-MM] [--month YYYY-MM] [--archive-daily]
+
+Options:
+    --before YYYY-MM   Compact every closed month with daily rows before this
+                       month (default: every closed month)
+    --month YYYY-MM    Compact this month only
+    --archive-daily    Keep the daily rows in the ledger archive instead of
+                       deleting them outright
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import date, timedelta
+
+from db_connection import connect, ensure_table, ensure_integer_ledger_columns, MIGRATIONS_DIR
+from ledger_archive import ARCHIVE_DIR, archive_accruals, record_archived_accruals
+
+DB_PATH = Path(__file__).parent.parent / "accounts.db"
+
+ACCRUAL_SUMMARIES_MIGRATION = MIGRATIONS_DIR / "012_add_interest_accrual_summaries.sql"
+
+
+def ensure_accrual_summaries(conn):
+    """Create the summary tables on databases initialised before migration 012."""
+    ensure_table(conn, "interest_accrual_summaries", ACCRUAL_SUMMARIES_MIGRATION)
+
+
+def compacted_months(conn, start_date: date, end_date: date) -> list:
+    """Compacted months (YYYY-MM) from start_date's month to end_date's month, in order."""
+    ensure_accrual_summaries(conn)
+    return [month for (month,) in conn.execute("""
+        SELECT accrual_month FROM interest_accrual_compactions
+        WHERE accrual_month BETWEEN ? AND ?
+        ORDER BY accrual_month
+    """, (start_date.strftime('%Y-%m'), end_date.strftime('%Y-%m')))]
+
+
+def _month_range(month_key: str) -> tuple:
+    """['YYYY-MM-01', first day of the next month) as ISO strings."""
+    year, month = int(month_key[:4]), int(month_key[5:7])
+    following = f"{year + 1:04d}-01" if month == 12 else f"{year:04d}-{month + 1:02d}"
+    return f"{month_key}-01", f"{following}-01"
+
+
+def _daily_totals(conn, start: str, end: str) -> tuple:
+    """(accounts, rows, interest cents) of the daily rows in [start, end)."""
+    return tuple(conn.execute("""
+        SELECT COUNT(DISTINCT account_id), COUNT(*), COALESCE(SUM(daily_interest_cents), 0)
+        FROM interest_accruals
+        WHERE accrual_date >= ? AND accrual_date < ?
+    """, (start, end)).fetchone())
+
+
+def last_closed_month(conn):
+    """
+    The latest month EOD has accrued the last day of (YYYY-MM), or None if
+    there are no daily rows: the month of the latest daily accrual if that is
+    its last day, else the month before.
+    """
+    latest = conn.execute("SELECT MAX(accrual_date) FROM interest_accruals").fetchone()[0]
+    if latest is None:
+        return None
+    latest = date.fromisoformat(latest[:10])
+    if (latest + timedelta(days=1)).month != latest.month:
+        return latest.strftime('%Y-%m')
+    return (latest.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+
+
+def _unreconciled_accounts(conn, month_key: str, end: str) -> list:
+    """
+    Accounts whose summary for month_key disagrees with accounts.interest_accrued
+    or with its own daily rows. Returns (account_id, closing, expected closing)
+    for the first few.
+    """
+    return conn.execute("""
+        SELECT account_id, closing_accrued_cents, expected_closing_cents
+        FROM (
+            SELECT
+                s.account_id,
+                s.closing_accrued_cents,
+                a.interest_accrued_cents - COALESCE(later.cents, 0) AS expected_closing_cents,
+                first_day.cumulative_accrued_cents - first_day.daily_interest_cents AS opening_accrued_cents,
+                s.total_interest_cents
+            FROM interest_accrual_summaries s
+            INNER JOIN interest_accruals first_day
+                ON first_day.account_id = s.account_id
+               AND first_day.accrual_date = s.first_accrual_date
+            LEFT JOIN accounts a ON a.account_id = s.account_id
+            -- Interest accrued after the month: later daily rows and summaries
+            LEFT JOIN (
+                SELECT account_id, SUM(cents) AS cents
+                FROM (
+                    SELECT account_id, daily_interest_cents AS cents
+                    FROM interest_accruals
+                    WHERE accrual_date >= ?
+                    UNION ALL
+                    SELECT account_id, total_interest_cents
+                    FROM interest_accrual_summaries
+                    WHERE accrual_month > ?
+                )
+                GROUP BY account_id
+            ) later ON later.account_id = s.account_id
+            WHERE s.accrual_month = ?
+        )
+        WHERE expected_closing_cents IS NULL
+           OR closing_accrued_cents <> expected_closing_cents
+           OR opening_accrued_cents + total_interest_cents <> closing_accrued_cents
+        LIMIT 5
+    """, (end, month_key, month_key)).fetchall()
+
+
+def compact_month(conn, month_key: str, today: date = None, archive_dir: Path = None) -> dict:
+    """
+    Roll month_key's daily accruals up into interest_accrual_summaries and
+    delete them, in one transaction.
+
+    Args:
+        month_key: Month to compact (YYYY-MM); must be before today's month
+                   and no later than last_closed_month
+        today: Reference date for the current month (default: today)
+        archive_dir: If given, move the daily rows to the year's ledger
+                     archive in archive_dir before deleting them
+
+    Returns:
+        Dict with month, accounts, daily_rows, interest_cents and archive
+        (path or None)
+
+    Raises:
+        ValueError: If the month is still open or already compacted, the
+                    archive copy does not verify, or the summaries do not
+                    reconcile with accounts.interest_accrued (nothing is
+                    deleted then)
+    """
+    today = today or date.today()
+    ensure_accrual_summaries(conn)
+    ensure_integer_ledger_columns(conn)
+    closed_month = last_closed_month(conn)
+    if month_key >= today.strftime('%Y-%m') or closed_month is None or month_key > closed_month:
+        raise ValueError(f"Month {month_key} is not closed yet (EOD has not accrued its last day)")
+    if conn.execute("SELECT 1 FROM interest_accrual_compactions WHERE accrual_month = ?", (month_key,)).fetchone():
+        raise ValueError(f"Month {month_key} is already compacted")
+
+    start, end = _month_range(month_key)
+    totals = _daily_totals(conn, start, end)
+    archive_path, archived = archive_accruals(conn, start, end, archive_dir) if archive_dir else (None, None)
+
+    cursor = conn.cursor()
+    # Explicit: sqlite3 opens no implicit transaction for a statement starting with WITH
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            WITH days AS (
+                SELECT
+                    account_id,
+                    accrual_date,
+                    balance,
+                    annual_rate,
+                    daily_interest_cents,
+                    cumulative_accrued_cents,
+                    LAG(annual_rate) OVER (PARTITION BY account_id ORDER BY accrual_date) AS previous_rate,
+                    ROW_NUMBER() OVER (PARTITION BY account_id ORDER BY accrual_date DESC) AS days_from_end
+                FROM interest_accruals
+                WHERE accrual_date >= ? AND accrual_date < ?
+            )
+            INSERT INTO interest_accrual_summaries (
+                account_id, accrual_month, days_accrued, first_accrual_date, last_accrual_date,
+                total_interest_cents, closing_accrued_cents, min_balance_cents, max_balance_cents,
+                min_annual_rate, max_annual_rate, rate_changes, compacted_at
+            )
+            SELECT
+                account_id,
+                ?,
+                COUNT(*),
+                MIN(accrual_date),
+                MAX(accrual_date),
+                SUM(daily_interest_cents),
+                MAX(CASE WHEN days_from_end = 1 THEN cumulative_accrued_cents END),
+                CAST(round(MIN(balance) * 100) AS INTEGER),
+                CAST(round(MAX(balance) * 100) AS INTEGER),
+                MIN(annual_rate),
+                MAX(annual_rate),
+                SUM(previous_rate IS NOT NULL AND annual_rate <> previous_rate),
+                datetime('now')
+            FROM days
+            GROUP BY account_id
+        """, (start, end, month_key))
+
+        unreconciled = _unreconciled_accounts(conn, month_key, end)
+        if unreconciled:
+            raise ValueError(f"Summaries for {month_key} do not reconcile with accounts.interest_accrued: "
+                             + ", ".join(f"{account_id} closes at {closing} cents, expected {expected}"
+                                         for account_id, closing, expected in unreconciled))
+
+        cursor.execute("DELETE FROM interest_accruals WHERE accrual_date >= ? AND accrual_date < ?", (start, end))
+        if archive_path:
+            record_archived_accruals(conn, int(month_key[:4]), archive_path, archived)
+        cursor.execute("""
+            INSERT INTO interest_accrual_compactions (
+                accrual_month, account_count, daily_rows, total_interest_cents, archive_file, compacted_at
+            ) VALUES (?, ?, ?, ?, ?, datetime('now'))
+        """, (month_key, *totals, archive_path.name if archive_path else None))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {"month": month_key, "accounts": totals[0], "daily_rows": totals[1],
+            "interest_cents": totals[2], "archive": archive_path}
+
+
+def compact_closed_months(conn, before_month: str = None, today: date = None, archive_dir: Path = None) -> list:
+    """
+    Compact every closed month (see last_closed_month) with daily accrual
+    rows, and before before_month if given, oldest first. Returns the
+    compact_month results.
+    """
+    today = today or date.today()
+    ensure_accrual_summaries(conn)
+    closed_month = last_closed_month(conn)
+    if closed_month is None:
+        return []
+    before_month = min(before_month or today.strftime('%Y-%m'), today.strftime('%Y-%m'))
+
+    months = [month for (month,) in conn.execute("""
+        SELECT DISTINCT substr(accrual_date, 1, 7) FROM interest_accruals
+        WHERE accrual_date < ? AND substr(accrual_date, 1, 7) <= ?
+        ORDER BY 1
+    """, (f"{before_month}-01", closed_month))]
+    return [compact_month(conn, month, today=today, archive_dir=archive_dir) for month in months]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll closed months of daily interest accruals up into summaries')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--before', metavar='YYYY-MM',
+                        help='Compact every closed month before this one (default: every closed month)')
+    target.add_argument('--month', metavar='YYYY-MM', help='Compact this month only')
+    parser.add_argument('--archive-daily', action='store_true',
+                        help='Keep the daily rows in the ledger archive, archive/ledger_YYYY.db')
+
+    args = parser.parse_args()
+    archive_dir = ARCHIVE_DIR if args.archive_daily else None
+
+    try:
+        conn = connect(DB_PATH)
+        if args.month:
+            results = [compact_month(conn, args.month, archive_dir=archive_dir)]
+        else:
+            results = compact_closed_months(conn, args.before, archive_dir=archive_dir)
+        conn.close()
+
+        if not results:
+            print("No closed months with daily accruals to compact")
+        for result in results:
+            print(f"✓ Compacted {result['month']}: {result['daily_rows']:,} daily rows -> "
+                  f"{result['accounts']:,} summaries (${result['interest_cents'] / 100:,.2f} interest)"
+                  + (f", daily rows kept in {result['archive']}" if result['archive'] else ""))
+
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Batch Audit Log Writer
+
+Batch jobs record their postings in audit_log (migration 001) through an
+AuditWriter. Events are buffered in memory while a chunk is computed and
+written with one executemany when the job flushes the writer, just before
+the chunk commits, so the posting loops never wait on an audit INSERT and
+the audit rows commit - or roll back - with the postings they describe.
+
+The writer defers its writes rather than handing them to a background
+thread: SQLite has a single writer, so a second connection would queue on
+the batch's write lock and could commit audit rows for postings that are
+later rolled back.
+
+Events recorded by the batch scripts:
+    TRANSACTION_POSTED   One per posted transaction (monthly fees, monthly
+                         interest); entity Transaction, event_data holds
+                         account_id, category, amount_cents, value_date and
+                         reference
+
+Usage:
+    from audit_log import AuditWriter
+    audit = AuditWriter(conn)
+    audit.record_posting(transaction_id, account_id, 'Fee', 500, '2025-10-31', 'FEE-202510')
+    audit.flush()
+    conn.commit()
+"""
+
+import json
+
+from ledger_ids import new_id
+
+# Events held before record() flushes on its own, bounding memory when a
+# chunk posts more than this
+AUDIT_BUFFER_ROWS = 50000
+
+_INSERT_SQL = """
+    INSERT INTO audit_log (
+        audit_id, event_type, entity_type, entity_id, user_id, event_data, channel
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class AuditWriter:
+    """
+    Buffered audit_log writer for one batch job.
+
+    Args:
+        conn: Connection the job posts on; flush() writes on it and the
+              caller commits
+        channel: audit_log.channel of every event
+        user_id: audit_log.user_id of every event (None for system jobs)
+        buffer_rows: Events held before record() flushes by itself
+    """
+
+    def __init__(self, conn, channel: str = 'Batch', user_id: str = None,
+                 buffer_rows: int = AUDIT_BUFFER_ROWS):
+        self.conn = conn
+        self.channel = channel
+        self.user_id = user_id
+        self.buffer_rows = buffer_rows
+        self.written = 0
+        self._pending = []
+
+    def record(self, event_type: str, entity_type: str, entity_id: str, event_data: dict = None):
+        """Buffer one event; event_data is stored as compact JSON."""
+        self._pending.append((
+            new_id("AUD"),
+            event_type,
+            entity_type,
+            entity_id,
+            self.user_id,
+            json.dumps(event_data, separators=(',', ':')) if event_data is not None else None,
+            self.channel,
+        ))
+        if len(self._pending) >= self.buffer_rows:
+            self.flush()
+
+    def record_posting(self, transaction_id: str, account_id: str, category: str,
+                       amount_cents: int, value_date: str, reference: str = None):
+        """Buffer a TRANSACTION_POSTED event for a batch posting."""
+        self.record('TRANSACTION_POSTED', 'Transaction', transaction_id, {
+            "account_id": account_id,
+            "category": category,
+            "amount_cents": amount_cents,
+            "value_date": value_date,
+            "reference": reference,
+        })
+
+    def flush(self) -> int:
+        """Write the buffered events with one executemany (caller commits). Returns events written."""
+        if not self._pending:
+            return 0
+        self.conn.executemany(_INSERT_SQL, self._pending)
+        count = len(self._pending)
+        self.written += count
+        self._pending = []
+        return count
+
+    def discard(self) -> int:
+        """Drop the buffered events, e.g. after the chunk they describe rolled back. Returns events dropped."""
+        count = len(self._pending)
+        self._pending = []
+        return count
@@ -8,17 +8,73 @@ This script performs critical end-of-day operations for the banking system:
 3. Balance verification and reconciliation
 
 This ensures all financial calculations are accurate and consistent.
+
+Usage:
+    python3 batch_eod_processing.py [--bulk] [--workers N] [--checkpoint] [--chunk-size N] [--full]
+    python3 batch_eod_processing.py --from YYYY-MM-DD [--to YYYY-MM-DD] [--full]
+
+Options:
+    --bulk             Accrue interest and post month-end fees as set-based batches
+                       instead of per account
+    --workers N        Shard accounts across N worker processes feeding a single
+                       writer process (implies bulk computation)
+    --checkpoint       Commit in chunks recorded in the batch run ledger, so a
+                       rerun after a failure resumes from the last committed chunk
+    --chunk-size N     Accounts per page and commit when streaming, and per
+                       checkpointed chunk (default 10000)
+    --from/--to        Catch up on missed days: accrue interest for every day in
+                       the range (and fees on month ends inside it) in one pass,
+                       committing month by month
+    --full             Verify every balance against its full transaction history
+                       instead of the transactions since its last balance checkpoint
+
+Interest accrual and fee application stream eligible accounts in keyset pages
+of --chunk-size accounts (account_id order) and commit each page, so memory
+stays flat however many accounts the book holds.
+
+Every mode skips account/date pairs that already have an interest accrual and
+accounts already charged this month's fee, so rerunning a day is safe.
+
+Every fee posting is recorded in audit_log through a buffered AuditWriter
+(audit_log.py), flushed into the transaction of the chunk it belongs to.
 """
 
-import sqlite3
 import sys
+import argparse
 from pathlib import Path
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-import uuid
+from collections import defaultdict
+import multiprocessing
+import queue
+import zlib
+
+from db_connection import (connect, ensure_table, ensure_integer_ledger_columns, ensure_ledger_archive,
+                           ensure_updated_at_triggers, last_archived_year, iter_keyset_pages, MIGRATIONS_DIR)
+from ledger_ids import new_id
+from audit_log import AuditWriter
+from account_stats import refresh_account_stats
+from ledger_repair import repair_running_balances
+from interest_kernel import group_interest_from_cents, cents_to_decimal, decimal_interest
+from accrual_compaction import compacted_months
+from day_count import DEFAULT_DAILY_CONVENTION, daily_fractions, day_number, ensure_day_count_convention
 
 DB_PATH = Path(__file__).parent.parent / "accounts.db"
 
+# Sharded mode: rows per message on the commit queue and per writer transaction
+COMMIT_QUEUE_CHUNK = 10000
+COMMIT_ROWS = 100000
+# Seconds between checks that the commit writer is still alive
+WRITER_POLL_SECONDS = 1.0
+
+# Streaming and checkpointed modes: accounts per page (and per commit)
+CHECKPOINT_CHUNK = 10000
+
+# Migrations applied on first use to databases created before them
+BATCH_LEDGER_MIGRATION = MIGRATIONS_DIR / "004_add_batch_run_ledger.sql"
+BALANCE_CHECKPOINT_MIGRATION = MIGRATIONS_DIR / "005_add_balance_checkpoints.sql"
+FEE_SKIP_REPORT_MIGRATION = MIGRATIONS_DIR / "006_add_fee_skip_report.sql"
+
 
 def calculate_daily_interest(balance: Decimal, annual_rate: Decimal) -> Decimal:
     """
@@ -40,238 +96,1406 @@ def calculate_daily_interest(balance: Decimal, annual_rate: Decimal) -> Decimal:
     return daily_interest.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 
-def accrue_interest(conn, processing_date: date):
+def daily_day_fraction(convention: str, processing_date: date) -> tuple:
+    """Return the (days, year_days) fraction one accrual day earns under convention (None: Actual/365)."""
+    days, year_days = daily_fractions(convention or DEFAULT_DAILY_CONVENTION, [processing_date])
+    return int(days[0]), int(year_days[0])
+
+
+def check_not_compacted(conn, start_date: date, end_date: date = None):
     """
-    Accrue interest on all eligible accounts.
+    Refuse to accrue interest from start_date to end_date (default: start_date)
+    if any of their months were compacted (accrual_compaction.py): the daily
+    rows that make a rerun skip already accrued accounts are gone.
 
-    An account is eligible for interest if:
-    - Status is 'Active'
-    - Balance >= minimum_balance_for_interest (from product)
-    - Product interest_rate > 0
+    Raises:
+        ValueError: If a month in the range is compacted
     """
-    cursor = conn.cursor()
+    months = compacted_months(conn, start_date, end_date or start_date)
+    if months:
+        raise ValueError(f"Cannot accrue interest into compacted month(s): {', '.join(months)}")
+
+
+def shard_of(account_id: str, shard_count: int) -> int:
+    """Return the shard an account belongs to (crc32, stable across processes)."""
+    return zlib.crc32(account_id.encode()) % shard_count
+
+
+def _restrict_to_shard(query: str, shard: tuple) -> tuple:
+    """Append a shard predicate to an eligibility query; returns (query, params)."""
+    if shard is None:
+        return query, ()
+    shard_index, shard_count = shard
+    return query + "  AND shard_of(a.account_id, ?) = ?\n", (shard_count, shard_index)
 
-    print(f"\n{'='*70}")
-    print(f"Interest Accrual Process - {processing_date}")
-    print(f"{'='*70}\n")
 
-    # Find all active accounts eligible for interest
+def _restrict_to_page(query: str, page: tuple) -> tuple:
+    """Append a keyset page (accounts after an account_id); returns (query, params)."""
+    if page is None:
+        return query, ()
+    after_account_id, limit = page
+    return query + "  AND a.account_id > ?\n  ORDER BY a.account_id\n  LIMIT ?\n", (after_account_id or '', limit)
+
+
+def get_interest_eligible_accounts(cursor, processing_date: date, shard: tuple = None,
+                                   page: tuple = None) -> list:
+    """
+    Fetch all active accounts eligible for interest accrual.
+
+    Accounts that already have an accrual for processing_date are left out
+    (anti-join on interest_accruals), so a rerun skips them instead of
+    violating UNIQUE(account_id, accrual_date).
+
+    Args:
+        cursor: Database cursor
+        processing_date: Accrual date being processed
+        shard: Optional (shard_index, shard_count) to restrict to one shard;
+               the connection must have shard_of registered
+        page: Optional (after_account_id, limit) to fetch one keyset page in
+              account_id order
+
+    Returns rows of (account_id, account_number, balance_cents,
+    interest_accrued_cents, interest_rate, minimum_balance_for_interest,
+    currency, day_count_convention).
+    """
     query = """
         SELECT
             a.account_id,
             a.account_number,
-            a.balance,
-            a.interest_accrued,
+            a.balance_cents,
+            a.interest_accrued_cents,
             p.interest_rate,
             p.minimum_balance_for_interest,
-            p.currency
+            p.currency,
+            p.day_count_convention
         FROM accounts a
         INNER JOIN products p ON a.product_id = p.product_id
         WHERE a.status = 'Active'
           AND p.interest_rate > 0
           AND a.balance >= p.minimum_balance_for_interest
+          AND NOT EXISTS (
+              SELECT 1 FROM interest_accruals ia
+              WHERE ia.account_id = a.account_id
+                AND ia.accrual_date = ?
+          )
+    """
+
+    query, shard_params = _restrict_to_shard(query, shard)
+    query, page_params = _restrict_to_page(query, page)
+    return cursor.execute(query, (processing_date.isoformat(),) + shard_params + page_params).fetchall()
+
+
+def accrue_interest(conn, processing_date: date, chunk_size: int = CHECKPOINT_CHUNK):
+    """
+    Accrue interest on all eligible accounts.
+
+    An account is eligible for interest if:
+    - Status is 'Active'
+    - Balance >= minimum_balance_for_interest (from product)
+    - Product interest_rate > 0
+
+    Accounts are read in keyset pages of chunk_size and each page is
+    committed before the next is read.
     """
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    check_not_compacted(conn, processing_date)
+    cursor = conn.cursor()
 
-    eligible_accounts = cursor.execute(query).fetchall()
+    print(f"\n{'='*70}")
+    print(f"Interest Accrual Process - {processing_date}")
+    print(f"{'='*70}\n")
 
-    if not eligible_accounts:
+    eligible_count = 0
+    total_interest_accrued = Decimal('0')
+    day_fractions = {}
+
+    for page in iter_keyset_pages(
+            lambda page: get_interest_eligible_accounts(cursor, processing_date, page=page), chunk_size):
+        eligible_count += len(page)
+
+        for row in page:
+            (account_id, account_number, balance, current_accrued, interest_rate, min_balance, currency,
+             day_count_convention) = row
+
+            balance = cents_to_decimal(balance)
+            current_accrued = cents_to_decimal(current_accrued)
+            interest_rate = Decimal(str(interest_rate))
+
+            # Calculate daily interest under the product's day count convention
+            if day_count_convention not in day_fractions:
+                day_fractions[day_count_convention] = daily_day_fraction(day_count_convention, processing_date)
+            daily_interest = decimal_interest(balance, interest_rate, day_fractions[day_count_convention])
+
+            if daily_interest <= Decimal('0'):
+                continue
+
+            # Update interest_accrued on account
+            new_accrued = current_accrued + daily_interest
+
+            cursor.execute("""
+                UPDATE accounts
+                SET interest_accrued = ?,
+                    updated_at = datetime('now')
+                WHERE account_id = ?
+            """, (float(new_accrued), account_id))
+
+            # Record accrual in interest_accruals table
+            accrual_id = new_id("ACRL")
+            cursor.execute("""
+                INSERT INTO interest_accruals (
+                    accrual_id, account_id, accrual_date, balance,
+                    annual_rate, daily_interest, cumulative_accrued, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+            """, (
+                accrual_id,
+                account_id,
+                processing_date.isoformat(),
+                float(balance),
+                float(interest_rate),
+                float(daily_interest),
+                float(new_accrued)
+            ))
+
+            total_interest_accrued += daily_interest
+
+            print(f"  {account_number}: Balance ${balance:>12,.2f} × {interest_rate*100:>5.2f}% = ${daily_interest:>8.2f} (Accrued: ${new_accrued:>10.2f})")
+
+        conn.commit()
+
+    if not eligible_count:
         print("No accounts eligible for interest accrual.")
         return
 
-    print(f"Found {len(eligible_accounts)} eligible accounts:\n")
+    print(f"\n{'='*70}")
+    print(f"✓ Interest accrued on {eligible_count} accounts: ${total_interest_accrued:,.2f}")
+    print(f"{'='*70}\n")
 
-    total_interest_accrued = Decimal('0')
 
+def compute_interest_accruals(eligible_accounts: list, processing_date: date,
+                              day_fractions: dict = None) -> tuple:
+    """
+    Compute the day's interest accruals for a batch of eligible accounts.
+
+    Accounts are grouped by rate and day count convention so each product
+    group is priced in one kernel call. day_fractions optionally maps each
+    convention to its (days, year_days) for processing_date, precomputed by
+    callers that price many days.
+
+    Returns:
+        (account_updates, accrual_rows, total_interest) where account_updates
+        and accrual_rows are parameter tuples for write_interest_accruals,
+        with amounts in integer cents
+    """
+    rate_groups = defaultdict(list)
     for row in eligible_accounts:
-        account_id, account_number, balance, current_accrued, interest_rate, min_balance, currency = row
+        rate_groups[(row[4], row[7])].append(row)
 
-        balance = Decimal(str(balance))
-        current_accrued = Decimal(str(current_accrued))
-        interest_rate = Decimal(str(interest_rate))
+    accrual_date = processing_date.isoformat()
+    account_updates = []
+    accrual_rows = []
+    total_interest_cents = 0
 
-        # Calculate daily interest
-        daily_interest = calculate_daily_interest(balance, interest_rate)
+    for (interest_rate, day_count_convention), group in rate_groups.items():
+        if day_fractions and day_count_convention in day_fractions:
+            day_fraction = day_fractions[day_count_convention]
+        else:
+            day_fraction = daily_day_fraction(day_count_convention, processing_date)
+        daily_interests = group_interest_from_cents([row[2] for row in group], interest_rate, day_fraction)
+
+        for row, daily_interest in zip(group, daily_interests.tolist()):
+            if daily_interest <= 0:
+                continue
+
+            account_id, _, balance, current_accrued = row[:4]
+            new_accrued = current_accrued + daily_interest
+
+            account_updates.append((new_accrued, account_id))
+            accrual_rows.append((
+                new_id("ACRL"),
+                account_id,
+                accrual_date,
+                balance,
+                interest_rate,
+                daily_interest,
+                new_accrued
+            ))
+
+            total_interest_cents += daily_interest
+
+    return account_updates, accrual_rows, cents_to_decimal(total_interest_cents)
+
+
+def write_interest_accruals(cursor, account_updates: list, accrual_rows: list):
+    """Write computed accruals (amounts in cents) with one executemany per table (caller commits)."""
+    cursor.executemany("""
+        UPDATE accounts
+        SET interest_accrued = ? / 100.0,
+            updated_at = datetime('now')
+        WHERE account_id = ?
+    """, account_updates)
+
+    cursor.executemany("""
+        INSERT INTO interest_accruals (
+            accrual_id, account_id, accrual_date, balance,
+            annual_rate, daily_interest, cumulative_accrued, created_at
+        ) VALUES (?, ?, ?, ? / 100.0, ?, ? / 100.0, ? / 100.0, datetime('now'))
+    """, accrual_rows)
+
+
+def accrue_interest_bulk(conn, processing_date: date, chunk_size: int = CHECKPOINT_CHUNK):
+    """
+    Accrue interest on all eligible accounts as set-based batches.
 
-        if daily_interest <= Decimal('0'):
-            continue
+    Applies the same eligibility rules and calculation as accrue_interest,
+    but computes each page of chunk_size accounts up front and writes it with
+    two executemany statements instead of two round trips per account. Each
+    page is committed on its own; a rerun skips the accounts already accrued.
+    No per-account lines are printed.
+    """
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    check_not_compacted(conn, processing_date)
+    cursor = conn.cursor()
 
-        # Update interest_accrued on account
-        new_accrued = current_accrued + daily_interest
+    print(f"\n{'='*70}")
+    print(f"Interest Accrual Process (bulk) - {processing_date}")
+    print(f"{'='*70}\n")
 
-        cursor.execute("""
-            UPDATE accounts
-            SET interest_accrued = ?,
-                updated_at = datetime('now')
-            WHERE account_id = ?
-        """, (float(new_accrued), account_id))
-
-        # Record accrual in interest_accruals table
-        accrual_id = f"ACRL-{uuid.uuid4()}"
-        cursor.execute("""
-            INSERT INTO interest_accruals (
-                accrual_id, account_id, accrual_date, balance,
-                annual_rate, daily_interest, cumulative_accrued, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        """, (
-            accrual_id,
-            account_id,
-            processing_date.isoformat(),
-            float(balance),
-            float(interest_rate),
-            float(daily_interest),
-            float(new_accrued)
-        ))
+    eligible_count = 0
+    accrual_count = 0
+    chunks = 0
+    total_interest_accrued = Decimal('0')
 
-        total_interest_accrued += daily_interest
+    for page in iter_keyset_pages(
+            lambda page: get_interest_eligible_accounts(cursor, processing_date, page=page), chunk_size):
+        account_updates, accrual_rows, page_interest = compute_interest_accruals(page, processing_date)
 
-        print(f"  {account_number}: Balance ${balance:>12,.2f} × {interest_rate*100:>5.2f}% = ${daily_interest:>8.2f} (Accrued: ${new_accrued:>10.2f})")
+        # Both statements run inside the implicit transaction opened by the
+        # first write, so each page is committed (or rolled back) as one unit.
+        write_interest_accruals(cursor, account_updates, accrual_rows)
+        conn.commit()
 
-    conn.commit()
+        eligible_count += len(page)
+        accrual_count += len(accrual_rows)
+        chunks += 1
+        total_interest_accrued += page_interest
 
-    print(f"\n{'='*70}")
-    print(f"✓ Interest accrued on {len(eligible_accounts)} accounts: ${total_interest_accrued:,.2f}")
+    if not eligible_count:
+        print("No accounts eligible for interest accrual.")
+        return
+
+    print(f"{'='*70}")
+    print(f"✓ Interest accrued on {eligible_count} accounts: ${total_interest_accrued:,.2f}")
+    print(f"  ({accrual_count} accrual rows written in {chunks} chunk(s) of up to {chunk_size} accounts)")
     print(f"{'='*70}\n")
 
 
-def apply_monthly_fees(conn, processing_date: date):
-    """
-    Apply monthly maintenance fees if today is the last day of the month.
+def is_last_day_of_month(processing_date: date) -> bool:
+    """Return True if processing_date is the last calendar day of its month."""
+    return (processing_date + timedelta(days=1)).month != processing_date.month
 
-    Fees are applied as:
-    - Debit transaction with category 'Fee'
-    - Description: 'Monthly maintenance fee'
-    - Amount from product.monthly_maintenance_fee
-    """
-    # Check if today is last day of month
-    next_day = date(processing_date.year, processing_date.month, processing_date.day) + \
-               __import__('datetime').timedelta(days=1)
 
-    if next_day.month == processing_date.month:
-        print("Not end of month - skipping monthly fee application.\n")
-        return
+def fee_reference(processing_date: date) -> str:
+    """Return the reference stamped on the month's fee transactions (FEE-YYYYMM)."""
+    return f'FEE-{processing_date.strftime("%Y%m")}'
 
-    cursor = conn.cursor()
 
-    print(f"\n{'='*70}")
-    print(f"Monthly Fee Application - {processing_date}")
-    print(f"{'='*70}\n")
+def get_fee_eligible_accounts(cursor, processing_date: date, shard: tuple = None,
+                              page: tuple = None) -> list:
+    """
+    Fetch all active accounts whose product charges a monthly fee.
+
+    Accounts already charged this month's fee (a Fee transaction carrying
+    fee_reference) are left out. The exclusion is an uncorrelated NOT IN,
+    built once per query: as a correlated NOT EXISTS the planner drives it
+    through idx_transactions_category and rescans every fee per account.
 
-    # Find all active accounts with monthly fees
+    The optional shard and page arguments work as in
+    get_interest_eligible_accounts.
+
+    Returns rows of (account_id, account_number, balance_cents,
+    monthly_maintenance_fee in cents, currency).
+    """
     query = """
         SELECT
             a.account_id,
             a.account_number,
-            a.balance,
-            p.monthly_maintenance_fee,
+            a.balance_cents,
+            CAST(round(p.monthly_maintenance_fee * 100) AS INTEGER),
             p.currency
         FROM accounts a
         INNER JOIN products p ON a.product_id = p.product_id
         WHERE a.status = 'Active'
           AND p.monthly_maintenance_fee > 0
+          AND a.account_id NOT IN (
+              SELECT t.account_id FROM transactions t
+              WHERE t.category = 'Fee'
+                AND t.reference = ?
+          )
     """
 
-    accounts_with_fees = cursor.execute(query).fetchall()
+    query, shard_params = _restrict_to_shard(query, shard)
+    query, page_params = _restrict_to_page(query, page)
+    return cursor.execute(query, (fee_reference(processing_date),) + shard_params + page_params).fetchall()
 
-    if not accounts_with_fees:
-        print("No accounts with monthly fees.")
-        return
 
-    print(f"Found {len(accounts_with_fees)} accounts with monthly fees:\n")
+def compute_fee_postings(accounts_with_fees: list, processing_date: date) -> tuple:
+    """
+    Compute monthly fee postings for a batch of accounts.
 
-    total_fees_applied = Decimal('0')
-    insufficient_balance_count = 0
+    Each fee transaction's running_balance is the account balance after the
+    fee. Transaction ids are derived from the fee month and account
+    (TXN-FEE-YYYYMM-<account_id>), so a month's fee can only be posted once.
 
-    for row in accounts_with_fees:
-        account_id, account_number, balance, monthly_fee, currency = row
+    Returns:
+        (balance_updates, fee_transactions, total_fees, skipped_rows) where
+        balance_updates and fee_transactions are parameter tuples for
+        write_fee_postings, and skipped_rows (accounts with insufficient
+        balance) are parameter tuples for write_fee_skips, with amounts in
+        integer cents
+    """
+    value_date = processing_date.isoformat()
+    reference = fee_reference(processing_date)
+    fee_month = processing_date.strftime("%Y%m")
+    created_at = datetime.now().isoformat()
 
-        balance = Decimal(str(balance))
-        monthly_fee = Decimal(str(monthly_fee))
+    balance_updates = []
+    fee_transactions = []
+    skipped_rows = []
+    total_fees_cents = 0
 
-        # Check sufficient balance
+    for account_id, _, balance, monthly_fee, currency in accounts_with_fees:
         if balance < monthly_fee:
-            print(f"  {account_number}: SKIPPED - Insufficient balance (${balance:,.2f} < ${monthly_fee:,.2f})")
-            insufficient_balance_count += 1
+            skipped_rows.append((account_id, reference, value_date, balance, monthly_fee))
             continue
 
-        # Deduct fee from balance
         new_balance = balance - monthly_fee
 
-        # Update account balance
-        cursor.execute("""
-            UPDATE accounts
-            SET balance = ?,
-                updated_at = datetime('now')
-            WHERE account_id = ?
-        """, (float(new_balance), account_id))
-
-        # Create transaction record
-        transaction_id = f"TXN-FEE-{uuid.uuid4()}"
-        cursor.execute("""
-            INSERT INTO transactions (
-                transaction_id, account_id, transaction_date, value_date,
-                type, category, amount, currency, running_balance,
-                description, reference, channel, status, created_at, created_by
-            ) VALUES (?, ?, datetime('now'), ?, 'Debit', 'Fee', ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            transaction_id,
+        balance_updates.append((new_balance, account_id))
+        fee_transactions.append((
+            f"TXN-FEE-{fee_month}-{account_id}",
             account_id,
-            processing_date.isoformat(),
-            float(monthly_fee),
+            value_date,
+            monthly_fee,
             currency,
-            float(new_balance),
+            new_balance,
             'Monthly maintenance fee',
-            f'FEE-{processing_date.strftime("%Y%m")}',
+            reference,
             'Batch',
             'Posted',
-            datetime.now().isoformat(),
+            created_at,
             'SYSTEM'
         ))
 
-        total_fees_applied += monthly_fee
+        total_fees_cents += monthly_fee
+
+    return balance_updates, fee_transactions, cents_to_decimal(total_fees_cents), skipped_rows
+
+
+def write_fee_postings(cursor, balance_updates: list, fee_transactions: list, audit: AuditWriter = None):
+    """
+    Write computed fee postings (amounts in cents) with one executemany per
+    table, and record them in audit's buffer if given (caller flushes and
+    commits).
+    """
+    cursor.executemany("""
+        UPDATE accounts
+        SET balance = ? / 100.0,
+            updated_at = datetime('now')
+        WHERE account_id = ?
+    """, balance_updates)
+
+    cursor.executemany("""
+        INSERT INTO transactions (
+            transaction_id, account_id, transaction_date, value_date,
+            type, category, amount, currency, running_balance,
+            description, reference, channel, status, created_at, created_by
+        ) VALUES (?, ?, datetime('now'), ?, 'Debit', 'Fee', ? / 100.0, ?, ? / 100.0, ?, ?, ?, ?, ?, ?)
+    """, fee_transactions)
+
+    if audit is not None:
+        for transaction_id, account_id, value_date, fee_cents, _, _, _, reference, *_ in fee_transactions:
+            audit.record_posting(transaction_id, account_id, 'Fee', fee_cents, value_date, reference)
+
+
+def write_fee_skips(cursor, skipped_rows: list):
+    """Record accounts skipped for insufficient balance (amounts in cents) in fee_skip_report (caller commits)."""
+    cursor.executemany("""
+        INSERT OR REPLACE INTO fee_skip_report (
+            account_id, fee_reference, processing_date, balance, monthly_fee, reason
+        ) VALUES (?, ?, ?, ? / 100.0, ? / 100.0, 'Insufficient balance')
+    """, skipped_rows)
+
+
+def apply_monthly_fees_bulk(conn, processing_date: date, chunk_size: int = CHECKPOINT_CHUNK):
+    """
+    Apply monthly maintenance fees as set-based batches at month end.
+
+    Applies the same rules as apply_monthly_fees. Fee-paying accounts are read
+    in keyset pages of chunk_size; each page is split into postings and
+    insufficient-balance skips, written with one executemany per table and
+    committed. Skipped accounts go to fee_skip_report instead of stdout.
+    """
+    if not is_last_day_of_month(processing_date):
+        print("Not end of month - skipping monthly fee application.\n")
+        return
+
+    ensure_table(conn, 'fee_skip_report', FEE_SKIP_REPORT_MIGRATION)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    cursor = conn.cursor()
+    audit = AuditWriter(conn)
+
+    print(f"\n{'='*70}")
+    print(f"Monthly Fee Application (bulk) - {processing_date}")
+    print(f"{'='*70}\n")
+
+    account_count = 0
+    fees_posted = 0
+    skipped_count = 0
+    total_fees_applied = Decimal('0')
+
+    for page in iter_keyset_pages(
+            lambda page: get_fee_eligible_accounts(cursor, processing_date, page=page), chunk_size):
+        balance_updates, fee_transactions, page_fees, skipped_rows = compute_fee_postings(
+            page, processing_date)
+
+        write_fee_postings(cursor, balance_updates, fee_transactions, audit)
+        write_fee_skips(cursor, skipped_rows)
+        audit.flush()
+        conn.commit()
 
-        print(f"  {account_number}: ${monthly_fee:>8.2f} applied (New balance: ${new_balance:>12,.2f})")
+        account_count += len(page)
+        fees_posted += len(fee_transactions)
+        skipped_count += len(skipped_rows)
+        total_fees_applied += page_fees
 
+    # Statistics absorb every page's postings in one pass
+    refresh_account_stats(conn)
     conn.commit()
 
+    if not account_count:
+        print("No accounts with monthly fees.")
+        return
+
+    print(f"{'='*70}")
+    print(f"✓ Fees applied to {fees_posted} accounts: ${total_fees_applied:,.2f}")
+    if skipped_count:
+        print(f"  ⚠ {skipped_count} accounts skipped due to insufficient balance "
+              f"(see fee_skip_report, {fee_reference(processing_date)})")
+    print(f"{'='*70}\n")
+
+
+def apply_monthly_fees(conn, processing_date: date, chunk_size: int = CHECKPOINT_CHUNK):
+    """
+    Apply monthly maintenance fees if today is the last day of the month.
+
+    Fees are applied as:
+    - Debit transaction with category 'Fee'
+    - Description: 'Monthly maintenance fee'
+    - Amount from product.monthly_maintenance_fee
+
+    Accounts are read in keyset pages of chunk_size and each page is
+    committed before the next is read.
+    """
+    if not is_last_day_of_month(processing_date):
+        print("Not end of month - skipping monthly fee application.\n")
+        return
+
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    cursor = conn.cursor()
+    audit = AuditWriter(conn)
+
+    print(f"\n{'='*70}")
+    print(f"Monthly Fee Application - {processing_date}")
+    print(f"{'='*70}\n")
+
+    account_count = 0
+    total_fees_applied = Decimal('0')
+    insufficient_balance_count = 0
+
+    for page in iter_keyset_pages(
+            lambda page: get_fee_eligible_accounts(cursor, processing_date, page=page), chunk_size):
+        account_count += len(page)
+
+        for row in page:
+            account_id, account_number, balance, monthly_fee, currency = row
+
+            balance = cents_to_decimal(balance)
+            monthly_fee = cents_to_decimal(monthly_fee)
+
+            # Check sufficient balance
+            if balance < monthly_fee:
+                print(f"  {account_number}: SKIPPED - Insufficient balance (${balance:,.2f} < ${monthly_fee:,.2f})")
+                insufficient_balance_count += 1
+                continue
+
+            # Deduct fee from balance
+            new_balance = balance - monthly_fee
+
+            # Update account balance
+            cursor.execute("""
+                UPDATE accounts
+                SET balance = ?,
+                    updated_at = datetime('now')
+                WHERE account_id = ?
+            """, (float(new_balance), account_id))
+
+            # Create transaction record (same id as the bulk path: one fee per account and month)
+            transaction_id = f"TXN-FEE-{processing_date.strftime('%Y%m')}-{account_id}"
+            cursor.execute("""
+                INSERT INTO transactions (
+                    transaction_id, account_id, transaction_date, value_date,
+                    type, category, amount, currency, running_balance,
+                    description, reference, channel, status, created_at, created_by
+                ) VALUES (?, ?, datetime('now'), ?, 'Debit', 'Fee', ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                transaction_id,
+                account_id,
+                processing_date.isoformat(),
+                float(monthly_fee),
+                currency,
+                float(new_balance),
+                'Monthly maintenance fee',
+                fee_reference(processing_date),
+                'Batch',
+                'Posted',
+                datetime.now().isoformat(),
+                'SYSTEM'
+            ))
+
+            audit.record_posting(transaction_id, account_id, 'Fee', int(monthly_fee * 100),
+                                 processing_date.isoformat(), fee_reference(processing_date))
+            total_fees_applied += monthly_fee
+
+            print(f"  {account_number}: ${monthly_fee:>8.2f} applied (New balance: ${new_balance:>12,.2f})")
+
+        audit.flush()
+        conn.commit()
+
+    # Statistics absorb every page's postings in one pass
+    refresh_account_stats(conn)
+    conn.commit()
+
+    if not account_count:
+        print("No accounts with monthly fees.")
+        return
+
     print(f"\n{'='*70}")
-    print(f"✓ Fees applied to {len(accounts_with_fees) - insufficient_balance_count} accounts: ${total_fees_applied:,.2f}")
+    print(f"✓ Fees applied to {account_count - insufficient_balance_count} accounts: ${total_fees_applied:,.2f}")
     if insufficient_balance_count > 0:
         print(f"  ⚠ {insufficient_balance_count} accounts skipped due to insufficient balance")
     print(f"{'='*70}\n")
 
 
-def verify_data_integrity(conn):
+# ============================================================================
+# SHARDED MULTI-PROCESS MODE
+# ============================================================================
+#
+# Worker processes each read one shard of the accounts (crc32 of account_id),
+# compute accruals and fee postings, and push the parameter rows onto a
+# bounded queue. A single writer process drains the queue and applies them in
+# large transactions, so compute scales with cores while SQLite still sees
+# exactly one writer.
+
+_commit_queue = None
+
+
+def _init_shard_worker(commit_queue):
+    """Pool initializer: keep the commit queue for _process_shard."""
+    global _commit_queue
+    _commit_queue = commit_queue
+
+
+def _send_in_chunks(kind: str, updates: list, rows: list):
+    """Push aligned update/insert parameter lists (updates may be None) onto the commit queue."""
+    for start in range(0, len(rows), COMMIT_QUEUE_CHUNK):
+        end = start + COMMIT_QUEUE_CHUNK
+        chunk_updates = updates[start:end] if updates is not None else None
+        _commit_queue.put((kind, chunk_updates, rows[start:end]))
+
+
+def _process_shard(db_path: str, processing_date: date, shard_index: int,
+                   shard_count: int, apply_fees: bool) -> dict:
+    """Compute one shard's accruals and fee postings and queue them for the writer."""
+    try:
+        conn = connect(db_path)
+        conn.create_function("shard_of", 2, shard_of, deterministic=True)
+        cursor = conn.cursor()
+        shard = (shard_index, shard_count)
+
+        # Read both sets before anything for this shard is written, so the
+        # shard sees the same pre-EOD state as the serial run
+        eligible_accounts = get_interest_eligible_accounts(cursor, processing_date, shard)
+        accounts_with_fees = get_fee_eligible_accounts(cursor, processing_date, shard) if apply_fees else []
+        conn.close()
+
+        account_updates, accrual_rows, total_interest = compute_interest_accruals(
+            eligible_accounts, processing_date)
+        _send_in_chunks('accruals', account_updates, accrual_rows)
+
+        balance_updates, fee_transactions, total_fees, skipped_rows = compute_fee_postings(
+            accounts_with_fees, processing_date)
+        _send_in_chunks('fees', balance_updates, fee_transactions)
+        _send_in_chunks('fee_skips', None, skipped_rows)
+
+        return {
+            "eligible_accounts": len(eligible_accounts),
+            "total_interest": total_interest,
+            "fee_accounts": len(accounts_with_fees),
+            "total_fees": total_fees,
+            "insufficient_balance": len(skipped_rows),
+        }
+    except Exception as e:
+        _commit_queue.put(('error', f"shard {shard_index}: {e}", None))
+        raise
+    finally:
+        _commit_queue.put(None)
+
+
+def _commit_writer(db_path: str, commit_queue, result_queue, producer_count: int, commit_rows: int):
+    """Single writer: apply queued postings, committing every commit_rows rows."""
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    audit = AuditWriter(conn)
+
+    written = {'accruals': 0, 'fees': 0, 'fee_skips': 0}
+    pending_rows = 0
+    finished = 0
+    error = None
+
+    while finished < producer_count:
+        item = commit_queue.get()
+        if item is None:
+            finished += 1
+            continue
+        if error:
+            continue  # keep draining so producers never block on a full queue
+
+        kind, updates, rows = item
+        try:
+            if kind == 'error':
+                raise RuntimeError(updates)
+            if kind == 'accruals':
+                write_interest_accruals(cursor, updates, rows)
+            elif kind == 'fees':
+                write_fee_postings(cursor, updates, rows, audit)
+            elif kind == 'fee_skips':
+                write_fee_skips(cursor, rows)
+
+            written[kind] += len(rows)
+            pending_rows += len(rows)
+            if pending_rows >= commit_rows:
+                audit.flush()
+                conn.commit()
+                pending_rows = 0
+        except Exception as e:
+            conn.rollback()
+            audit.discard()
+            error = str(e)
+
+    if not error:
+        audit.flush()
+        conn.commit()
+        # Statistics absorb every commit's postings in one pass
+        refresh_account_stats(conn)
+        conn.commit()
+    conn.close()
+
+    result_queue.put({"written": written, "error": error})
+
+
+def _wait_for_writer(writer, result_queue) -> dict:
+    """Wait for the commit writer's result; raise if the writer exits without one."""
+    while True:
+        try:
+            return result_queue.get(timeout=WRITER_POLL_SECONDS)
+        except queue.Empty:
+            if writer.is_alive():
+                continue
+        # The writer puts its result just before exiting, so give the pipe
+        # one more poll before treating the exit as a crash
+        try:
+            return result_queue.get(timeout=WRITER_POLL_SECONDS)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Commit writer exited without a result (exit code {writer.exitcode})") from None
+
+
+def run_sharded_eod(db_path: Path, processing_date: date, workers: int,
+                    commit_rows: int = COMMIT_ROWS) -> dict:
     """
-    Verify that all account balances match their transaction history.
+    Run interest accrual and (at month end) fee application across a process pool.
+
+    Produces the same postings and totals as accrue_interest_bulk followed by
+    apply_monthly_fees_bulk. Verification is left to the caller.
+
+    Returns:
+        Dict with eligible/posted counts and interest and fee totals
+
+    Raises:
+        RuntimeError: If the commit writer fails or exits without reporting
     """
+    apply_fees = is_last_day_of_month(processing_date)
+    conn = connect(db_path)
+    try:
+        ensure_day_count_convention(conn)
+        ensure_integer_ledger_columns(conn)
+        ensure_updated_at_triggers(conn)
+        check_not_compacted(conn, processing_date)
+        if apply_fees:
+            ensure_table(conn, 'fee_skip_report', FEE_SKIP_REPORT_MIGRATION)
+    finally:
+        conn.close()
+
     print(f"\n{'='*70}")
-    print(f"Data Integrity Verification")
+    print(f"Sharded EOD Processing - {processing_date} ({workers} workers, 1 writer)")
     print(f"{'='*70}\n")
 
-    query = """
+    commit_queue = multiprocessing.Queue(maxsize=workers * 4)
+    result_queue = multiprocessing.Queue()
+
+    writer = multiprocessing.Process(
+        target=_commit_writer,
+        args=(str(db_path), commit_queue, result_queue, workers, commit_rows)
+    )
+    writer.start()
+
+    pool = multiprocessing.Pool(workers, initializer=_init_shard_worker, initargs=(commit_queue,))
+    try:
+        pending = pool.starmap_async(_process_shard, [
+            (str(db_path), processing_date, shard_index, workers, apply_fees)
+            for shard_index in range(workers)
+        ])
+        writer_result = _wait_for_writer(writer, result_queue)
+    except BaseException:
+        # Nothing drains the commit queue any more, so producers blocked on
+        # the full queue would never return: stop them rather than join
+        pool.terminate()
+        pool.join()
+        writer.terminate()
+        writer.join()
+        raise
+
+    # The writer has seen every shard's final chunk, so the workers' queue
+    # feeder threads are flushed and close/join returns
+    pool.close()
+    pool.join()
+    writer.join()
+    shard_results = pending.get()
+
+    if writer_result["error"]:
+        raise RuntimeError(f"Commit writer failed: {writer_result['error']}")
+
+    summary = {
+        "eligible_accounts": sum(r["eligible_accounts"] for r in shard_results),
+        "accruals_posted": writer_result["written"]["accruals"],
+        "total_interest": sum((r["total_interest"] for r in shard_results), Decimal('0')),
+        "fee_accounts": sum(r["fee_accounts"] for r in shard_results),
+        "fees_posted": writer_result["written"]["fees"],
+        "total_fees": sum((r["total_fees"] for r in shard_results), Decimal('0')),
+        "insufficient_balance": sum(r["insufficient_balance"] for r in shard_results),
+    }
+
+    print(f"✓ Interest accrued on {summary['eligible_accounts']} accounts: ${summary['total_interest']:,.2f}")
+    print(f"  ({summary['accruals_posted']} accrual rows written)")
+    if apply_fees:
+        print(f"✓ Fees applied to {summary['fees_posted']} accounts: ${summary['total_fees']:,.2f}")
+        if summary['insufficient_balance'] > 0:
+            print(f"  ⚠ {summary['insufficient_balance']} accounts skipped due to insufficient balance")
+    else:
+        print("Not end of month - skipping monthly fee application.")
+    print(f"{'='*70}\n")
+
+    return summary
+
+
+# ============================================================================
+# CHECKPOINTED, RESUMABLE MODE
+# ============================================================================
+#
+# Each stage walks its eligible accounts in account_id order, one keyset page
+# of chunk_size accounts at a time. A chunk's postings and its row in
+# batch_run_checkpoints are committed in the same transaction, so after a
+# crash the ledger says exactly which chunks landed. A rerun for the same
+# business date picks up the existing batch_runs row and continues after the
+# last checkpointed account_id; the anti-joins in the eligibility queries
+# skip anything that was posted outside the ledger.
+
+EOD_RUN_TYPE = 'EOD'
+
+
+def ensure_batch_run_ledger(conn):
+    """Create the batch run ledger tables on databases that predate migration 004."""
+    ensure_table(conn, 'batch_run_checkpoints', BATCH_LEDGER_MIGRATION)
+
+
+def begin_batch_run(conn, run_type: str, processing_date: date, chunk_size: int) -> tuple:
+    """
+    Start a batch run, or pick up the existing one for the same business date.
+
+    Returns:
+        (run_id, status) where status is the run's status before this call
+        ('Completed' means there is nothing left to do), or None for a new run
+    """
+    cursor = conn.cursor()
+    row = cursor.execute("""
+        SELECT run_id, status FROM batch_runs
+        WHERE run_type = ? AND processing_date = ?
+    """, (run_type, processing_date.isoformat())).fetchone()
+
+    if row is None:
+        run_id = new_id("RUN")
+        cursor.execute("""
+            INSERT INTO batch_runs (run_id, run_type, processing_date, status, chunk_size)
+            VALUES (?, ?, ?, 'Running', ?)
+        """, (run_id, run_type, processing_date.isoformat(), chunk_size))
+        conn.commit()
+        return run_id, None
+
+    run_id, status = row
+    if status != 'Completed':
+        cursor.execute("""
+            UPDATE batch_runs
+            SET status = 'Running', chunk_size = ?, error_message = NULL
+            WHERE run_id = ?
+        """, (chunk_size, run_id))
+        conn.commit()
+    return run_id, status
+
+
+def finish_batch_run(conn, run_id: str, error: str = None):
+    """Mark a batch run Completed, or Failed with the error message."""
+    conn.execute("""
+        UPDATE batch_runs
+        SET status = ?, completed_at = datetime('now'), error_message = ?
+        WHERE run_id = ?
+    """, ('Failed' if error else 'Completed', error, run_id))
+    conn.commit()
+
+
+def get_stage_progress(cursor, run_id: str, stage: str) -> dict:
+    """
+    Summarize the committed checkpoints of one stage of a run.
+
+    Returns:
+        Dict with chunks, last_account_id, rows_processed, amount_total and
+        complete
+    """
+    chunks, rows_processed, amount_total, complete = cursor.execute("""
+        SELECT COUNT(*), COALESCE(SUM(rows_processed), 0),
+               COALESCE(SUM(amount_total), 0), COALESCE(MAX(stage_complete), 0)
+        FROM batch_run_checkpoints
+        WHERE run_id = ? AND stage = ?
+    """, (run_id, stage)).fetchone()
+
+    last = cursor.execute("""
+        SELECT last_account_id FROM batch_run_checkpoints
+        WHERE run_id = ? AND stage = ?
+        ORDER BY chunk_number DESC
+        LIMIT 1
+    """, (run_id, stage)).fetchone()
+
+    return {
+        "chunks": chunks,
+        "last_account_id": last[0] if last else None,
+        "rows_processed": rows_processed,
+        "amount_total": Decimal(str(amount_total)).quantize(Decimal('0.01')),
+        "complete": bool(complete),
+    }
+
+
+def record_checkpoint(cursor, run_id: str, stage: str, chunk_number: int,
+                      last_account_id: str, rows_processed: int,
+                      amount_total: Decimal, stage_complete: bool):
+    """Record a committed chunk (caller commits, together with the chunk's postings)."""
+    cursor.execute("""
+        INSERT INTO batch_run_checkpoints (
+            run_id, stage, chunk_number, last_account_id,
+            rows_processed, amount_total, stage_complete
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (run_id, stage, chunk_number, last_account_id, rows_processed,
+          float(amount_total), int(stage_complete)))
+
+
+def _run_checkpointed_stage(conn, run_id: str, stage: str, fetch_chunk, post_chunk,
+                            chunk_size: int) -> dict:
+    """
+    Run one stage chunk by chunk, resuming after its last checkpoint.
+
+    Args:
+        fetch_chunk: fetch_chunk(cursor, page) -> eligible rows, account_id first
+        post_chunk: post_chunk(cursor, rows) -> (rows_posted, amount); writes
+                    the chunk's postings without committing
+
+    Returns:
+        Stage progress as from get_stage_progress, plus resumed_chunks
+    """
+    cursor = conn.cursor()
+    progress = get_stage_progress(cursor, run_id, stage)
+    resumed_chunks = progress["chunks"]
+
+    if progress["complete"]:
+        print(f"  {stage}: already complete ({resumed_chunks} committed chunk(s))")
+    elif resumed_chunks:
+        print(f"  {stage}: resuming after {resumed_chunks} committed chunk(s) "
+              f"(last account {progress['last_account_id']})")
+
+    chunk_number = resumed_chunks
+    last_account_id = progress["last_account_id"]
+
+    while not progress["complete"]:
+        rows = fetch_chunk(cursor, (last_account_id, chunk_size))
+        stage_complete = len(rows) < chunk_size
+        if rows:
+            last_account_id = rows[-1][0]
+
+        rows_posted, amount = post_chunk(cursor, rows)
+        chunk_number += 1
+        record_checkpoint(cursor, run_id, stage, chunk_number, last_account_id,
+                          rows_posted, amount, stage_complete)
+        conn.commit()
+
+        progress = get_stage_progress(cursor, run_id, stage)
+
+    progress["resumed_chunks"] = resumed_chunks
+    return progress
+
+
+def run_checkpointed_eod(conn, processing_date: date,
+                         chunk_size: int = CHECKPOINT_CHUNK) -> dict:
+    """
+    Run interest accrual and (at month end) fee application in checkpointed chunks.
+
+    Produces the same postings and totals as accrue_interest_bulk followed by
+    apply_monthly_fees_bulk. If the run fails it is marked Failed in
+    batch_runs and the exception is re-raised; rerunning for the same date
+    resumes from the last committed chunk. A run already Completed for the date does nothing.
+
+    Returns:
+        Dict with interest_accrual and monthly_fees stage progress (None for a
+        stage that did not run)
+    """
+    ensure_batch_run_ledger(conn)
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    check_not_compacted(conn, processing_date)
+    apply_fees = is_last_day_of_month(processing_date)
+    if apply_fees:
+        ensure_table(conn, 'fee_skip_report', FEE_SKIP_REPORT_MIGRATION)
+    audit = AuditWriter(conn)
+
+    print(f"\n{'='*70}")
+    print(f"Checkpointed EOD Processing - {processing_date} (chunks of {chunk_size})")
+    print(f"{'='*70}\n")
+
+    run_id, previous_status = begin_batch_run(conn, EOD_RUN_TYPE, processing_date, chunk_size)
+    summary = {"run_id": run_id, "interest_accrual": None, "monthly_fees": None}
+
+    if previous_status == 'Completed':
+        print(f"Run {run_id} already completed for {processing_date} - nothing to do.")
+        print(f"{'='*70}\n")
+        return summary
+
+    if previous_status:
+        print(f"Resuming run {run_id} (previous status: {previous_status})")
+    else:
+        print(f"Started run {run_id}")
+
+    def post_accruals(cursor, rows):
+        account_updates, accrual_rows, total_interest = compute_interest_accruals(rows, processing_date)
+        write_interest_accruals(cursor, account_updates, accrual_rows)
+        return len(accrual_rows), total_interest
+
+    def post_fees(cursor, rows):
+        balance_updates, fee_transactions, total_fees, skipped_rows = compute_fee_postings(rows, processing_date)
+        write_fee_postings(cursor, balance_updates, fee_transactions, audit)
+        write_fee_skips(cursor, skipped_rows)
+        audit.flush()
+        return len(fee_transactions), total_fees
+
+    try:
+        summary["interest_accrual"] = _run_checkpointed_stage(
+            conn, run_id, 'interest_accrual',
+            lambda cursor, page: get_interest_eligible_accounts(cursor, processing_date, page=page),
+            post_accruals, chunk_size)
+
+        if apply_fees:
+            summary["monthly_fees"] = _run_checkpointed_stage(
+                conn, run_id, 'monthly_fees',
+                lambda cursor, page: get_fee_eligible_accounts(cursor, processing_date, page=page),
+                post_fees, chunk_size)
+
+        # Statistics absorb every chunk's postings (including chunks of an
+        # interrupted attempt) in one pass
+        refresh_account_stats(conn)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        finish_batch_run(conn, run_id, error=str(e))
+        raise
+
+    finish_batch_run(conn, run_id)
+
+    interest = summary["interest_accrual"]
+    print(f"\n✓ Interest accrued: {interest['rows_processed']} accrual rows, "
+          f"${interest['amount_total']:,.2f} ({interest['chunks']} chunks)")
+    if apply_fees:
+        fees = summary["monthly_fees"]
+        print(f"✓ Fees applied: {fees['rows_processed']} accounts, "
+              f"${fees['amount_total']:,.2f} ({fees['chunks']} chunks)")
+    else:
+        print("Not end of month - skipping monthly fee application.")
+    print(f"{'='*70}\n")
+
+    return summary
+
+
+# ============================================================================
+# MULTI-DAY CATCH-UP MODE
+# ============================================================================
+#
+# Accounts are read once, with their ledger balance as of the day before the
+# range, and the range's transactions are read once in ledger order. Each
+# missed day is then replayed in memory through the same
+# compute_interest_accruals / compute_fee_postings helpers the bulk path uses:
+# a day's balance is the running balance of the account's last transaction
+# dated on or before it, less fees the replay charged on earlier month ends,
+# and interest_accrued carries forward from day to day. Each month is
+# committed on its own, so a failure keeps the months already written and a
+# rerun continues after them.
+
+
+def get_catch_up_accounts(cursor, start_date: date) -> list:
+    """
+    Fetch every active account that can accrue interest or be charged a fee.
+
+    Returns rows of (account_id, account_number, balance_cents,
+    interest_accrued_cents, interest_rate, minimum_balance_for_interest and
+    monthly_maintenance_fee in cents, currency, day_count_convention), where
+    balance_cents is the ledger balance at the close of the day before
+    start_date: the running balance of the last transaction dated earlier,
+    else the balance the account's archived years closed on, else 0.
+    """
+    return cursor.execute("""
         SELECT
             a.account_id,
             a.account_number,
-            a.balance as stored_balance,
             COALESCE((
-                SELECT SUM(CASE WHEN type = 'Credit' THEN amount ELSE -amount END)
-                FROM transactions
-                WHERE account_id = a.account_id
-            ), 0) as calculated_balance
+                SELECT t.running_balance_cents
+                FROM transactions t
+                WHERE t.account_id = a.account_id
+                  AND t.value_day < ?
+                ORDER BY t.value_date DESC, t.created_at DESC, t.rowid DESC
+                LIMIT 1
+            ), (
+                SELECT COALESCE(x.closing_balance_cents, x.total_credits_cents - x.total_debits_cents)
+                FROM archived_account_totals x
+                WHERE x.account_id = a.account_id
+            ), 0),
+            a.interest_accrued_cents,
+            p.interest_rate,
+            CAST(round(p.minimum_balance_for_interest * 100) AS INTEGER),
+            CAST(round(p.monthly_maintenance_fee * 100) AS INTEGER),
+            p.currency,
+            p.day_count_convention
         FROM accounts a
+        INNER JOIN products p ON a.product_id = p.product_id
         WHERE a.status = 'Active'
+          AND (p.interest_rate > 0 OR p.monthly_maintenance_fee > 0)
+    """, (day_number(start_date),)).fetchall()
+
+
+def get_catch_up_ledger_moves(cursor, start_date: date, end_date: date) -> dict:
+    """
+    Return {accrual_day: {account_id: running_balance_cents}}: each account's
+    closing running balance on every day of the range it has transactions.
+    """
+    moves = {}
+    for account_id, value_day, running_balance in cursor.execute("""
+        SELECT account_id, value_day, running_balance_cents
+        FROM transactions
+        WHERE value_day BETWEEN ? AND ?
+        ORDER BY value_date, created_at, rowid
+    """, (day_number(start_date), day_number(end_date))):
+        moves.setdefault(value_day, {})[account_id] = running_balance
+    return moves
+
+
+def run_catch_up_eod(conn, start_date: date, end_date: date) -> dict:
     """
+    Run interest accrual and month-end fees for every day from start_date to end_date.
+
+    Produces the same postings as running accrue_interest_bulk followed by
+    apply_monthly_fees_bulk once per day, in date order, on each day's
+    closing balance. Days (or months, for fees) already posted for an account
+    are skipped for that account. Each month is committed separately; fees
+    are backdated, so the running balances after them are repaired in the
+    same transaction.
+
+    Returns:
+        Dict with days, accruals_posted, total_interest, fees_posted and
+        total_fees
+
+    Raises:
+        ValueError: If start_date falls in a year moved to a ledger archive,
+                    or the range includes a compacted month
+    """
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    ensure_ledger_archive(conn)
+    archived_year = last_archived_year(conn)
+    if archived_year is not None and start_date.year <= archived_year:
+        raise ValueError(f"Cannot post into {start_date.year}: years up to {archived_year} are archived")
+    check_not_compacted(conn, start_date, end_date)
+    cursor = conn.cursor()
+    days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+
+    print(f"\n{'='*70}")
+    print(f"Catch-up EOD Processing - {start_date} to {end_date} ({len(days)} days)")
+    print(f"{'='*70}\n")
+
+    accounts = get_catch_up_accounts(cursor, start_date)
+    ledger_moves = get_catch_up_ledger_moves(cursor, start_date, end_date)
+    # ledger_balance follows the stored running balances; fees_charged is what
+    # this replay has charged on top of them so far
+    state = {row[0]: {"ledger_balance": row[2], "fees_charged": 0, "interest_accrued": row[3]}
+             for row in accounts}
+
+    # Day fractions of every day in the range, one vectorized call per convention
+    range_fractions = {
+        convention: daily_fractions(convention or DEFAULT_DAILY_CONVENTION, days)
+        for convention in {row[8] for row in accounts}
+    }
+
+    already_accrued = set(cursor.execute("""
+        SELECT account_id, accrual_day FROM interest_accruals
+        WHERE accrual_day BETWEEN ? AND ?
+    """, (day_number(start_date), day_number(end_date))).fetchall())
+
+    fee_days = [day for day in days if is_last_day_of_month(day)]
+    already_charged = set()
+    if fee_days:
+        ensure_table(conn, 'fee_skip_report', FEE_SKIP_REPORT_MIGRATION)
+        already_charged = set(cursor.execute(f"""
+            SELECT account_id, reference FROM transactions
+            WHERE category = 'Fee'
+              AND reference IN ({', '.join('?' * len(fee_days))})
+        """, [fee_reference(day) for day in fee_days]).fetchall())
+
+    audit = AuditWriter(conn)
+    accruals_posted = 0
+    fees_posted = 0
+    total_interest = Decimal('0')
+    total_fees = Decimal('0')
+
+    accrual_rows = []
+    fee_transactions = []
+    fee_skips = []
+
+    for day_index, day in enumerate(days):
+        accrual_day = day_number(day)
+        for account_id, running_balance in ledger_moves.get(accrual_day, {}).items():
+            if account_id in state:
+                state[account_id]["ledger_balance"] = running_balance
+        balances = {account_id: account["ledger_balance"] - account["fees_charged"]
+                    for account_id, account in state.items()}
+
+        eligible_accounts = [
+            (account_id, account_number, balances[account_id],
+             state[account_id]["interest_accrued"], rate, min_balance, currency, convention)
+            for account_id, account_number, _, _, rate, min_balance, _, currency, convention in accounts
+            if rate > 0
+            and balances[account_id] >= min_balance
+            and (account_id, accrual_day) not in already_accrued
+        ]
+        day_fractions = {convention: (int(fraction_days[day_index]), int(year_days[day_index]))
+                         for convention, (fraction_days, year_days) in range_fractions.items()}
+        account_updates, day_accruals, day_interest = compute_interest_accruals(
+            eligible_accounts, day, day_fractions
+        )
+        for new_accrued, account_id in account_updates:
+            state[account_id]["interest_accrued"] = new_accrued
+        accrual_rows.extend(day_accruals)
+        total_interest += day_interest
+
+        line = f"  {day}: {len(day_accruals):>8} accruals ${day_interest:>12,.2f}"
+
+        if day in fee_days:
+            reference = fee_reference(day)
+            accounts_with_fees = [
+                (account_id, account_number, balances[account_id], monthly_fee, currency)
+                for account_id, account_number, _, _, _, _, monthly_fee, currency, _ in accounts
+                if monthly_fee > 0 and (account_id, reference) not in already_charged
+            ]
+            _, day_fees, day_fee_total, day_skips = compute_fee_postings(accounts_with_fees, day)
+            for fee_transaction in day_fees:
+                state[fee_transaction[1]]["fees_charged"] += fee_transaction[3]
+            fee_transactions.extend(day_fees)
+            fee_skips.extend(day_skips)
+            total_fees += day_fee_total
+
+            line += f" | {len(day_fees):>8} fees ${day_fee_total:>12,.2f}"
+            if day_skips:
+                line += f" ({len(day_skips)} skipped, insufficient balance)"
+
+        print(line)
+
+        if day_index + 1 < len(days) and days[day_index + 1].month == day.month:
+            continue
+
+        # Month (or range) complete: only the latest interest_accrued of each
+        # account is written; the per-day values live on the accrual rows
+        interest_updates = [(state[account_id]["interest_accrued"], account_id)
+                            for account_id in {row[1] for row in accrual_rows}]
+        write_interest_accruals(cursor, interest_updates, accrual_rows)
+        write_fee_postings(cursor, [], fee_transactions, audit)
+        write_fee_skips(cursor, fee_skips)
+        audit.flush()
+        # Fees are dated at the month end, so transactions after them (and
+        # accounts.balance) are repaired to include them
+        repair_running_balances(conn, [(row[1], row[2]) for row in fee_transactions])
+        conn.commit()
+
+        accruals_posted += len(accrual_rows)
+        fees_posted += len(fee_transactions)
+        accrual_rows = []
+        fee_transactions = []
+        fee_skips = []
+
+    # Statistics absorb every month's postings in one pass
+    refresh_account_stats(conn)
+    conn.commit()
+
+    print(f"\n✓ Interest accrued: {accruals_posted} accrual rows, ${total_interest:,.2f}")
+    if fee_days:
+        print(f"✓ Fees applied: {fees_posted} postings, ${total_fees:,.2f}")
+    print(f"{'='*70}\n")
+
+    return {
+        "days": len(days),
+        "accruals_posted": accruals_posted,
+        "total_interest": total_interest,
+        "fees_posted": fees_posted,
+        "total_fees": total_fees,
+    }
+
+
+def save_balance_checkpoints(cursor, checkpoints: list):
+    """
+    Record verified balances (caller commits).
+
+    Args:
+        checkpoints: (account_id, verified_balance, last_transaction_rowid)
+                     tuples; the transaction_id is looked up from the rowid
+    """
+    cursor.executemany("""
+        INSERT OR REPLACE INTO balance_checkpoints (
+            account_id, verified_balance, last_transaction_rowid,
+            last_transaction_id, verified_at
+        ) VALUES (?, ?, ?, (SELECT transaction_id FROM transactions WHERE rowid = ?), datetime('now'))
+    """, [(account_id, balance, rowid, rowid) for account_id, balance, rowid in checkpoints])
+
+
+def verify_data_integrity(conn, full: bool = False):
+    """
+    Verify that all account balances match their transaction history.
+
+    By default each account's balance is checked against its last verified
+    checkpoint plus the transactions posted since, so the cost follows the
+    day's activity rather than the size of the ledger. Accounts without a
+    usable checkpoint are summed from their full history. Only mismatches are
+    printed.
+
+    With full=True every account is recomputed from its entire history and
+    printed, as a periodic deep audit; this also catches edits to
+    transactions that were already checkpointed.
+
+    Matching accounts have their checkpoints advanced.
+
+    Balances are summed as integer cents from signed_amount_cents, which
+    idx_transactions_account_value_day covers, so the sums are exact and
+    never read the table rows. Transactions moved to ledger archives count
+    through archived_account_totals; the archives are not read.
+    """
+    ensure_table(conn, 'balance_checkpoints', BALANCE_CHECKPOINT_MIGRATION)
+    ensure_integer_ledger_columns(conn)
+    ensure_ledger_archive(conn)
+
+    print(f"\n{'='*70}")
+    print(f"Data Integrity Verification{' (full history)' if full else ''}")
+    print(f"{'='*70}\n")
+
+    if full:
+        query = """
+            SELECT
+                a.account_id,
+                a.account_number,
+                a.balance_cents as stored_cents,
+                COALESCE(aat.total_credits_cents - aat.total_debits_cents, 0) as verified_cents,
+                COALESCE((
+                    SELECT SUM(signed_amount_cents)
+                    FROM transactions
+                    WHERE account_id = a.account_id
+                ), 0) as delta,
+                (
+                    SELECT MAX(rowid)
+                    FROM transactions
+                    WHERE account_id = a.account_id
+                ) as last_rowid
+            FROM accounts a
+            LEFT JOIN archived_account_totals aat ON aat.account_id = a.account_id
+            WHERE a.status = 'Active'
+        """
+    else:
+        # A checkpoint is only trusted while its rowid still points at the
+        # transaction it recorded (archiving removes it, too); otherwise the
+        # account is summed from its archived totals and the hot ledger
+        query = """
+            SELECT
+                a.account_id,
+                a.account_number,
+                a.balance_cents as stored_cents,
+                CASE
+                    WHEN bc.account_id IS NULL
+                    THEN COALESCE(aat.total_credits_cents - aat.total_debits_cents, 0)
+                    ELSE CAST(round(bc.verified_balance * 100) AS INTEGER)
+                END as verified_cents,
+                COALESCE(SUM(t.signed_amount_cents), 0) as delta,
+                MAX(t.rowid) as last_rowid
+            FROM accounts a
+            LEFT JOIN balance_checkpoints bc
+                ON bc.account_id = a.account_id
+               AND bc.last_transaction_id = (
+                   SELECT transaction_id FROM transactions WHERE rowid = bc.last_transaction_rowid
+               )
+            LEFT JOIN archived_account_totals aat ON aat.account_id = a.account_id
+            LEFT JOIN transactions t
+                ON t.account_id = a.account_id
+               AND t.rowid > COALESCE(bc.last_transaction_rowid, 0)
+            WHERE a.status = 'Active'
+            GROUP BY a.account_id
+        """
 
     cursor = conn.cursor()
     all_good = True
+    verified_count = 0
+    checkpoints = []
 
-    for row in cursor.execute(query):
-        account_id, account_number, stored_balance, calculated_balance = row
+    for row in cursor.execute(query).fetchall():
+        account_id, account_number, stored_cents, verified_cents, delta, last_rowid = row
 
-        stored = Decimal(str(stored_balance))
-        calculated = Decimal(str(calculated_balance))
+        stored = cents_to_decimal(stored_cents)
+        calculated = cents_to_decimal(verified_cents + delta)
 
         diff = abs(stored - calculated)
+        verified_count += 1
 
         if diff > Decimal('0.01'):  # Allow 1 cent rounding difference
             print(f"  ✗ MISMATCH: {account_number}")
@@ -279,12 +1503,20 @@ def verify_data_integrity(conn):
             print(f"     Calculated: ${calculated:,.2f}")
             print(f"     Difference: ${diff:,.2f}\n")
             all_good = False
-        else:
+            continue
+
+        if full:
             print(f"  ✓ {account_number}: ${stored:>12,.2f} (matches transaction history)")
+        if last_rowid is not None:
+            checkpoints.append((account_id, float(calculated), last_rowid))
+
+    save_balance_checkpoints(cursor, checkpoints)
+    conn.commit()
 
     print(f"\n{'='*70}")
     if all_good:
-        print("✓ All account balances are consistent!")
+        print(f"✓ All account balances are consistent! ({verified_count} accounts, "
+              f"{len(checkpoints)} checkpoints advanced)")
     else:
         print("✗ Data integrity issues found!")
         sys.exit(1)
@@ -292,29 +1524,77 @@ def verify_data_integrity(conn):
 
 
 def main():
+    parser = argparse.ArgumentParser(description='End-of-Day Batch Processing')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Accrue interest and post fees as set-based batches (no per-account output)')
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help='Compute accruals and fees in N sharded worker processes')
+    parser.add_argument('--checkpoint', action='store_true',
+                        help='Commit in checkpointed chunks; a rerun resumes after a failure')
+    parser.add_argument('--chunk-size', type=int, default=CHECKPOINT_CHUNK, metavar='N',
+                        help=f'Accounts per page and commit (default: {CHECKPOINT_CHUNK})')
+    parser.add_argument('--full', action='store_true',
+                        help='Verify balances against full transaction history (deep audit)')
+    parser.add_argument('--from', dest='from_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Catch up every day from this date (inclusive)')
+    parser.add_argument('--to', dest='to_date', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Last day to catch up (default: today)')
+
+    args = parser.parse_args()
+
+    if args.checkpoint and args.workers > 1:
+        parser.error('--checkpoint cannot be combined with --workers')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    if args.to_date and not args.from_date:
+        parser.error('--to requires --from')
+    if args.from_date and (args.workers > 1 or args.checkpoint):
+        parser.error('--from cannot be combined with --workers or --checkpoint')
+
     print("\n")
     print("="*70)
     print(" BANKING SYSTEM - END-OF-DAY BATCH PROCESSING")
     print("="*70)
 
-    processing_date = date.today()
-    print(f"\nProcessing Date: {processing_date.strftime('%Y-%m-%d')}\n")
+    processing_date = args.to_date or date.today()
+    if args.from_date:
+        if args.from_date > processing_date:
+            parser.error('--from must not be after --to')
+        print(f"\nProcessing Dates: {args.from_date.strftime('%Y-%m-%d')} to {processing_date.strftime('%Y-%m-%d')}\n")
+    else:
+        print(f"\nProcessing Date: {processing_date.strftime('%Y-%m-%d')}\n")
 
     if not DB_PATH.exists():
         print(f"ERROR: Database not found at {DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
 
     try:
-        # Step 1: Accrue Interest
-        accrue_interest(conn, processing_date)
-
-        # Step 2: Apply Monthly Fees (if end of month)
-        apply_monthly_fees(conn, processing_date)
+        if args.from_date:
+            # Steps 1-2: Accrue Interest and Apply Monthly Fees for each missed day
+            run_catch_up_eod(conn, args.from_date, processing_date)
+        elif args.workers > 1:
+            # Steps 1-2: Accrue Interest and Apply Monthly Fees across shards
+            run_sharded_eod(DB_PATH, processing_date, args.workers)
+        elif args.checkpoint:
+            # Steps 1-2: Accrue Interest and Apply Monthly Fees in resumable chunks
+            run_checkpointed_eod(conn, processing_date, args.chunk_size)
+        else:
+            # Step 1: Accrue Interest
+            if args.bulk:
+                accrue_interest_bulk(conn, processing_date, args.chunk_size)
+            else:
+                accrue_interest(conn, processing_date, args.chunk_size)
+
+            # Step 2: Apply Monthly Fees (if end of month)
+            if args.bulk:
+                apply_monthly_fees_bulk(conn, processing_date, args.chunk_size)
+            else:
+                apply_monthly_fees(conn, processing_date, args.chunk_size)
 
         # Step 3: Verify Data Integrity
-        verify_data_integrity(conn)
+        verify_data_integrity(conn, full=args.full)
 
         print("\n")
         print("="*70)
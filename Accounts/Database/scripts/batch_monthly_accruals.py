@@ -2,36 +2,70 @@
 """
 Monthly Interest Accrual Batch Processing Script
 
-This script calculates and posts monthly interest on eligible accounts using the 30/360 day count convention.
+This script calculates and posts monthly interest on eligible accounts using the 30/360 day count convention,
+or the convention selected on the product (products.day_count_convention, see day_count.py).
 
 Key Features:
 - Uses 30/360 convention: Every month = 30 days, Every year = 360 days
 - Formula: Monthly Interest = (Balance × Annual Rate × 30) / 360
+- Other conventions: Monthly Interest = Balance × Annual Rate × year fraction of the month
 - Processes all missing months from account opening to current month
 - Posts interest on the last day of each month
 - Creates proper ledger transactions
 - Idempotent: Safe to run multiple times (skips already processed months)
 - Handles catch-up for historical months
+- Keeps later running balances and account balances consistent after
+  backdated interest postings (ledger_repair.py)
+- Streams eligible accounts in keyset pages and commits each page, so
+  memory stays flat however large the book is
+
+- Plan-then-apply: a dry run saves its postings as a plan that
+  --apply-plan posts later without recomputing them
+- Records every interest posting in audit_log (audit_log.py), written with
+  the page it belongs to
 
 Usage:
-    python3 batch_monthly_accruals.py [--month YYYY-MM] [--dry-run]
+    python3 batch_monthly_accruals.py [--month YYYY-MM] [--dry-run] [--plan PATH]
+    python3 batch_monthly_accruals.py --apply-plan [--month YYYY-MM] [--plan PATH]
 
 Options:
     --month YYYY-MM    Process specific month (default: current month)
-    --dry-run          Show what would be processed without making changes
+    --dry-run          Show what would be processed without making changes,
+                       and save the postings as a plan
+    --apply-plan       Post a saved plan if the database has not changed since
+    --plan PATH        Plan file (default: Database/plans/monthly_accruals_YYYY-MM.npz)
 """
 
-import sqlite3
 import sys
+import json
+import hashlib
 import argparse
 from pathlib import Path
 from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
 from decimal import Decimal, ROUND_HALF_UP
-import uuid
 import calendar
 
+import numpy as np
+
+from db_connection import (connect, ensure_integer_ledger_columns, ensure_ledger_archive, ensure_updated_at_triggers,
+                           iter_keyset_pages, last_archived_year)
+from ledger_ids import new_id
+from audit_log import AuditWriter
+from month_end_balances import refresh_month_end_balances
+from account_stats import refresh_account_stats
+from ledger_repair import repair_running_balances
+from interest_kernel import group_interest_from_cents, cents_to_decimal
+from day_count import (DEFAULT_MONTHLY_CONVENTION, monthly_fractions, day_number, from_day_number,
+                       ensure_day_count_convention)
+
 DB_PATH = Path(__file__).parent.parent / "accounts.db"
+PLANS_DIR = Path(__file__).parent.parent / "plans"
+
+# Bumped whenever the plan file layout changes
+PLAN_FORMAT_VERSION = 2
+
+# Accounts per keyset page, and per commit of a live run
+STREAM_CHUNK = 5000
 
 
 def get_last_day_of_month(year: int, month: int) -> date:
@@ -63,279 +97,788 @@ def calculate_monthly_interest_30_360(balance: Decimal, annual_rate: Decimal) ->
     return monthly_interest.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 
-def get_months_to_process(conn, account_id: str, opening_date: date, end_month: str) -> list:
+def get_months_to_process(opening_date: date, end_month: str, processed_months: set) -> list:
     """
     Get list of months that need interest accrual for an account.
 
-    Returns list of (year, month) tuples for months not yet processed.
-    """
-    cursor = conn.cursor()
+    Args:
+        opening_date: Account opening date
+        end_month: Last month to consider (YYYY-MM)
+        processed_months: Months (YYYY-MM) already Posted for the account
 
-    # Parse end month
+    Returns list of (year, month, month_key) tuples for months not yet processed.
+    """
     end_year, end_month_num = map(int, end_month.split('-'))
 
-    # Get opening month
-    opening_year = opening_date.year
-    opening_month = opening_date.month
+    # Months as a running index (year * 12 + month - 1) to step without date math
+    months_to_process = []
+    for index in range(opening_date.year * 12 + opening_date.month - 1, end_year * 12 + end_month_num):
+        year, month = divmod(index, 12)
+        month_str = f"{year:04d}-{month + 1:02d}"
+        if month_str not in processed_months:
+            months_to_process.append((year, month + 1, month_str))
 
-    # Get already processed months
-    processed_months = set()
-    rows = cursor.execute("""
-        SELECT accrual_month
-        FROM monthly_interest_accruals
-        WHERE account_id = ? AND processing_status = 'Posted'
-    """, (account_id,)).fetchall()
+    return months_to_process
 
-    for row in rows:
-        processed_months.add(row[0])
 
-    # Generate list of months from opening to end_month
-    months_to_process = []
-    current_date = date(opening_year, opening_month, 1)
-    end_date = date(end_year, end_month_num, 1)
+# ============================================================================
+# SET-BASED PLANNER
+# ============================================================================
+#
+# Instead of one query per account (posted months) and one per account and
+# month (month-end balance), the planner runs three queries per keyset page of
+# accounts, each a single range scan ordered by account_id, and merges them
+# account by account:
+#
+#   1. eligible accounts
+#   2. closing balances from the month_end_balances snapshot (see
+#      month_end_balances.py) up to the target month, refreshed first from
+#      the transactions posted since the last run
+#   3. months already Posted in monthly_interest_accruals
+#
+# A month with no transactions carries the previous month's closing balance
+# forward, which is what the old "last transaction on or before month end"
+# lookup returned.
+#
+# A live run posts and commits each page before reading the next, so memory
+# is bounded by the page size rather than the size of the book.
+
+ELIGIBLE_ACCOUNTS_FILTER = """
+        FROM accounts a
+        INNER JOIN products p ON a.product_id = p.product_id
+        WHERE a.status = 'Active'
+          AND p.interest_rate > 0
+          AND a.opening_day <= ?
+"""
 
-    while current_date <= end_date:
-        month_str = current_date.strftime('%Y-%m')
-        if month_str not in processed_months:
-            months_to_process.append((current_date.year, current_date.month, month_str))
-        current_date += relativedelta(months=1)
 
-    return months_to_process
+def _eligible_account_filter(month_end_date: date, account_range: tuple) -> tuple:
+    """
+    SQL predicate and params limiting account_id to eligible accounts, or to
+    account ids in (after_account_id, last_account_id].
+
+    A range is not checked for eligibility: it comes from a page of eligible
+    accounts, and the planner's merge drops rows of any other account in it.
+    """
+    if account_range is None:
+        return f"AND account_id IN (SELECT a.account_id {ELIGIBLE_ACCOUNTS_FILTER})", (day_number(month_end_date),)
+    after_account_id, last_account_id = account_range
+    return "AND account_id > ? AND account_id <= ?", (after_account_id or '', last_account_id)
+
+
+def get_eligible_accounts(cursor, month_end_date: date, page: tuple = None) -> list:
+    """
+    Fetch active interest-bearing accounts opened by month_end_date, in account_id order.
 
+    page optionally restricts the result to one keyset page, given as
+    (after_account_id, limit).
 
-def get_balance_at_month_end(conn, account_id: str, month_end_date: date) -> Decimal:
+    Returns rows of (account_id, account_number, opening_date, customer_id,
+    interest_rate, minimum_balance_for_interest, currency, product_name,
+    day_count_convention).
     """
-    Get account balance at the end of a specific month.
+    after_account_id, limit = page or (None, -1)  # LIMIT -1: no limit
+    return cursor.execute(f"""
+        SELECT
+            a.account_id,
+            a.account_number,
+            a.opening_date,
+            a.customer_id,
+            p.interest_rate,
+            p.minimum_balance_for_interest,
+            p.currency,
+            p.product_name,
+            p.day_count_convention
+        {ELIGIBLE_ACCOUNTS_FILTER}
+          AND a.account_id > ?
+        ORDER BY a.account_id
+        LIMIT ?
+    """, (day_number(month_end_date), after_account_id or '', limit)).fetchall()
+
 
-    Uses the running_balance from the last transaction on or before the month-end date.
-    If no transactions exist, uses opening balance (0).
+def get_monthly_day_fractions(cursor, month_end_date: date) -> dict:
+    """
+    Precompute the year fraction of every month a run can post.
+
+    One vectorized day_count call per convention in use covers all months
+    from the earliest eligible opening date to month_end_date.
+
+    Returns:
+        {day_count_convention: {month_key: (days, year_days)}}, keyed by the
+        product column (None for the 30/360 default)
+    """
+    params = (day_number(month_end_date),)
+    earliest = cursor.execute(f"SELECT MIN(a.opening_day) {ELIGIBLE_ACCOUNTS_FILTER}", params).fetchone()[0]
+    if earliest is None:
+        return {}
+
+    opening = from_day_number(earliest)
+    month_ends = [get_last_day_of_month(year, month + 1)
+                  for year, month in (divmod(index, 12) for index in
+                                      range(opening.year * 12 + opening.month - 1,
+                                            month_end_date.year * 12 + month_end_date.month))]
+    month_keys = [month_end.strftime('%Y-%m') for month_end in month_ends]
+
+    fractions = {}
+    for (convention,) in cursor.execute(
+            f"SELECT DISTINCT p.day_count_convention {ELIGIBLE_ACCOUNTS_FILTER}", params).fetchall():
+        days, year_days = monthly_fractions(convention or DEFAULT_MONTHLY_CONVENTION, month_ends)
+        fractions[convention] = dict(zip(month_keys, zip(days.tolist(), year_days.tolist())))
+    return fractions
+
+
+def _fraction_label(day_fraction: tuple) -> str:
+    """Describe a month's day fraction for the report: '÷ 12' for 30/360 months."""
+    days, year_days = day_fraction
+    if year_days == 12 * days:
+        return "÷ 12"
+    return f"× {days}/{year_days}"
+
+
+def iter_month_end_balances(cursor, month_end_date: date, account_range: tuple = None):
+    """
+    Yield (account_id, month_key, closing balance in cents) for every month up
+    to month_end_date that has transactions, for eligible accounts, ordered
+    by account_id and month. Reads the month_end_balances snapshot, which the
+    caller refreshes first. account_range optionally limits the scan to
+    account ids in (after_account_id, last_account_id].
+    """
+    account_filter, account_params = _eligible_account_filter(month_end_date, account_range)
+    return cursor.execute(f"""
+        SELECT account_id, month_key, CAST(round(closing_balance * 100) AS INTEGER)
+        FROM month_end_balances
+        WHERE month_key <= ?
+          {account_filter}
+        ORDER BY account_id, month_key
+    """, (month_end_date.strftime('%Y-%m'),) + account_params)
+
+
+def iter_posted_months(cursor, month_end_date: date, account_range: tuple = None):
+    """
+    Yield (account_id, accrual_month) already Posted for eligible accounts,
+    ordered by account_id; account_range works as in iter_month_end_balances.
+    """
+    account_filter, account_params = _eligible_account_filter(month_end_date, account_range)
+    return cursor.execute(f"""
+        SELECT account_id, accrual_month
+        FROM monthly_interest_accruals
+        WHERE +processing_status = 'Posted'  -- unary +: scan by idx_monthly_accruals_account
+          {account_filter}
+        ORDER BY account_id
+    """, account_params)
+
+
+def _take_account(rows, pending, account_id: str) -> list:
+    """
+    Collect the rows for account_id from an account_id-ordered row iterator.
+
+    pending holds the one row read past the previous account (a one-element
+    list, [None] when empty). Rows for accounts before account_id are
+    dropped.
+    """
+    taken = []
+    while True:
+        row = pending[0] if pending[0] is not None else next(rows, None)
+        pending[0] = None
+        if row is None or row[0] > account_id:
+            pending[0] = row
+            return taken
+        if row[0] == account_id:
+            taken.append(row)
+
+
+def plan_monthly_accruals(conn, month_end_date: date, chunk_size: int = STREAM_CHUNK):
+    """
+    Plan the month-end balance inputs for every eligible account, one keyset
+    page of chunk_size accounts at a time.
+
+    The month_end_balances snapshot must be current (refresh_month_end_balances).
+    Pages are read lazily, so a caller that posts and commits a page before
+    asking for the next holds one page in memory at a time.
+
+    Yields a list of (account_row, month_balances, processed_months) per page,
+    in account_id order, where month_balances maps YYYY-MM to the running
+    balance of the month's last transaction, in cents, and processed_months
+    is the set of months already Posted.
     """
     cursor = conn.cursor()
+    after_account_id = None
 
-    # Get the most recent transaction on or before month_end_date
-    row = cursor.execute("""
-        SELECT running_balance
-        FROM transactions
-        WHERE account_id = ?
-          AND date(value_date) <= ?
-        ORDER BY value_date DESC, created_at DESC
-        LIMIT 1
-    """, (account_id, month_end_date.isoformat())).fetchone()
+    for eligible_accounts in iter_keyset_pages(
+            lambda page: get_eligible_accounts(cursor, month_end_date, page), chunk_size):
+        account_range = (after_account_id, eligible_accounts[-1][0])
+        after_account_id = account_range[1]
 
-    if row:
-        return Decimal(str(row[0]))
+        balances = iter(iter_month_end_balances(cursor, month_end_date, account_range).fetchall())
+        posted = iter(iter_posted_months(cursor, month_end_date, account_range).fetchall())
+        pending_balance, pending_posted = [None], [None]
 
-    # No transactions yet - check if account was open
-    account_info = cursor.execute("""
-        SELECT opening_date
-        FROM accounts
-        WHERE account_id = ?
-    """, (account_id,)).fetchone()
+        planned = []
+        for account_row in eligible_accounts:
+            account_id = account_row[0]
+            month_balances = {month_key: balance
+                              for _, month_key, balance in _take_account(balances, pending_balance, account_id)}
+            processed_months = {month for _, month in _take_account(posted, pending_posted, account_id)}
+            planned.append((account_row, month_balances, processed_months))
+        yield planned
 
-    if account_info and date.fromisoformat(account_info[0]) <= month_end_date:
-        return Decimal('0')  # Account was open but no transactions
 
-    return None  # Account didn't exist yet
+def _closing_balance_before(month_balances: dict, month_key: str):
+    """Return the balance of the latest month before month_key, or None."""
+    earlier = [key for key in month_balances if key < month_key]
+    return month_balances[max(earlier)] if earlier else None
 
 
-def process_monthly_accruals(conn, target_month: str = None, dry_run: bool = False):
+def price_monthly_page(walks: list, month_str: str, day_fractions: dict):
     """
-    Process monthly interest accruals for all eligible accounts.
+    Price the pending months of a page of accounts, all accounts at once.
+
+    Every account is walked from its opening month to month_str: a month
+    closes at its last transaction, or at the previous close (including
+    interest posted by this run) if it has none, and already-posted months
+    only move the balance. Stored running balances do not include interest
+    this run posts for earlier months yet (ledger_repair adds it after the
+    write), so it is added to them here.
+
+    The walk is month-major: each calendar month's pending postings across
+    the page are priced with one group_interest_from_cents call per rate and
+    day count convention, and the resulting interest is carried into the
+    next month before that month is priced.
 
     Args:
-        target_month: Specific month to process (YYYY-MM), or None for current month
-        dry_run: If True, show what would be processed without making changes
+        walks: One dict per account with row (the get_eligible_accounts row),
+               opening_date, month_balances, pending_months and lines (report
+               lines printed so far); priced in place, gaining postings,
+               interest and months_posted
+        month_str: Last month to walk (YYYY-MM)
+        day_fractions: As from get_monthly_day_fractions
     """
-    cursor = conn.cursor()
+    end_index = int(month_str[:4]) * 12 + int(month_str[5:7]) - 1
+    for walk in walks:
+        opening_date = walk["opening_date"]
+        walk["start_index"] = opening_date.year * 12 + opening_date.month - 1
+        carried = _closing_balance_before(walk["month_balances"], opening_date.strftime('%Y-%m'))
+        walk["carried"] = cents_to_decimal(carried) if carried is not None else None
+        walk["postings"] = []
+        walk["interest"] = Decimal('0')
+        walk["months_posted"] = 0
+
+    for index in range(min((walk["start_index"] for walk in walks), default=end_index + 1), end_index + 1):
+        year, month = divmod(index, 12)
+        month += 1
+        month_key = f"{year:04d}-{month:02d}"
+
+        # (interest_rate, day_count_convention) -> [(walk, month-end balance)]
+        groups = {}
+        for walk in walks:
+            if walk["start_index"] > index:
+                continue
+            if month_key in walk["month_balances"]:
+                walk["carried"] = cents_to_decimal(walk["month_balances"][month_key]) + walk["interest"]
+            if month_key not in walk["pending_months"]:
+                continue
 
-    # Determine which month to process
+            # No transactions yet - the account is open (months start at opening) with 0
+            balance = walk["carried"] if walk["carried"] is not None else Decimal('0')
+            min_balance = Decimal(str(walk["row"][5]))
+            if balance < min_balance:
+                walk["lines"].append(f"  ⏭ {month_key}: Balance ${balance:,.2f} below minimum ${min_balance:,.2f}")
+                continue
+            groups.setdefault((walk["row"][4], walk["row"][8]), []).append((walk, balance))
+
+        month_end = get_last_day_of_month(year, month)
+        for (rate, day_count_convention), group in groups.items():
+            # Calculate monthly interest using the product's day count convention
+            day_fraction = day_fractions[day_count_convention][month_key]
+            interests = group_interest_from_cents([int(balance.scaleb(2)) for _, balance in group],
+                                                  rate, day_fraction)
+            interest_rate = Decimal(str(rate))
+
+            for (walk, balance), interest_cents in zip(group, interests.tolist()):
+                monthly_interest = cents_to_decimal(interest_cents)
+                if monthly_interest <= Decimal('0'):
+                    walk["lines"].append(f"  ⏭ {month_key}: No interest (balance: ${balance:,.2f})")
+                    continue
+
+                walk["lines"].append(
+                    f"  ✓ {month_key}: Balance ${balance:>12,.2f} × {interest_rate*100:>5.2f}% "
+                    f"{_fraction_label(day_fraction)} = ${monthly_interest:>8.2f}")
+
+                row = walk["row"]
+                walk["postings"].append((row[0], month_key, month_end, balance, interest_rate, monthly_interest,
+                                         row[6], day_count_convention or DEFAULT_MONTHLY_CONVENTION))
+
+                # The interest transaction closes this month
+                walk["carried"] = balance + monthly_interest
+                walk["interest"] += monthly_interest
+                walk["months_posted"] += 1
+
+
+def resolve_target_month(target_month: str = None) -> str:
+    """Return target_month normalised to YYYY-MM, or the current month if None."""
     if target_month:
         process_year, process_month = map(int, target_month.split('-'))
     else:
         today = date.today()
         process_year = today.year
         process_month = today.month
+    return f"{process_year:04d}-{process_month:02d}"
+
+
+def process_monthly_accruals(conn, target_month: str = None, dry_run: bool = False,
+                             plan_path: Path = None, chunk_size: int = STREAM_CHUNK,
+                             collect_results: bool = True):
+    """
+    Process monthly interest accruals for all eligible accounts.
 
-    month_str = f"{process_year:04d}-{process_month:02d}"
+    Month-end balances and already-posted months come from
+    plan_monthly_accruals, one page of chunk_size accounts at a time; the
+    month_end_balances snapshot is refreshed before planning and again with
+    the postings. Each page's postings are written with executemany and
+    committed, followed by a running-balance repair of each account's later
+    transactions. A rerun after a failure skips the pages already posted.
+
+    Args:
+        target_month: Specific month to process (YYYY-MM), or None for current month
+        dry_run: If True, show what would be processed without making changes
+        plan_path: With dry_run, save the postings here for apply_posting_plan
+        chunk_size: Accounts per page (and per commit)
+        collect_results: Return per-account results; without them the memory
+                         a run needs does not grow with the number of accounts
+
+    Raises:
+        ValueError: If the month is in a year moved to a ledger archive
+    """
+    cursor = conn.cursor()
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    ensure_ledger_archive(conn)
+
+    # Determine which month to process
+    month_str = resolve_target_month(target_month)
+    process_year, process_month = map(int, month_str.split('-'))
     month_end_date = get_last_day_of_month(process_year, process_month)
 
+    # Archived years are closed: their transactions live in the archive files
+    archived_year = last_archived_year(conn)
+    if archived_year is not None and process_year <= archived_year:
+        raise ValueError(f"Cannot post into {month_str}: years up to {archived_year} are archived")
+
     print(f"\n{'='*80}")
-    print(f"Monthly Interest Accrual Process - 30/360 Convention")
+    print(f"Monthly Interest Accrual Process - Product Day Count (default 30/360)")
     print(f"Processing Month: {month_str}")
     print(f"Month-End Date: {month_end_date}")
     print(f"Mode: {'DRY RUN (no changes)' if dry_run else 'LIVE PROCESSING'}")
+    if archived_year is not None:
+        print(f"Archived: years up to {archived_year} (months missing there are not posted)")
     print(f"{'='*80}\n")
 
-    # Find all active accounts eligible for interest
-    query = """
-        SELECT
-            a.account_id,
-            a.account_number,
-            a.opening_date,
-            a.customer_id,
-            p.interest_rate,
-            p.minimum_balance_for_interest,
-            p.currency,
-            p.product_name
-        FROM accounts a
-        INNER JOIN products p ON a.product_id = p.product_id
-        WHERE a.status = 'Active'
-          AND p.interest_rate > 0
-          AND date(a.opening_date) <= ?
-    """
+    eligible_count = cursor.execute(
+        f"SELECT COUNT(*) {ELIGIBLE_ACCOUNTS_FILTER}", (day_number(month_end_date),)
+    ).fetchone()[0]
 
-    eligible_accounts = cursor.execute(query, (month_end_date.isoformat(),)).fetchall()
-
-    if not eligible_accounts:
+    if not eligible_count:
         print("No accounts eligible for interest accrual.\n")
         return {"accounts_processed": 0, "total_interest": 0, "months_processed": 0}
 
-    print(f"Found {len(eligible_accounts)} eligible accounts\n")
+    print(f"Found {eligible_count} eligible accounts\n")
+
+    # Absorb transactions posted since the last run into the snapshot. A dry
+    # run commits the refresh too: it is maintenance, not a posting, and
+    # leaving it open would hold the write lock for the whole plan.
+    refresh_month_end_balances(conn)
+    conn.commit()
 
     total_interest_posted = Decimal('0')
     accounts_processed = 0
     months_processed_count = 0
     results = []
+    plan_postings = []
+    day_fractions = get_monthly_day_fractions(cursor, month_end_date)
+
+    for page in plan_monthly_accruals(conn, month_end_date, chunk_size):
+        postings = []
+        walks = []
+
+        for row, month_balances, processed_months in page:
+            account_number, opening_date_str, interest_rate, product_name = row[1], row[2], row[4], row[7]
+            opening_date = date.fromisoformat(opening_date_str)
+
+            lines = [f"Processing Account: {account_number} ({product_name})",
+                     f"  Opened: {opening_date}, Rate: {Decimal(str(interest_rate))*100:.2f}%"]
+
+            # Get all months that need processing for this account
+            months_to_process = get_months_to_process(opening_date, month_str, processed_months)
+            if archived_year is not None:
+                months_to_process = [m for m in months_to_process if m[0] > archived_year]
+
+            if not months_to_process:
+                lines.append(f"  ℹ All months already processed\n")
+            walks.append({
+                "row": row,
+                "opening_date": opening_date,
+                "month_balances": month_balances,
+                "pending_months": {month_key for _, _, month_key in months_to_process},
+                "lines": lines,
+            })
 
-    for row in eligible_accounts:
-        (account_id, account_number, opening_date_str, customer_id,
-         interest_rate, min_balance, currency, product_name) = row
+        price_monthly_page([walk for walk in walks if walk["pending_months"]], month_str, day_fractions)
 
-        opening_date = date.fromisoformat(opening_date_str)
-        interest_rate = Decimal(str(interest_rate))
-        min_balance = Decimal(str(min_balance))
+        for walk in walks:
+            print("\n".join(walk["lines"]))
+            if not walk["pending_months"]:
+                continue
 
-        print(f"Processing Account: {account_number} ({product_name})")
-        print(f"  Opened: {opening_date}, Rate: {interest_rate*100:.2f}%")
+            postings.extend(walk["postings"])
+            months_processed_count += walk["months_posted"]
+            if walk["interest"] > Decimal('0'):
+                total_interest_posted += walk["interest"]
+                accounts_processed += 1
+                if collect_results:
+                    results.append({
+                        "account_number": walk["row"][1],
+                        "months": len(walk["pending_months"]),
+                        "total_interest": float(walk["interest"])
+                    })
+
+            print()
+
+        # A live run posts and commits each page; a dry run keeps the postings
+        # only if they are saved as a plan
+        if not dry_run and postings:
+            post_monthly_accruals(conn, postings)
+        elif dry_run and plan_path:
+            plan_postings.extend(postings)
+
+    summary = {
+        "accounts_processed": accounts_processed,
+        "months_processed": months_processed_count,
+        "total_interest": float(total_interest_posted),
+        "results": results
+    }
+
+    if dry_run and plan_path:
+        save_posting_plan(plan_path, month_str, compute_plan_fingerprint(cursor, month_str),
+                          plan_postings, summary)
+        print(f"✓ Posting plan saved: {plan_path} ({len(plan_postings)} postings)\n")
 
-        # Get all months that need processing for this account
-        months_to_process = get_months_to_process(conn, account_id, opening_date, month_str)
+    print_summary(summary)
+    return summary
 
-        if not months_to_process:
-            print(f"  ℹ All months already processed\n")
-            continue
 
-        account_month_interest = Decimal('0')
+def print_summary(summary: dict):
+    """Print the run summary (these lines are part of the script's output contract)."""
+    print(f"{'='*80}")
+    print(f"Summary:")
+    print(f"  Accounts Processed: {summary['accounts_processed']}")
+    print(f"  Months Processed: {summary['months_processed']}")
+    print(f"  Total Interest Posted: ${Decimal(str(summary['total_interest'])):,.2f}")
+    print(f"{'='*80}\n")
 
-        for year, month, month_key in months_to_process:
-            month_end = get_last_day_of_month(year, month)
 
-            # Get balance at month-end
-            balance = get_balance_at_month_end(conn, account_id, month_end)
+def post_monthly_accruals(conn, postings: list):
+    """
+    Write postings and their audit events, repair later running balances and
+    refresh the snapshot, then commit.
 
-            if balance is None:
-                print(f"  ⏭ {month_key}: Account not open yet")
-                continue
+    Args:
+        postings: (account_id, month_key, month_end, month_end_balance,
+                  annual_rate, monthly_interest, currency, day_count_convention)
+                  tuples, with month_end a date and the amounts Decimals
 
-            if balance < min_balance:
-                print(f"  ⏭ {month_key}: Balance ${balance:,.2f} below minimum ${min_balance:,.2f}")
-                continue
+    Raises:
+        ValueError: If a posting is for a month in an archived year (nothing
+                    is written then)
+    """
+    archived_year = last_archived_year(conn)
+    if archived_year is not None:
+        archived_months = sorted(posting[1] for posting in postings if int(posting[1][:4]) <= archived_year)
+        if archived_months:
+            raise ValueError(f"Cannot post into {archived_months[0]}: years up to {archived_year} are archived")
+
+    interest_transactions = []
+    accrual_rows = []
+    audit = AuditWriter(conn)
+
+    for (account_id, month_key, month_end, balance, interest_rate, monthly_interest, currency,
+         day_count_convention) in postings:
+        transaction_id = new_id("TXN")
+        new_balance = balance + monthly_interest
+
+        # Format dates properly for Rust parser: YYYY-MM-DD HH:MM:SS
+        transaction_datetime = datetime.combine(month_end, datetime.min.time()).strftime('%Y-%m-%d %H:%M:%S')
+
+        interest_transactions.append((
+            transaction_id,
+            account_id,
+            transaction_datetime,
+            month_end.isoformat(),
+            float(monthly_interest),
+            currency,
+            float(new_balance),
+            f"Monthly interest - {month_key} ({day_count_convention})",
+            month_key
+        ))
+        accrual_rows.append((
+            new_id("MACRL"),
+            account_id,
+            month_key,
+            month_end.isoformat(),
+            float(balance),
+            float(interest_rate),
+            float(monthly_interest),
+            transaction_id
+        ))
+        audit.record_posting(transaction_id, account_id, 'Interest', int(monthly_interest * 100),
+                             month_end.isoformat(), month_key)
 
-            # Calculate monthly interest using 30/360
-            monthly_interest = calculate_monthly_interest_30_360(balance, interest_rate)
+    cursor = conn.cursor()
+    write_monthly_postings(cursor, interest_transactions, accrual_rows)
+    audit.flush()
+    # Interest dated at past month ends shifts every later running balance
+    repair_running_balances(conn, [(row[1], row[3]) for row in interest_transactions])
+    refresh_month_end_balances(conn)
+    refresh_account_stats(conn)
+    conn.commit()
+
+
+# ============================================================================
+# PLAN-THEN-APPLY
+# ============================================================================
+#
+# A dry run saves its postings to a compressed columnar .npz file (amounts in
+# integer cents) together with a fingerprint of everything the plan was
+# computed from. --apply-plan refreshes the month_end_balances snapshot and
+# recomputes only the fingerprint - one pass over the eligible accounts, their
+# snapshot months and posted months, with no pricing - and posts the plan as
+# saved if it still matches; otherwise the plan is stale and must be
+# recomputed.
+
+
+def default_plan_path(target_month: str = None) -> Path:
+    """Plan file a dry run for target_month saves to by default."""
+    return PLANS_DIR / f"monthly_accruals_{resolve_target_month(target_month)}.npz"
+
+
+def compute_plan_fingerprint(cursor, month_str: str) -> str:
+    """
+    Hash the inputs of a monthly accrual plan for month_str.
+
+    Covers what plan_monthly_accruals reads: the eligible accounts with their
+    product terms, their month_end_balances rows up to the month (closing
+    balance and the transaction it was taken from) and their Posted months.
+    The snapshot must be refreshed first, as for planning. Hashing the rows
+    rather than the newest rowids catches updates as well as inserts: a
+    running-balance repair rewrites the snapshot months it touches.
+    """
+    year, month = map(int, month_str.split('-'))
+    digest = hashlib.sha256(month_str.encode())
+
+    month_end_date = get_last_day_of_month(year, month)
+    for page in iter_keyset_pages(lambda page: get_eligible_accounts(cursor, month_end_date, page),
+                                  STREAM_CHUNK):
+        for row in page:
+            digest.update(repr(row).encode())
+
+    account_filter, account_params = _eligible_account_filter(month_end_date, None)
+    for query, params in (
+            (f"""SELECT account_id, month_key, CAST(round(closing_balance * 100) AS INTEGER),
+                        last_transaction_id
+                 FROM month_end_balances
+                 WHERE month_key <= ? {account_filter}
+                 ORDER BY account_id, month_key""", (month_str,) + account_params),
+            (f"""SELECT account_id, accrual_month, monthly_accrual_id
+                 FROM monthly_interest_accruals
+                 WHERE processing_status = 'Posted' {account_filter}
+                 ORDER BY account_id, accrual_month""", account_params)):
+        for row in cursor.execute(query, params):
+            digest.update(repr(row).encode())
+
+    return digest.hexdigest()
+
+
+def _to_cents(amounts) -> np.ndarray:
+    """Convert 2-decimal Decimals to an int64 array of cents."""
+    return np.array([int((amount * 100).to_integral_value(rounding=ROUND_HALF_UP)) for amount in amounts],
+                    dtype=np.int64)
+
+
+def save_posting_plan(plan_path: Path, month_str: str, fingerprint: str, postings: list, summary: dict):
+    """Write postings and the run summary to a compressed columnar plan file."""
+    plan_path = Path(plan_path)
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+
+    columns = list(zip(*postings)) if postings else [()] * 8
+    account_ids, month_keys, month_ends, balances, rates, interests, currencies, conventions = columns
+    results = summary["results"]
+
+    meta = {
+        "format_version": PLAN_FORMAT_VERSION,
+        "month": month_str,
+        "fingerprint": fingerprint,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "accounts_processed": summary["accounts_processed"],
+        "months_processed": summary["months_processed"],
+        "total_interest": str(sum(interests, Decimal('0'))),
+    }
 
-            if monthly_interest <= Decimal('0'):
-                print(f"  ⏭ {month_key}: No interest (balance: ${balance:,.2f})")
-                continue
+    with open(plan_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            meta=np.array(json.dumps(meta)),
+            account_id=np.array(account_ids, dtype=str),
+            month_key=np.array(month_keys, dtype=str),
+            month_end=np.array([d.isoformat() for d in month_ends], dtype=str),
+            balance_cents=_to_cents(balances),
+            annual_rate=np.array([float(rate) for rate in rates], dtype=np.float64),
+            interest_cents=_to_cents(interests),
+            currency=np.array(currencies, dtype=str),
+            day_count_convention=np.array(conventions, dtype=str),
+            result_account_number=np.array([r["account_number"] for r in results], dtype=str),
+            result_months=np.array([r["months"] for r in results], dtype=np.int32),
+            result_interest=np.array([r["total_interest"] for r in results], dtype=np.float64),
+        )
+
+
+def load_posting_plan(plan_path: Path) -> tuple:
+    """
+    Read a plan file written by save_posting_plan.
 
-            print(f"  ✓ {month_key}: Balance ${balance:>12,.2f} × {interest_rate*100:>5.2f}% ÷ 12 = ${monthly_interest:>8.2f}")
-
-            if not dry_run:
-                # Create interest transaction
-                transaction_id = f"TXN-{uuid.uuid4()}"
-                new_balance = balance + monthly_interest
-
-                # Format dates properly for Rust parser: YYYY-MM-DD HH:MM:SS
-                from datetime import datetime as dt
-                transaction_datetime = dt.combine(month_end, dt.min.time()).strftime('%Y-%m-%d %H:%M:%S')
-
-                cursor.execute("""
-                    INSERT INTO transactions (
-                        transaction_id, account_id, transaction_date, value_date,
-                        type, category, amount, currency, running_balance,
-                        description, reference, channel, status, created_at
-                    ) VALUES (?, ?, ?, ?, 'Credit', 'Interest', ?, ?, ?, ?, ?, 'Batch', 'Posted', datetime('now'))
-                """, (
-                    transaction_id,
-                    account_id,
-                    transaction_datetime,
-                    month_end.isoformat(),
-                    float(monthly_interest),
-                    currency,
-                    float(new_balance),
-                    f"Monthly interest - {month_key} (30/360)",
-                    month_key
-                ))
-
-                # Update account balance
-                cursor.execute("""
-                    UPDATE accounts
-                    SET balance = ?,
-                        updated_at = datetime('now')
-                    WHERE account_id = ?
-                """, (float(new_balance), account_id))
-
-                # Record in monthly_interest_accruals table
-                accrual_id = f"MACRL-{uuid.uuid4()}"
-                cursor.execute("""
-                    INSERT INTO monthly_interest_accruals (
-                        monthly_accrual_id, account_id, accrual_month, posting_date,
-                        month_end_balance, annual_interest_rate, monthly_interest,
-                        transaction_id, processing_date, processing_status, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 'Posted', datetime('now'))
-                """, (
-                    accrual_id,
-                    account_id,
-                    month_key,
-                    month_end.isoformat(),
-                    float(balance),
-                    float(interest_rate),
-                    float(monthly_interest),
-                    transaction_id
-                ))
-
-            account_month_interest += monthly_interest
-            months_processed_count += 1
-
-        if account_month_interest > Decimal('0'):
-            total_interest_posted += account_month_interest
-            accounts_processed += 1
-            results.append({
-                "account_number": account_number,
-                "months": len(months_to_process),
-                "total_interest": float(account_month_interest)
-            })
+    Returns:
+        (meta, postings, results) with postings in post_monthly_accruals form
+    """
+    with np.load(plan_path, allow_pickle=False) as plan:
+        meta = json.loads(str(plan["meta"]))
+        if meta.get("format_version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported plan format version: {meta.get('format_version')}")
+
+        postings = [
+            (account_id, month_key, date.fromisoformat(month_end),
+             Decimal(int(balance_cents)) / 100, Decimal(str(annual_rate)),
+             Decimal(int(interest_cents)) / 100, currency, day_count_convention)
+            for (account_id, month_key, month_end, balance_cents, annual_rate, interest_cents, currency,
+                 day_count_convention)
+            in zip(plan["account_id"].tolist(), plan["month_key"].tolist(), plan["month_end"].tolist(),
+                   plan["balance_cents"].tolist(), plan["annual_rate"].tolist(),
+                   plan["interest_cents"].tolist(), plan["currency"].tolist(),
+                   plan["day_count_convention"].tolist())
+        ]
+        results = [
+            {"account_number": account_number, "months": months, "total_interest": total_interest}
+            for account_number, months, total_interest
+            in zip(plan["result_account_number"].tolist(), plan["result_months"].tolist(),
+                   plan["result_interest"].tolist())
+        ]
+
+    return meta, postings, results
+
+
+def apply_posting_plan(conn, plan_path: Path, target_month: str = None) -> dict:
+    """
+    Post a plan saved by a dry run, without recomputing it.
 
-        print()
+    Args:
+        plan_path: Plan file written by process_monthly_accruals(dry_run=True)
+        target_month: If given, the month the plan must be for
 
-    if not dry_run and months_processed_count > 0:
-        conn.commit()
+    Raises:
+        ValueError: If the plan is for another month, is stale (accounts,
+                    transactions or monthly accruals changed since the dry run),
+                    or posts into a year archived since the dry run
+    """
+    ensure_day_count_convention(conn)
+    ensure_integer_ledger_columns(conn)
+    ensure_updated_at_triggers(conn)
+    ensure_ledger_archive(conn)
+    meta, postings, results = load_posting_plan(plan_path)
+    month_str = meta["month"]
 
-    print(f"{'='*80}")
-    print(f"Summary:")
-    print(f"  Accounts Processed: {accounts_processed}")
-    print(f"  Months Processed: {months_processed_count}")
-    print(f"  Total Interest Posted: ${total_interest_posted:,.2f}")
+    print(f"\n{'='*80}")
+    print(f"Monthly Interest Accrual Process - Product Day Count (default 30/360)")
+    print(f"Processing Month: {month_str}")
+    print(f"Mode: APPLY PLAN ({plan_path}, created {meta['created_at']})")
     print(f"{'='*80}\n")
 
-    return {
-        "accounts_processed": accounts_processed,
-        "months_processed": months_processed_count,
-        "total_interest": float(total_interest_posted),
+    if target_month and resolve_target_month(target_month) != month_str:
+        raise ValueError(f"Plan is for {month_str}, not {resolve_target_month(target_month)}")
+
+    # Hold the write lock from the staleness check until the postings commit
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    refresh_month_end_balances(conn)
+    if compute_plan_fingerprint(conn.cursor(), month_str) != meta["fingerprint"]:
+        conn.rollback()
+        raise ValueError("Plan is stale: the database changed since the dry run; run --dry-run again")
+
+    if postings:
+        try:
+            post_monthly_accruals(conn, postings)
+        except ValueError:
+            conn.rollback()
+            raise
+    print(f"✓ Posted {len(postings)} planned postings\n")
+
+    summary = {
+        "accounts_processed": meta["accounts_processed"],
+        "months_processed": meta["months_processed"],
+        "total_interest": float(Decimal(meta["total_interest"])),
         "results": results
     }
+    print_summary(summary)
+    return summary
+
+
+def write_monthly_postings(cursor, interest_transactions: list, accrual_rows: list):
+    """
+    Write interest transactions and accrual records (caller commits).
+
+    accounts.balance and the running balances of later transactions are
+    brought up to date by repair_running_balances.
+    """
+    cursor.executemany("""
+        INSERT INTO transactions (
+            transaction_id, account_id, transaction_date, value_date,
+            type, category, amount, currency, running_balance,
+            description, reference, channel, status, created_at
+        ) VALUES (?, ?, ?, ?, 'Credit', 'Interest', ?, ?, ?, ?, ?, 'Batch', 'Posted', datetime('now'))
+    """, interest_transactions)
+
+    cursor.executemany("""
+        INSERT INTO monthly_interest_accruals (
+            monthly_accrual_id, account_id, accrual_month, posting_date,
+            month_end_balance, annual_interest_rate, monthly_interest,
+            transaction_id, processing_date, processing_status, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 'Posted', datetime('now'))
+    """, accrual_rows)
 
 
 def main():
     parser = argparse.ArgumentParser(description='Monthly Interest Accrual Batch Processing')
     parser.add_argument('--month', help='Specific month to process (YYYY-MM)', default=None)
-    parser.add_argument('--dry-run', action='store_true', help='Dry run mode (no changes)')
+    parser.add_argument('--dry-run', action='store_true', help='Dry run mode (no changes); saves a plan')
+    parser.add_argument('--apply-plan', action='store_true', help='Post the plan saved by a dry run')
+    parser.add_argument('--plan', type=Path, default=None,
+                        help='Plan file (default: Database/plans/monthly_accruals_YYYY-MM.npz)')
 
     args = parser.parse_args()
+    if args.dry_run and args.apply_plan:
+        parser.error('--dry-run and --apply-plan are mutually exclusive')
+    if args.plan and not (args.dry_run or args.apply_plan):
+        parser.error('--plan requires --dry-run or --apply-plan')
+
+    plan_path = args.plan or default_plan_path(args.month)
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        result = process_monthly_accruals(conn, args.month, args.dry_run)
+        conn = connect(DB_PATH)
+        if args.apply_plan:
+            result = apply_posting_plan(conn, plan_path, args.month)
+        else:
+            # The per-account results are only needed for a plan
+            result = process_monthly_accruals(conn, args.month, args.dry_run,
+                                              plan_path if args.dry_run else None,
+                                              collect_results=args.dry_run)
         conn.close()
 
         print("✓ Processing complete")
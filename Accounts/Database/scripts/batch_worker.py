@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Batch Worker Service
+
+Long-running local worker that runs batch jobs for the API, so a request no
+longer pays for a Python interpreter start, module imports and a fresh
+database connection, and results come back as data instead of scraped
+stdout.
+
+The worker listens on a Unix socket. Each connection carries one job as a
+single line of JSON and gets a single line of JSON back:
+
+    -> {"job": "monthly_accruals", "month": "2025-10", "dry_run": false}
+    <- {"ok": true, "result": {...}}
+    <- {"ok": false, "error": "..."}
+
+result is the dict the job function returns (process_monthly_accruals'
+summary for monthly_accruals). The job's printed report is not sent back: it
+goes to the worker's own stdout (logs/batch_worker.log under start.sh), as
+does the traceback of a failed job. Jobs run one at a time on one warm
+'batch' profile connection; whatever a job leaves uncommitted (a failed job)
+is rolled back, and the worker keeps serving.
+
+Jobs:
+    ping                Health check, returns {"status": "ok"}
+    monthly_accruals    month (YYYY-MM, optional), dry_run (bool, optional),
+                        apply_plan (bool, optional), plan (file name in
+                        Database/plans, optional); a dry run saves its plan,
+                        apply_plan posts it
+
+Usage:
+    python3 batch_worker.py [--socket PATH]
+
+Options:
+    --socket PATH    Unix socket to listen on (default: Database/batch_worker.sock)
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import traceback
+import socketserver
+from pathlib import Path
+
+from db_connection import connect
+from batch_monthly_accruals import process_monthly_accruals, apply_posting_plan, default_plan_path, PLANS_DIR
+
+DB_PATH = Path(__file__).parent.parent / "accounts.db"
+SOCKET_PATH = Path(__file__).parent.parent / "batch_worker.sock"
+
+
+def _ping(conn, job: dict) -> dict:
+    return {"status": "ok"}
+
+
+def _plan_path(job: dict) -> Path:
+    """
+    Plan file for a monthly_accruals job: the month's default plan, or the
+    job's plan, which must name a .npz file directly in PLANS_DIR.
+
+    Raises:
+        ValueError: If the plan resolves to anywhere else
+    """
+    if not job.get("plan"):
+        return default_plan_path(job.get("month"))
+    plans_dir = PLANS_DIR.resolve()
+    plan_path = (plans_dir / str(job["plan"])).resolve()
+    if plan_path.parent != plans_dir or plan_path.suffix != ".npz":
+        raise ValueError(f"plan must be a .npz file in {PLANS_DIR}: {job['plan']}")
+    return plan_path
+
+
+def _monthly_accruals(conn, job: dict) -> dict:
+    plan_path = _plan_path(job)
+    if job.get("apply_plan"):
+        return apply_posting_plan(conn, plan_path, job.get("month"))
+    dry_run = bool(job.get("dry_run", False))
+    return process_monthly_accruals(conn, job.get("month"), dry_run, plan_path if dry_run else None)
+
+
+JOBS = {
+    "ping": _ping,
+    "monthly_accruals": _monthly_accruals,
+}
+
+
+def run_job(conn, job: dict) -> dict:
+    """
+    Run one job on conn and build its response.
+
+    The job's report is printed to the worker's stdout as it runs rather
+    than buffered for the response, which for a large book would hold the
+    whole report in memory and send it over the socket.
+
+    Returns:
+        {"ok": True, "result": ...} or {"ok": False, "error": ...}
+    """
+    handler = JOBS.get(job.get("job"))
+    if handler is None:
+        return {"ok": False, "error": f"Unknown job: {job.get('job')} (expected one of {', '.join(JOBS)})"}
+
+    try:
+        result = handler(conn, job)
+    except Exception as e:
+        traceback.print_exc(file=sys.stdout)
+        return {"ok": False, "error": str(e)}
+    finally:
+        # Jobs commit what they keep; anything left open (a failed job) must
+        # not hold a write lock while the worker sits idle
+        if conn.in_transaction:
+            conn.rollback()
+        sys.stdout.flush()
+
+    return {"ok": True, "result": result}
+
+
+class BatchJobHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON job line and writes one JSON response line."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("job must be a JSON object")
+        except ValueError as e:
+            response = {"ok": False, "error": f"Invalid job request: {e}"}
+        else:
+            print(f"→ {job.get('job')} {json.dumps({k: v for k, v in job.items() if k != 'job'})}")
+            response = run_job(self.server.conn, job)
+            print(f"  {'✓' if response['ok'] else '✗ ' + response['error']}")
+
+        self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+
+
+class BatchWorkerServer(socketserver.UnixStreamServer):
+    """Single-threaded Unix socket server owning one warm database connection."""
+
+    def __init__(self, socket_path: Path, db_path: Path):
+        self.conn = connect(db_path)
+        super().__init__(str(socket_path), BatchJobHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.conn.close()
+
+
+def serve(socket_path: Path = SOCKET_PATH, db_path: Path = DB_PATH):
+    """Listen on socket_path until SIGTERM or SIGINT."""
+    socket_path = Path(socket_path)
+    if socket_path.exists():
+        socket_path.unlink()  # left behind by a worker that was killed
+
+    server = BatchWorkerServer(socket_path, db_path)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"✓ Batch worker listening on {socket_path} (pid {os.getpid()})")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path.exists():
+            socket_path.unlink()
+        print("✓ Batch worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch worker service')
+    parser.add_argument('--socket', type=Path, default=SOCKET_PATH,
+                        help='Unix socket to listen on')
+
+    args = parser.parse_args()
+
+    try:
+        serve(args.socket)
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}", file=sys.stderr)
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
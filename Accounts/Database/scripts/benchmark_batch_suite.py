@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Batch Processing Benchmark Suite
+
+Builds a synthetic book with a configurable number of accounts, products and
+transactions per account, then times each phase of batch_eod_processing and
+batch_monthly_accruals against a fresh copy of it. Every phase runs in its own
+process so peak RSS is measured per phase. Results (wall time, rows per
+second, row writes, peak RSS) are written as JSON and can be compared against
+a previous run to catch regressions.
+
+Row writes are the rows the phase inserted, updated or deleted, including
+those written by triggers (sqlite3 total_changes). To see what the updated_at
+triggers cost, run once with --legacy-triggers and compare against it:
+
+    python3 benchmark_batch_suite.py --legacy-triggers --output before.json
+    python3 benchmark_batch_suite.py --baseline before.json
+
+Usage:
+    python3 benchmark_batch_suite.py [--accounts N] [--products N] [--transactions N]
+                                     [--phases NAME ...] [--output FILE] [--legacy-triggers]
+                                     [--baseline FILE [--tolerance PCT]]
+
+Options:
+    --accounts N       Number of accounts in the synthetic book (default: 10000)
+    --products N       Number of synthetic products (default: 5)
+    --transactions N   Transactions per account, including the opening deposit
+                       (default: 20)
+    --phases NAME ...  Phases to run (default: all)
+    --output FILE      Write the JSON results to FILE instead of stdout
+    --legacy-triggers  Build the book with the migration 001 updated_at
+                       triggers, which re-update every updated row
+    --baseline FILE    Compare wall times with an earlier JSON result and exit
+                       with status 1 if any phase got slower than the tolerance;
+                       row writes are shown next to the baseline's
+    --tolerance PCT    Allowed slowdown against the baseline in percent (default: 20)
+"""
+
+import sys
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import re
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from datetime import date, datetime, timedelta
+
+import batch_eod_processing
+import batch_monthly_accruals
+from db_connection import connect
+from account_stats import refresh_account_stats
+
+DB_DIR = Path(__file__).parent.parent
+MIGRATIONS_DIR = DB_DIR / "schema" / "migrations"
+SEED_DIR = DB_DIR / "schema" / "seed"
+
+# The book is built as of a month end so fee and monthly phases have work to do
+AS_OF_DATE = date(2025, 10, 31)
+HISTORY_DAYS = 365
+
+# Synthetic product terms, cycled when more products are requested
+PRODUCT_TERMS = [
+    # (interest_rate, minimum_balance_for_interest, monthly_maintenance_fee)
+    (0.015, 100.00, 5.00),
+    (0.025, 1000.00, 15.00),
+    (0.005, 0.00, 0.00),
+    (0.035, 5000.00, 0.00),
+    (0.010, 2500.00, 25.00),
+    (0.000, 0.00, 2.00),
+]
+
+
+def install_legacy_updated_at_triggers(conn):
+    """
+    Put the unconditional updated_at triggers of migration 001 back in place
+    of migration 013's. They keep the migration 013 names, so
+    ensure_updated_at_triggers leaves them alone.
+    """
+    initial_schema = (MIGRATIONS_DIR / "001_initial_schema.sql").read_text()
+    for name, body in re.findall(r"CREATE TRIGGER IF NOT EXISTS (trg_\w+_updated_at)\b(.*?END;)", initial_schema, re.S):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}_fallback")
+        conn.execute(f"CREATE TRIGGER {name}_fallback{body}")
+
+
+def build_suite_book(db_path: Path, num_accounts: int, num_products: int,
+                     txns_per_account: int, seed: int = 42, legacy_triggers: bool = False):
+    """
+    Create a database with the full schema, users, num_products products and
+    num_accounts accounts, each with txns_per_account transactions whose
+    running balances agree with the account balance. With legacy_triggers the
+    migration 001 updated_at triggers are installed.
+    """
+    rng = random.Random(seed)
+
+    conn = connect(db_path)
+    for migration_file in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        conn.executescript(migration_file.read_text())
+    if legacy_triggers:
+        install_legacy_updated_at_triggers(conn)
+    conn.executescript((SEED_DIR / "001_seed_users.sql").read_text())
+
+    product_ids = []
+    for i in range(num_products):
+        rate, min_balance, fee = PRODUCT_TERMS[i % len(PRODUCT_TERMS)]
+        product_id = f"PROD-BENCH-{i:03d}"
+        product_ids.append(product_id)
+        conn.execute("""
+            INSERT INTO products (
+                product_id, product_name, product_code, description, status, currency,
+                interest_rate, minimum_balance_for_interest, monthly_maintenance_fee,
+                transaction_fee, created_by
+            ) VALUES (?, ?, ?, 'Synthetic benchmark product', 'Active', 'USD', ?, ?, ?, 0.0, 'USR-ADMIN-001')
+        """, (product_id, f"Benchmark Product {i:03d}", f"BENCH-{i:03d}", rate, min_balance, fee))
+
+    account_rows = []
+    transaction_rows = []
+
+    for i in range(num_accounts):
+        account_id = f"ACC-BENCH-{i:08d}"
+        opening_date = AS_OF_DATE - timedelta(days=rng.randint(30, HISTORY_DAYS))
+        span_days = (AS_OF_DATE - opening_date).days
+
+        # Opening deposit first, the rest spread over the account's history
+        offsets = sorted(rng.randint(0, span_days - 1) for _ in range(txns_per_account - 1))
+        balance = round(rng.uniform(50, 20000), 2)
+        transaction_rows.append(_transaction_row(
+            f"TXN-OPEN-{account_id}", account_id, opening_date, 'Credit', 'Opening', balance, balance))
+
+        for n, offset in enumerate(offsets, start=1):
+            value_date = opening_date + timedelta(days=offset)
+            amount = round(rng.uniform(1, 2000), 2)
+            if rng.random() < 0.45 and amount < balance:
+                balance = round(balance - amount, 2)
+                txn_type, category = 'Debit', 'Withdrawal'
+            else:
+                balance = round(balance + amount, 2)
+                txn_type, category = 'Credit', 'Deposit'
+            transaction_rows.append(_transaction_row(
+                f"TXN-{account_id}-{n:05d}", account_id, value_date, txn_type, category, amount, balance))
+
+        account_rows.append((
+            account_id,
+            f"9{i:09d}",
+            f"CUST-{i % 50000:06d}",
+            product_ids[i % num_products],
+            balance,
+            opening_date.isoformat(),
+        ))
+
+    conn.executemany("""
+        INSERT INTO accounts (
+            account_id, account_number, customer_id, product_id,
+            currency, status, balance, interest_accrued, opening_date, created_by
+        ) VALUES (?, ?, ?, ?, 'USD', 'Active', ?, 0.00, ?, 'USR-OFFICER-001')
+    """, account_rows)
+    conn.executemany("""
+        INSERT INTO transactions (
+            transaction_id, account_id, transaction_date, value_date,
+            type, category, amount, currency, running_balance,
+            description, channel, status, created_at, created_by
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, 'USD', ?, ?, 'Batch', 'Posted', ?, 'USR-OFFICER-001')
+    """, transaction_rows)
+    refresh_account_stats(conn, rebuild=True)
+    conn.commit()
+    conn.close()
+
+
+def _transaction_row(transaction_id: str, account_id: str, value_date: date, txn_type: str,
+                     category: str, amount: float, running_balance: float) -> tuple:
+    """Parameter tuple for one synthetic transaction."""
+    timestamp = datetime.combine(value_date, datetime.min.time()).strftime('%Y-%m-%d %H:%M:%S')
+    return (transaction_id, account_id, timestamp, value_date.isoformat(), txn_type, category,
+            amount, running_balance, f"Synthetic {category.lower()}", timestamp)
+
+
+# ============================================================================
+# PHASES
+# ============================================================================
+#
+# Each phase is (setup, run, rows_query, rows_are_delta). setup (untimed) and
+# run receive the connection. rows_query counts the rows the phase produced
+# (delta of before/after) or, for read-only phases, the rows it scanned.
+
+def _verify(full: bool):
+    return lambda conn: batch_eod_processing.verify_data_integrity(conn, full=full)
+
+
+PHASES = {
+    'eod.interest_accrual': (
+        None,
+        lambda conn: batch_eod_processing.accrue_interest_bulk(conn, AS_OF_DATE),
+        "SELECT COUNT(*) FROM interest_accruals", True),
+    'eod.interest_accrual_row': (
+        None,
+        lambda conn: batch_eod_processing.accrue_interest(conn, AS_OF_DATE),
+        "SELECT COUNT(*) FROM interest_accruals", True),
+    'eod.monthly_fees': (
+        None,
+        lambda conn: batch_eod_processing.apply_monthly_fees_bulk(conn, AS_OF_DATE),
+        "SELECT COUNT(*) FROM transactions WHERE category = 'Fee'", True),
+    'eod.verify_full': (
+        None,
+        _verify(full=True),
+        "SELECT COUNT(*) FROM transactions", False),
+    'eod.verify_incremental': (
+        _verify(full=True),
+        _verify(full=False),
+        "SELECT COUNT(*) FROM accounts WHERE status = 'Active'", False),
+    'monthly.accruals': (
+        None,
+        lambda conn: batch_monthly_accruals.process_monthly_accruals(conn, AS_OF_DATE.strftime('%Y-%m')),
+        "SELECT COUNT(*) FROM monthly_interest_accruals", True),
+}
+
+
+def _run_phase(phase: str, db_path: str, result_queue):
+    """Child process: run one phase and report wall time, rows and peak RSS."""
+    setup, run, rows_query, rows_are_delta = PHASES[phase]
+    conn = connect(db_path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup(conn)
+            rows_before = conn.execute(rows_query).fetchone()[0]
+            writes_before = conn.total_changes
+            start = time.perf_counter()
+            run(conn)
+            elapsed = time.perf_counter() - start
+            row_writes = conn.total_changes - writes_before
+        rows_after = conn.execute(rows_query).fetchone()[0]
+    finally:
+        conn.close()
+
+    rows = rows_after - rows_before if rows_are_delta else rows_after
+    result_queue.put({
+        "phase": phase,
+        "wall_seconds": round(elapsed, 4),
+        "rows": rows,
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+        "row_writes": row_writes,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+
+
+def run_suite(num_accounts: int, num_products: int, txns_per_account: int, phases: list,
+              legacy_triggers: bool = False) -> dict:
+    """Build the book once and run each phase on its own copy in a fresh process."""
+    # spawn so each phase starts from a clean interpreter and its RSS is its own
+    context = multiprocessing.get_context('spawn')
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        template = tmp_dir / "book.db"
+
+        print(f"Building synthetic book: {num_accounts:,} accounts, {num_products} products, "
+              f"{txns_per_account} transactions per account...", file=sys.stderr)
+        start = time.perf_counter()
+        build_suite_book(template, num_accounts, num_products, txns_per_account,
+                         legacy_triggers=legacy_triggers)
+        build_seconds = time.perf_counter() - start
+
+        for phase in phases:
+            phase_db = tmp_dir / "phase.db"
+            shutil.copy(template, phase_db)
+
+            print(f"Running {phase}...", file=sys.stderr)
+            result_queue = context.Queue()
+            process = context.Process(target=_run_phase, args=(phase, str(phase_db), result_queue))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"Phase {phase} failed with exit code {process.exitcode}")
+            results.append(result_queue.get())
+
+            phase_db.unlink()
+
+    return {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "config": {
+            "accounts": num_accounts,
+            "products": num_products,
+            "transactions_per_account": txns_per_account,
+            "as_of_date": AS_OF_DATE.isoformat(),
+            "legacy_triggers": legacy_triggers,
+            "build_seconds": round(build_seconds, 2),
+        },
+        "phases": results,
+    }
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Return (phase, baseline_seconds, seconds) for phases slower than the tolerance."""
+    baseline_times = {r["phase"]: r["wall_seconds"] for r in baseline["phases"]}
+    regressions = []
+    for r in report["phases"]:
+        before = baseline_times.get(r["phase"])
+        if before and r["wall_seconds"] > before * (1 + tolerance / 100):
+            regressions.append((r["phase"], before, r["wall_seconds"]))
+    return regressions
+
+
+def compare_row_writes(report: dict, baseline: dict) -> list:
+    """Return (phase, baseline_row_writes, row_writes) for phases both runs counted writes for."""
+    baseline_writes = {r["phase"]: r.get("row_writes") for r in baseline["phases"]}
+    return [(r["phase"], baseline_writes[r["phase"]], r["row_writes"])
+            for r in report["phases"] if baseline_writes.get(r["phase"]) is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch Processing Benchmark Suite')
+    parser.add_argument('--accounts', type=int, default=10000, help='Accounts in the synthetic book')
+    parser.add_argument('--products', type=int, default=5, help='Synthetic products')
+    parser.add_argument('--transactions', type=int, default=20, help='Transactions per account')
+    parser.add_argument('--phases', nargs='+', choices=list(PHASES), default=list(PHASES),
+                        metavar='NAME', help=f'Phases to run (default: all of {", ".join(PHASES)})')
+    parser.add_argument('--output', type=Path, help='Write JSON results to this file')
+    parser.add_argument('--legacy-triggers', action='store_true',
+                        help='Build the book with the migration 001 updated_at triggers')
+    parser.add_argument('--baseline', type=Path, help='Earlier JSON result to compare against')
+    parser.add_argument('--tolerance', type=float, default=20.0,
+                        help='Allowed slowdown against the baseline in percent (default: 20)')
+
+    args = parser.parse_args()
+
+    if args.accounts < 1 or args.products < 1 or args.transactions < 1:
+        parser.error('--accounts, --products and --transactions must be at least 1')
+
+    report = run_suite(args.accounts, args.products, args.transactions, args.phases, args.legacy_triggers)
+
+    print(f"\n{'='*82}", file=sys.stderr)
+    print(f"{'Phase':<26} {'Wall':>10} {'Rows':>10} {'Rows/s':>12} {'Writes':>10} {'Peak RSS':>10}",
+          file=sys.stderr)
+    print(f"{'-'*82}", file=sys.stderr)
+    for r in report["phases"]:
+        rate = f"{r['rows_per_second']:,.0f}" if r['rows_per_second'] is not None else '-'
+        print(f"{r['phase']:<26} {r['wall_seconds']:>9.2f}s {r['rows']:>10,} {rate:>12} "
+              f"{r['row_writes']:>10,} {r['peak_rss_kb'] / 1024:>7.1f} MB", file=sys.stderr)
+    print(f"{'='*82}\n", file=sys.stderr)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        row_writes = compare_row_writes(report, baseline)
+        if row_writes:
+            print(f"{'Phase':<26} {'Writes (baseline)':>18} {'Writes':>10} {'Change':>8}", file=sys.stderr)
+            for phase, before, after in row_writes:
+                change = f"{(after - before) / before:+.0%}" if before else '-'
+                print(f"{phase:<26} {before:>18,} {after:>10,} {change:>8}", file=sys.stderr)
+            print(file=sys.stderr)
+
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"✗ {len(regressions)} phase(s) slower than baseline by more than {args.tolerance:.0f}%:",
+                  file=sys.stderr)
+            for phase, before, after in regressions:
+                print(f"  {phase}: {before:.2f}s -> {after:.2f}s", file=sys.stderr)
+            sys.exit(1)
+        print(f"✓ No phase slower than baseline by more than {args.tolerance:.0f}%", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
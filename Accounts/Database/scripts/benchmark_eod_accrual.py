@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+EOD Interest Accrual Benchmark
+
+Builds synthetic books of the requested sizes and times the row-by-row
+accrue_interest path against accrue_interest_bulk on identical copies of
+each database. The two resulting databases are compared to confirm that the
+bulk path produces exactly the same accruals.
+
+Usage:
+    python3 benchmark_eod_accrual.py [--sizes 10000 100000 1000000]
+
+Options:
+    --sizes N [N ...]  Number of accounts per synthetic book
+                       (default: 10000 100000 1000000)
+"""
+
+import sys
+import argparse
+import contextlib
+import io
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from datetime import date
+
+import batch_eod_processing
+from db_connection import connect
+
+DB_DIR = Path(__file__).parent.parent
+MIGRATIONS_DIR = DB_DIR / "schema" / "migrations"
+SEED_DIR = DB_DIR / "schema" / "seed"
+
+# Seed files holding reference data only (users and products)
+REFERENCE_SEED_FILES = ["001_seed_users.sql", "002_seed_products.sql"]
+
+PRODUCT_IDS = [
+    'PROD-CHK-BASIC-001',
+    'PROD-CHK-PREM-001',
+    'PROD-CHK-STUDENT-001',
+    'PROD-SAV-HIGH-001',
+    'PROD-CHK-BUS-001',
+]
+
+
+def build_book(db_path: Path, num_accounts: int, seed: int = 42):
+    """Create a database with the full schema, reference data and num_accounts accounts."""
+    rng = random.Random(seed)
+
+    conn = connect(db_path)
+    for migration_file in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        conn.executescript(migration_file.read_text())
+    for seed_name in REFERENCE_SEED_FILES:
+        conn.executescript((SEED_DIR / seed_name).read_text())
+
+    rows = (
+        (
+            f"ACC-BENCH-{i:08d}",
+            f"9{i:09d}",
+            f"CUST-{i % 50000:06d}",
+            rng.choice(PRODUCT_IDS),
+            round(rng.uniform(0, 25000), 2),
+        )
+        for i in range(num_accounts)
+    )
+    conn.executemany("""
+        INSERT INTO accounts (
+            account_id, account_number, customer_id, product_id,
+            currency, status, balance, interest_accrued, opening_date, created_by
+        ) VALUES (?, ?, ?, ?, 'USD', 'Active', ?, 0.00, '2025-01-01', 'USR-OFFICER-001')
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def snapshot_results(db_path: Path) -> tuple:
+    """Return the accrual-relevant state of a database for comparison."""
+    conn = connect(db_path)
+    accounts = conn.execute("""
+        SELECT account_id, interest_accrued FROM accounts ORDER BY account_id
+    """).fetchall()
+    accruals = conn.execute("""
+        SELECT account_id, accrual_date, balance, annual_rate, daily_interest, cumulative_accrued
+        FROM interest_accruals
+        ORDER BY account_id, accrual_date
+    """).fetchall()
+    conn.close()
+    return accounts, accruals
+
+
+def time_accrual(accrual_fn, db_path: Path, processing_date: date) -> float:
+    """Run one accrual function against db_path and return elapsed seconds."""
+    conn = connect(db_path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            accrual_fn(conn, processing_date)
+            elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    return elapsed
+
+
+def run_benchmark(sizes: list) -> list:
+    """Benchmark both accrual paths for each book size."""
+    processing_date = date(2025, 10, 15)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+
+        for size in sizes:
+            template = tmp_dir / f"book_{size}.db"
+            row_db = tmp_dir / f"book_{size}_row.db"
+            bulk_db = tmp_dir / f"book_{size}_bulk.db"
+
+            print(f"Building synthetic book with {size:,} accounts...")
+            build_book(template, size)
+            shutil.copy(template, row_db)
+            shutil.copy(template, bulk_db)
+
+            row_seconds = time_accrual(batch_eod_processing.accrue_interest, row_db, processing_date)
+            bulk_seconds = time_accrual(batch_eod_processing.accrue_interest_bulk, bulk_db, processing_date)
+
+            identical = snapshot_results(row_db) == snapshot_results(bulk_db)
+
+            results.append({
+                "accounts": size,
+                "row_seconds": row_seconds,
+                "bulk_seconds": bulk_seconds,
+                "speedup": row_seconds / bulk_seconds if bulk_seconds else float('inf'),
+                "identical": identical,
+            })
+
+            for db_file in (template, row_db, bulk_db):
+                db_file.unlink()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EOD Interest Accrual Benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Number of accounts per synthetic book')
+
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes)
+
+    print(f"\n{'='*70}")
+    print(f"{'Accounts':>12} {'Row-by-row':>14} {'Bulk':>12} {'Speedup':>10} {'Identical':>10}")
+    print(f"{'-'*70}")
+    for r in results:
+        print(f"{r['accounts']:>12,} {r['row_seconds']:>13.2f}s {r['bulk_seconds']:>11.2f}s "
+              f"{r['speedup']:>9.1f}x {'yes' if r['identical'] else 'NO':>10}")
+    print(f"{'='*70}\n")
+
+    if not all(r['identical'] for r in results):
+        print("✗ Bulk accrual results differ from the row-by-row path!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
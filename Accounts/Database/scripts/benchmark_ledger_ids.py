@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Ledger ID Benchmark
+
+Inserts the same synthetic transactions into two fresh databases with the
+full schema, keyed once by uuid4 (TXN-<uuid4>) and once by ledger_ids
+(TXN-<ULID>), and compares insert throughput and the size of the primary
+key index and of the database file. Rows are written in pages of
+--page-size rows with a commit per page, like the batch scripts.
+
+Usage:
+    python3 benchmark_ledger_ids.py [--rows N] [--page-size N]
+
+Options:
+    --rows N        Transactions to insert per key scheme (default: 1000000)
+    --page-size N   Rows per executemany and commit (default: 10000)
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from db_connection import connect, MIGRATIONS_DIR
+from ledger_ids import new_id
+
+ACCOUNTS = 10_000
+
+KEY_SCHEMES = {
+    'uuid4': lambda: f"TXN-{uuid.uuid4()}",
+    'ledger_ids': lambda: new_id("TXN"),
+}
+
+INSERT_SQL = """
+    INSERT INTO transactions (
+        transaction_id, account_id, transaction_date, value_date,
+        type, category, amount, currency, running_balance,
+        description, channel, status, created_at, created_by
+    ) VALUES (?, ?, '2025-10-31 00:00:00', '2025-10-31', ?, 'Deposit', ?, 'USD', ?,
+              'Benchmark', 'Batch', 'Posted', '2025-10-31 00:00:00', 'SYSTEM')
+"""
+
+
+def _index_bytes(conn, index_name: str) -> int:
+    return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (index_name,)).fetchone()[0] or 0
+
+
+def run_scheme(db_path: Path, scheme: str, rows: int, page_size: int, seed: int = 42) -> dict:
+    """Insert rows transactions keyed by scheme; return timing and sizes."""
+    rng = random.Random(seed)
+    make_id = KEY_SCHEMES[scheme]
+
+    conn = connect(db_path)
+    for migration_file in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        conn.executescript(migration_file.read_text())
+    conn.commit()
+    # Only transactions are loaded; the accounts they reference do not exist
+    conn.execute("PRAGMA foreign_keys = OFF")
+
+    elapsed = 0.0
+    for first in range(0, rows, page_size):
+        values = [(rng.randrange(ACCOUNTS), rng.random() < 0.5, rng.randrange(1, 100000))
+                  for _ in range(min(page_size, rows - first))]
+        start = time.perf_counter()
+        conn.executemany(INSERT_SQL, [
+            (make_id(), f"ACC-BENCH-{account:08d}", 'Credit' if credit else 'Debit', cents / 100, cents / 100)
+            for account, credit, cents in values
+        ])
+        conn.commit()
+        elapsed += time.perf_counter() - start
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    primary_key_index = conn.execute("""
+        SELECT name FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'transactions' AND name LIKE 'sqlite_autoindex_%'
+    """).fetchone()[0]
+    result = {
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "pk_index_mb": _index_bytes(conn, primary_key_index) / 1048576,
+        "database_mb": db_path.stat().st_size / 1048576,
+        "id_length": len(make_id()),
+    }
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ledger ID Benchmark')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Transactions per key scheme')
+    parser.add_argument('--page-size', type=int, default=10_000, help='Rows per executemany and commit')
+
+    args = parser.parse_args()
+
+    if args.rows < 1 or args.page_size < 1:
+        parser.error('--rows and --page-size must be at least 1')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scheme in KEY_SCHEMES:
+            print(f"Inserting {args.rows:,} transactions keyed by {scheme}...")
+            results[scheme] = run_scheme(Path(tmp_dir) / f"{scheme}.db", scheme, args.rows, args.page_size)
+
+    print(f"\n{'='*78}")
+    print(f"{'Keys':<12} {'ID length':>10} {'Insert':>10} {'Rows/s':>12} {'PK index':>12} {'Database':>12}")
+    print(f"{'-'*78}")
+    for scheme, r in results.items():
+        print(f"{scheme:<12} {r['id_length']:>10} {r['seconds']:>9.2f}s {r['rows_per_second']:>12,} "
+              f"{r['pk_index_mb']:>9.1f} MB {r['database_mb']:>9.1f} MB")
+    print(f"{'='*78}")
+
+    baseline, ordered = results['uuid4'], results['ledger_ids']
+    print(f"\nledger_ids vs uuid4: {baseline['seconds'] / ordered['seconds']:.2f}x insert throughput, "
+          f"primary key index {ordered['pk_index_mb'] / baseline['pk_index_mb']:.0%} of the size\n")
+
+
+if __name__ == "__main__":
+    main()
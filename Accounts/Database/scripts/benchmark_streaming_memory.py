@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Streaming Memory Benchmark
+
+Checks that the streaming batch stages - interest accrual, monthly fees (row
+by row and bulk) and monthly interest accruals - run in constant memory: each
+stage runs against synthetic books of increasing size, in its own process,
+and its peak Python heap (tracemalloc) must stay under a ceiling at every
+size. Peak RSS is reported as well; it also includes SQLite's page cache and
+memory-mapped pages, which the batch connection profile caps rather than the
+page size.
+
+Usage:
+    python3 benchmark_streaming_memory.py [--sizes N ...] [--transactions N]
+                                          [--chunk-size N] [--ceiling-mb MB]
+
+Options:
+    --sizes N ...      Book sizes in accounts (default: 5000 40000)
+    --transactions N   Transactions per account (default: 8)
+    --chunk-size N     Accounts per page and commit (default: each stage's default)
+    --ceiling-mb MB    Allowed peak Python heap per stage in MiB (default: 64);
+                       exits with status 1 if any stage exceeds it
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import batch_eod_processing
+import batch_monthly_accruals
+from benchmark_batch_suite import AS_OF_DATE, build_suite_book
+from db_connection import connect
+
+
+def _chunk_kwargs(chunk_size: int) -> dict:
+    return {"chunk_size": chunk_size} if chunk_size else {}
+
+
+STAGES = {
+    'eod.interest_accrual': lambda conn, chunk: batch_eod_processing.accrue_interest_bulk(
+        conn, AS_OF_DATE, **_chunk_kwargs(chunk)),
+    'eod.interest_accrual_row': lambda conn, chunk: batch_eod_processing.accrue_interest(
+        conn, AS_OF_DATE, **_chunk_kwargs(chunk)),
+    'eod.monthly_fees': lambda conn, chunk: batch_eod_processing.apply_monthly_fees_bulk(
+        conn, AS_OF_DATE, **_chunk_kwargs(chunk)),
+    'eod.monthly_fees_row': lambda conn, chunk: batch_eod_processing.apply_monthly_fees(
+        conn, AS_OF_DATE, **_chunk_kwargs(chunk)),
+    'monthly.accruals': lambda conn, chunk: batch_monthly_accruals.process_monthly_accruals(
+        conn, AS_OF_DATE.strftime('%Y-%m'), collect_results=False, **_chunk_kwargs(chunk)),
+}
+
+
+def _run_stage(stage: str, db_path: str, chunk_size: int, result_queue):
+    """Child process: run one stage and report its peak Python heap and RSS."""
+    conn = connect(db_path)
+    try:
+        # Report output goes to /dev/null: captured in memory it would grow with the book
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            tracemalloc.start()
+            start = time.perf_counter()
+            STAGES[stage](conn, chunk_size)
+            elapsed = time.perf_counter() - start
+            _, peak_heap = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        conn.close()
+
+    result_queue.put({
+        "wall_seconds": round(elapsed, 2),
+        "peak_heap_kb": peak_heap // 1024,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+
+
+def run_benchmark(sizes: list, txns_per_account: int, chunk_size: int) -> dict:
+    """Build one book per size and run every stage on a fresh copy in its own process."""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        for size in sizes:
+            template = tmp_dir / f"book_{size}.db"
+            print(f"Building synthetic book: {size:,} accounts...", file=sys.stderr)
+            build_suite_book(template, size, 5, txns_per_account)
+
+            for stage in STAGES:
+                stage_db = tmp_dir / "stage.db"
+                shutil.copy(template, stage_db)
+
+                print(f"  Running {stage}...", file=sys.stderr)
+                result_queue = context.Queue()
+                process = context.Process(target=_run_stage,
+                                          args=(stage, str(stage_db), chunk_size, result_queue))
+                process.start()
+                process.join()
+                if process.exitcode != 0:
+                    raise RuntimeError(f"Stage {stage} failed with exit code {process.exitcode}")
+                results[(stage, size)] = result_queue.get()
+
+                stage_db.unlink()
+            template.unlink()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming Memory Benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 40000],
+                        help='Book sizes in accounts')
+    parser.add_argument('--transactions', type=int, default=8, help='Transactions per account')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="Accounts per page and commit (default: each stage's default)")
+    parser.add_argument('--ceiling-mb', type=float, default=64.0,
+                        help='Allowed peak Python heap per stage in MiB (default: 64)')
+
+    args = parser.parse_args()
+
+    if min(args.sizes) < 1 or args.transactions < 1:
+        parser.error('--sizes and --transactions must be at least 1')
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+
+    sizes = sorted(args.sizes)
+    results = run_benchmark(sizes, args.transactions, args.chunk_size)
+
+    print(f"\n{'='*78}")
+    print(f"{'Stage':<26} {'Accounts':>10} {'Wall':>9} {'Peak heap':>12} {'Peak RSS':>12}")
+    print(f"{'-'*78}")
+    over_ceiling = []
+    for stage in STAGES:
+        for size in sizes:
+            r = results[(stage, size)]
+            heap_mb = r["peak_heap_kb"] / 1024
+            if heap_mb > args.ceiling_mb:
+                over_ceiling.append((stage, size, heap_mb))
+            print(f"{stage:<26} {size:>10,} {r['wall_seconds']:>8.2f}s {heap_mb:>9.1f} MB "
+                  f"{r['peak_rss_kb'] / 1024:>9.1f} MB")
+    print(f"{'='*78}\n")
+
+    if over_ceiling:
+        print(f"✗ {len(over_ceiling)} stage run(s) above the {args.ceiling_mb:.0f} MB heap ceiling:")
+        for stage, size, heap_mb in over_ceiling:
+            print(f"  {stage} at {size:,} accounts: {heap_mb:.1f} MB")
+        sys.exit(1)
+    print(f"✓ Every stage stayed under the {args.ceiling_mb:.0f} MB heap ceiling")
+
+
+if __name__ == "__main__":
+    main()
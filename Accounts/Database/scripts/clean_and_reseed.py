@@ -5,14 +5,25 @@ Clean existing test data and create fresh seed data with:
 - 5 customers with realistic data
 - 1 account per customer
 - 2-5 random transactions per account
+
+Usage:
+    python3 clean_and_reseed.py [--snapshot NAME]
+
+With --snapshot NAME the reseeded database is saved as snapshot NAME (see
+snapshots.py), and later runs restore that snapshot instead of cleaning
+and reseeding row by row.
 """
 
-import sqlite3
+import argparse
 import random
 from datetime import datetime, timedelta
-import uuid
 import os
 
+from db_connection import connect
+from ledger_ids import new_id
+from account_stats import refresh_account_stats
+from snapshots import restore_snapshot, save_snapshot, snapshot_path
+
 # Get the Database directory path (parent of scripts directory)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_DIR = os.path.dirname(SCRIPT_DIR)
@@ -35,7 +46,7 @@ def create_default_product(conn):
     """Create the default product for all accounts"""
     cursor = conn.cursor()
 
-    product_id = f"PROD-{uuid.uuid4()}"
+    product_id = new_id("PROD")
     now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
 
     cursor.execute("""
@@ -142,7 +153,7 @@ def create_accounts(conn, product_id, customer_ids):
     opening_balances = [5000.00, 12500.50, 25000.00, 3500.75, 50000.00]
 
     for i, customer_id in enumerate(customer_ids):
-        account_id = f"ACC-{uuid.uuid4()}"
+        account_id = new_id("ACC")
         account_number = f"{datetime.now().year}{str(i+1).zfill(6)}"
 
         cursor.execute("""
@@ -261,7 +272,7 @@ def create_transactions(conn, accounts):
             days_offset = random.randint(1, 29)
             txn_date = (base_date + timedelta(days=days_offset)).strftime('%Y-%m-%d %H:%M:%S')
 
-            transaction_id = f"TXN-{uuid.uuid4()}"
+            transaction_id = new_id("TXN")
             description = random.choice(transaction_descriptions[txn_type])
             reference = f"REF-{random.randint(100000, 999999)}"
             channel = random.choice(['API', 'UI', 'Batch'])
@@ -294,19 +305,32 @@ def create_transactions(conn, accounts):
 
         # Update final account balance to match final running balance
         cursor.execute("""
-            UPDATE accounts SET balance = ? WHERE account_id = ?
+            UPDATE accounts SET balance = ?, updated_at = datetime('now') WHERE account_id = ?
         """, (running_balance, account_id))
 
+    refresh_account_stats(conn, rebuild=True)
     conn.commit()
     print(f"\n✓ Created {total_transactions + len(accounts)} total transactions (including {len(accounts)} opening transactions)")
 
 def main():
+    parser = argparse.ArgumentParser(description='Clean existing test data and create fresh seed data')
+    parser.add_argument('--snapshot', metavar='NAME', default=None,
+                        help='Restore snapshot NAME if saved; otherwise reseed and save it as NAME')
+
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Account Processing System - Data Cleanup & Reseeding")
     print("=" * 60)
     print()
 
-    conn = sqlite3.connect(DB_PATH)
+    if args.snapshot and snapshot_path(args.snapshot).exists():
+        restore_snapshot(args.snapshot, DB_PATH)
+        print(f"✓ Database reset to snapshot '{args.snapshot}'")
+        print()
+        return
+
+    conn = connect(DB_PATH)
 
     try:
         # Step 1: Clean existing data
@@ -343,6 +367,12 @@ def main():
         print("  • Multiple transactions per account")
         print()
 
+        if args.snapshot:
+            conn.close()
+            save_snapshot(args.snapshot, DB_PATH)
+            print(f"✓ Saved as snapshot '{args.snapshot}'")
+            print()
+
     except Exception as e:
         print(f"✗ Error: {e}")
         conn.rollback()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Vectorized Day-Count Conventions
+
+Computes the year fraction of interest periods for whole arrays of start/end
+dates in one call. Fractions are returned as exact integer pairs
+(days, year_days), the form interest_kernel.interest_cents takes, so interest
+is still rounded exactly once, ROUND_HALF_UP.
+
+Conventions:
+- 30/360        US bond basis: D1 = 31 -> 30; D2 = 31 -> 30 if D1 is 30 or 31
+- 30E/360       Eurobond basis: D1 = 31 -> 30 and D2 = 31 -> 30
+- ACT/365F      Actual days / 365
+- ACT/360       Actual days / 360
+- ACT/ACT ISDA  Days falling in leap years / 366 + other days / 365; the pair
+                is scaled to the common basis 365 × 366
+
+Products select a convention in products.day_count_convention (migration
+008). NULL keeps each batch's historical convention: ACT/365F for the EOD
+daily accrual and 30/360 for the monthly posting, see DEFAULT_* below.
+
+Periods are half-open, [start, end): a daily accrual for day D runs from D to
+D + 1, a monthly posting from the first of the month to the first of the
+next month. Under 30/360 and 30E/360 every calendar month is 30 days.
+
+Usage:
+    python3 day_count.py START END
+
+Prints the year fraction of [START, END) under every convention.
+"""
+
+import sys
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+from db_connection import ensure_column, MIGRATIONS_DIR
+
+DAY_COUNT_MIGRATION = MIGRATIONS_DIR / "008_add_product_day_count_convention.sql"
+
+THIRTY_360 = "30/360"
+THIRTY_E_360 = "30E/360"
+ACT_365F = "ACT/365F"
+ACT_360 = "ACT/360"
+ACT_ACT_ISDA = "ACT/ACT ISDA"
+
+# Day 0 of the integer day numbers stored in the database (numpy's datetime64 epoch)
+EPOCH = date(1970, 1, 1)
+
+# Historical conventions of the batch scripts, used when a product has none
+DEFAULT_DAILY_CONVENTION = ACT_365F
+DEFAULT_MONTHLY_CONVENTION = THIRTY_360
+
+
+def ensure_day_count_convention(conn):
+    """Add products.day_count_convention on databases initialised before migration 008."""
+    ensure_column(conn, "products", "day_count_convention", DAY_COUNT_MIGRATION)
+
+
+def day_number(day: date) -> int:
+    """Days since 1970-01-01, the value of the *_day columns (migration 009)."""
+    return (day - EPOCH).days
+
+
+def from_day_number(number: int) -> date:
+    """Inverse of day_number."""
+    return EPOCH + timedelta(days=number)
+
+
+def to_day_array(dates) -> np.ndarray:
+    """Convert dates (date objects, ISO strings or datetime64) to a datetime64[D] array."""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[D]')
+    return np.array([d if isinstance(d, date) else date.fromisoformat(str(d)[:10]) for d in np.atleast_1d(dates)],
+                    dtype='datetime64[D]')
+
+
+def _ymd(days: np.ndarray) -> tuple:
+    """Split a datetime64[D] array into integer (year, month, day) arrays."""
+    months = days.astype('datetime64[M]')
+    year = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+    return year, month, day
+
+
+def _thirty_360_days(start, end, eurobond: bool) -> np.ndarray:
+    y1, m1, d1 = _ymd(start)
+    y2, m2, d2 = _ymd(end)
+    d1 = np.minimum(d1, 30)
+    if eurobond:
+        d2 = np.minimum(d2, 30)
+    else:
+        d2 = np.where((d2 == 31) & (d1 == 30), 30, d2)
+    return 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+
+
+def _actual_days(start, end) -> np.ndarray:
+    return (end - start).astype(np.int64)
+
+
+def _leap_year_days_before(days: np.ndarray) -> np.ndarray:
+    """Number of days in leap years between 0001-01-01 and each date."""
+    year, _, _ = _ymd(days)
+    previous = year - 1
+    leap_years_before = previous // 4 - previous // 100 + previous // 400
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64)
+    return 366 * leap_years_before + np.where(is_leap, day_of_year, 0)
+
+
+def _act_act_isda_days(start, end) -> np.ndarray:
+    leap_days = _leap_year_days_before(end) - _leap_year_days_before(start)
+    other_days = _actual_days(start, end) - leap_days
+    return leap_days * 365 + other_days * 366
+
+
+CONVENTIONS = {
+    THIRTY_360: (lambda start, end: _thirty_360_days(start, end, eurobond=False), 360),
+    THIRTY_E_360: (lambda start, end: _thirty_360_days(start, end, eurobond=True), 360),
+    ACT_365F: (_actual_days, 365),
+    ACT_360: (_actual_days, 360),
+    ACT_ACT_ISDA: (_act_act_isda_days, 365 * 366),
+}
+
+
+def day_fractions(convention: str, start_dates, end_dates) -> tuple:
+    """
+    Calculate the year fraction of [start, end) periods as integer pairs.
+
+    Args:
+        convention: One of CONVENTIONS
+        start_dates: Period starts (array-like of dates, ISO strings or datetime64)
+        end_dates: Period ends, same length as start_dates (or broadcastable)
+
+    Returns:
+        (days, year_days) int64 arrays; the year fraction is days / year_days
+
+    Raises:
+        ValueError: If the convention is unknown
+    """
+    if convention not in CONVENTIONS:
+        raise ValueError(f"Unknown day count convention: {convention} (expected one of {', '.join(CONVENTIONS)})")
+
+    count_days, year_days = CONVENTIONS[convention]
+    start, end = np.broadcast_arrays(to_day_array(start_dates), to_day_array(end_dates))
+    days = count_days(start, end)
+    return days, np.full(days.shape, year_days, dtype=np.int64)
+
+
+def year_fractions(convention: str, start_dates, end_dates) -> np.ndarray:
+    """Calculate year fractions of [start, end) periods as float64 (for display and reports)."""
+    days, year_days = day_fractions(convention, start_dates, end_dates)
+    return days / year_days
+
+
+def daily_fractions(convention: str, accrual_dates) -> tuple:
+    """Day fractions for daily accruals: one [date, date + 1) period per accrual date."""
+    start = to_day_array(accrual_dates)
+    return day_fractions(convention, start, start + np.timedelta64(1, 'D'))
+
+
+def monthly_fractions(convention: str, month_ends) -> tuple:
+    """Day fractions for monthly postings: [first of month, first of next month) per month end."""
+    end = to_day_array(month_ends) + np.timedelta64(1, 'D')
+    start = (end - np.timedelta64(1, 'D')).astype('datetime64[M]').astype('datetime64[D]')
+    return day_fractions(convention, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Day count year fractions')
+    parser.add_argument('start', type=date.fromisoformat, help='Period start (YYYY-MM-DD)')
+    parser.add_argument('end', type=date.fromisoformat, help='Period end, exclusive (YYYY-MM-DD)')
+
+    args = parser.parse_args()
+
+    for convention in CONVENTIONS:
+        days, year_days = day_fractions(convention, [args.start], [args.end])
+        print(f"  {convention:<13} {int(days[0]):>7} / {int(year_days[0]):<6} = "
+              f"{days[0] / year_days[0]:.10f}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
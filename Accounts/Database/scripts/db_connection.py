@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite Connection Layer
+
+Every Database script opens accounts.db through connect() so PRAGMAs are
+applied the same way everywhere. Settings come from named profiles:
+
+- batch:  WAL journal with synchronous=NORMAL (fsync only when the WAL is
+          checkpointed), 256 MiB page cache, 1 GiB mmap, in-memory temp
+          store, 60s busy timeout and a large prepared-statement cache.
+          For EOD and month-end jobs, seeding and data generation.
+- online: WAL journal with synchronous=FULL, a modest page cache and a short
+          busy timeout. For request-driven access next to the API.
+
+WAL is persistent in the database file, so once any script has connected,
+the API's readers no longer block on batch writers (and vice versa).
+
+Prepared statements are cached per connection by SQL text (sqlite3's
+cached_statements), so executemany and repeated execute calls in the batch
+loops compile each statement once.
+"""
+
+import sqlite3
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "schema" / "migrations"
+INTEGER_LEDGER_MIGRATION = MIGRATIONS_DIR / "009_add_integer_ledger_columns.sql"
+LEDGER_ARCHIVE_MIGRATION = MIGRATIONS_DIR / "011_add_ledger_archive.sql"
+UPDATED_AT_TRIGGERS_MIGRATION = MIGRATIONS_DIR / "013_replace_updated_at_triggers.sql"
+ARCHIVED_CLOSING_BALANCE_MIGRATION = MIGRATIONS_DIR / "014_add_archived_closing_balance.sql"
+LEDGER_ARCHIVE_SCOPE_MIGRATION = MIGRATIONS_DIR / "015_add_ledger_archive_scope.sql"
+ARCHIVED_MONTHLY_ACCRUALS_MIGRATION = MIGRATIONS_DIR / "016_add_archived_monthly_accruals.sql"
+
+PROFILES = {
+    "batch": {
+        "timeout": 60,
+        "cached_statements": 512,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -262144,       # KiB, i.e. 256 MiB
+            "mmap_size": 1073741824,     # 1 GiB
+            "temp_store": "MEMORY",
+        },
+    },
+    "online": {
+        "timeout": 5,
+        "cached_statements": 128,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "cache_size": -16384,        # KiB, i.e. 16 MiB
+            "mmap_size": 268435456,      # 256 MiB
+            "temp_store": "MEMORY",
+        },
+    },
+}
+
+
+def connect(db_path, profile: str = "batch", foreign_keys: bool = None) -> sqlite3.Connection:
+    """
+    Open a database connection configured from a named profile.
+
+    Args:
+        db_path: Path to the SQLite database file
+        profile: 'batch' or 'online'
+        foreign_keys: Set PRAGMA foreign_keys ON/OFF; None keeps SQLite's
+                      default (OFF)
+
+    Returns:
+        sqlite3.Connection with the profile's PRAGMAs applied
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown connection profile: {profile} (expected one of {', '.join(PROFILES)})")
+
+    settings = PROFILES[profile]
+    conn = sqlite3.connect(
+        str(db_path),
+        timeout=settings["timeout"],
+        cached_statements=settings["cached_statements"],
+    )
+
+    for name, value in settings["pragmas"].items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+    if foreign_keys is not None:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+
+    return conn
+
+
+def remove_database(db_path: Path):
+    """Delete a database file together with its WAL and shared-memory files."""
+    db_path = Path(db_path)
+    for path in (db_path, db_path.with_name(db_path.name + "-wal"), db_path.with_name(db_path.name + "-shm")):
+        if path.exists():
+            path.unlink()
+
+
+def ensure_table(conn, table_name: str, migration_file: Path):
+    """Run migration_file if table_name does not exist yet (databases created before it)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    if not exists:
+        conn.executescript(migration_file.read_text())
+
+
+def ensure_column(conn, table_name: str, column_name: str, migration_file: Path):
+    """Run migration_file if table_name has no column_name yet (databases created before it)."""
+    # table_xinfo, unlike table_info, also lists generated columns
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table_name})")}
+    if column_name not in columns:
+        conn.executescript(migration_file.read_text())
+
+
+def ensure_trigger(conn, trigger_name: str, migration_file: Path):
+    """Run migration_file if trigger_name does not exist yet (databases created before it)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger_name,)
+    ).fetchone()
+    if not exists:
+        conn.executescript(migration_file.read_text())
+
+
+def ensure_integer_ledger_columns(conn):
+    """Add the integer cents and day-number columns on databases initialised before migration 009."""
+    ensure_column(conn, "transactions", "value_day", INTEGER_LEDGER_MIGRATION)
+
+
+def ensure_ledger_archive(conn):
+    """Create the ledger archive tables on databases initialised before migrations 011 and 014-016."""
+    ensure_table(conn, "ledger_archives", LEDGER_ARCHIVE_MIGRATION)
+    ensure_column(conn, "archived_account_totals", "closing_balance_cents", ARCHIVED_CLOSING_BALANCE_MIGRATION)
+    ensure_column(conn, "ledger_archives", "transactions_archived", LEDGER_ARCHIVE_SCOPE_MIGRATION)
+    ensure_column(conn, "ledger_archives", "monthly_accrual_count", ARCHIVED_MONTHLY_ACCRUALS_MIGRATION)
+
+
+def ensure_updated_at_triggers(conn):
+    """Replace the row-rewriting updated_at triggers on databases initialised before migration 013."""
+    ensure_trigger(conn, "trg_accounts_updated_at_fallback", UPDATED_AT_TRIGGERS_MIGRATION)
+
+
+def last_archived_year(conn):
+    """
+    The latest year whose transactions were moved out to a ledger archive, or
+    None if nothing is archived. Archives that only hold compacted daily
+    accruals do not close their year.
+    """
+    ensure_ledger_archive(conn)
+    return conn.execute(
+        "SELECT MAX(archive_year) FROM ledger_archives WHERE transactions_archived = 1"
+    ).fetchone()[0]
+
+
+def iter_keyset_pages(fetch_page, page_size: int):
+    """
+    Yield the rows of a query one keyset page at a time.
+
+    fetch_page((after_key, page_size)) must return up to page_size rows
+    ordered by their first column, all with a key greater than after_key
+    (None for the first page). Iteration stops after the first short page,
+    so only one page is held in memory and the caller can commit between
+    pages.
+    """
+    after_key = None
+    while True:
+        rows = fetch_page((after_key, page_size))
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        after_key = rows[-1][0]
+
+
+def drop_indexes(conn, table_name: str) -> list:
+    """
+    Drop the secondary indexes of table_name, e.g. before a bulk load.
+
+    Returns:
+        The CREATE INDEX statements of the dropped indexes, for restore_indexes()
+    """
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table_name,)
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f"DROP INDEX {name}")
+    return [sql for _, sql in indexes]
+
+
+def restore_indexes(conn, index_sql: list):
+    """Recreate indexes dropped by drop_indexes()."""
+    for sql in index_sql:
+        conn.execute(sql)
@@ -2,110 +2,130 @@
 """
 Generate Realistic Account Data
 Creates realistic transaction history for test accounts with balances tracing to 0
+
+Histories come from a vectorized simulator (see TRANSACTION PATTERNS below):
+event arrivals are drawn per pattern for whole batches of accounts and days,
+so generation is linear in the length of the history, and a fixed seed and
+as-of date always produce the same data.
+
+With --accounts N a synthetic book of N accounts is generated by a pool of
+worker processes and bulk loaded instead (see BULK BOOK below).
+
+Usage:
+    python3 generate_realistic_data.py [--seed N] [--as-of YYYY-MM-DD]
+    python3 generate_realistic_data.py --accounts N [--workers N] [--stage-dir DIR]
+                                       [--seed N] [--as-of YYYY-MM-DD]
 """
 
-import sqlite3
+import os
 import sys
+import time
+import argparse
+import multiprocessing
+import tempfile
 from pathlib import Path
-from datetime import datetime, timedelta
-import random
+from datetime import datetime, date
+
+import numpy as np
+
+from db_connection import connect, drop_indexes, restore_indexes
+from account_stats import refresh_account_stats
 
 # Get database directory
 DB_DIR = Path(__file__).parent.parent
 DB_FILE = DB_DIR / "accounts.db"
 
-
-def generate_realistic_data():
+DEFAULT_SEED = 42
+
+# Realistic account scenarios
+SCENARIO_ACCOUNTS = [
+    {
+        'account_id': 'ACC-2025100401',
+        'account_number': '1000000001',
+        'customer_id': 'CUST-001',
+        'product_id': 'PROD-CHK-BASIC-001',
+        'opening_date': '2025-01-15',
+        'target_balance': 1500.00,
+        'transaction_pattern': 'salary_worker'  # Regular salary deposits, modest spending
+    },
+    {
+        'account_id': 'ACC-2025100402',
+        'account_number': '1000000002',
+        'customer_id': 'CUST-001',
+        'product_id': 'PROD-SAV-HIGH-001',
+        'opening_date': '2025-01-15',
+        'target_balance': 5000.00,
+        'transaction_pattern': 'savings'  # Mostly deposits, rare withdrawals
+    },
+    {
+        'account_id': 'ACC-2025100403',
+        'account_number': '1000000003',
+        'customer_id': 'CUST-002',
+        'product_id': 'PROD-CHK-PREM-001',
+        'opening_date': '2025-03-10',
+        'target_balance': 3200.50,
+        'transaction_pattern': 'professional'  # Higher salary, moderate spending
+    },
+    {
+        'account_id': 'ACC-2025100404',
+        'account_number': '1000000004',
+        'customer_id': 'CUST-003',
+        'product_id': 'PROD-CHK-STUDENT-001',
+        'opening_date': '2025-08-20',
+        'target_balance': 250.00,
+        'transaction_pattern': 'student'  # Small deposits, frequent small purchases
+    },
+    {
+        'account_id': 'ACC-2025100405',
+        'account_number': '1000000005',
+        'customer_id': 'CUST-004',
+        'product_id': 'PROD-CHK-BUS-001',
+        'opening_date': '2025-02-01',
+        'target_balance': 12500.00,
+        'transaction_pattern': 'business'  # Large deposits and withdrawals
+    },
+    {
+        'account_id': 'ACC-2025100406',
+        'account_number': '1000000006',
+        'customer_id': 'CUST-005',
+        'product_id': 'PROD-CHK-BASIC-001',
+        'opening_date': '2025-09-15',
+        'target_balance': 50.00,
+        'transaction_pattern': 'low_balance'  # Minimal activity
+    },
+]
+
+
+def generate_realistic_data(seed: int = DEFAULT_SEED, as_of: date = None, db_path: Path = DB_FILE):
     """Generate realistic account data with transactions"""
     print("=" * 80)
     print("Generating Realistic Account Data")
     print("=" * 80)
 
     # Check if database exists
-    if not DB_FILE.exists():
-        print(f"ERROR: Database not found at {DB_FILE}")
+    if not db_path.exists():
+        print(f"ERROR: Database not found at {db_path}")
         print("Please run 'python scripts/init_db.py' first")
         sys.exit(1)
 
     # Create database connection
-    conn = sqlite3.connect(str(DB_FILE))
+    conn = connect(db_path)
     cursor = conn.cursor()
 
     try:
-        # Clear existing transactions and accounts (disable FK temporarily)
-        print("\nClearing existing data...")
-        cursor.execute("PRAGMA foreign_keys = OFF;")
-        cursor.execute("DELETE FROM transactions;")
-        cursor.execute("DELETE FROM interest_accruals;")
-        cursor.execute("DELETE FROM accounts;")
-        cursor.execute("PRAGMA foreign_keys = ON;")
-        conn.commit()
-        print("  ✓ Existing data cleared")
-
-        # Define realistic account scenarios
-        accounts = [
-            {
-                'account_id': 'ACC-2025100401',
-                'account_number': '1000000001',
-                'customer_id': 'CUST-001',
-                'product_id': 'PROD-CHK-BASIC-001',
-                'opening_date': '2025-01-15',
-                'target_balance': 1500.00,
-                'transaction_pattern': 'salary_worker'  # Regular salary deposits, modest spending
-            },
-            {
-                'account_id': 'ACC-2025100402',
-                'account_number': '1000000002',
-                'customer_id': 'CUST-001',
-                'product_id': 'PROD-SAV-HIGH-001',
-                'opening_date': '2025-01-15',
-                'target_balance': 5000.00,
-                'transaction_pattern': 'savings'  # Mostly deposits, rare withdrawals
-            },
-            {
-                'account_id': 'ACC-2025100403',
-                'account_number': '1000000003',
-                'customer_id': 'CUST-002',
-                'product_id': 'PROD-CHK-PREM-001',
-                'opening_date': '2025-03-10',
-                'target_balance': 3200.50,
-                'transaction_pattern': 'professional'  # Higher salary, moderate spending
-            },
-            {
-                'account_id': 'ACC-2025100404',
-                'account_number': '1000000004',
-                'customer_id': 'CUST-003',
-                'product_id': 'PROD-CHK-STUDENT-001',
-                'opening_date': '2025-08-20',
-                'target_balance': 250.00,
-                'transaction_pattern': 'student'  # Small deposits, frequent small purchases
-            },
-            {
-                'account_id': 'ACC-2025100405',
-                'account_number': '1000000005',
-                'customer_id': 'CUST-004',
-                'product_id': 'PROD-CHK-BUS-001',
-                'opening_date': '2025-02-01',
-                'target_balance': 12500.00,
-                'transaction_pattern': 'business'  # Large deposits and withdrawals
-            },
-            {
-                'account_id': 'ACC-2025100406',
-                'account_number': '1000000006',
-                'customer_id': 'CUST-005',
-                'product_id': 'PROD-CHK-BASIC-001',
-                'opening_date': '2025-09-15',
-                'target_balance': 50.00,
-                'transaction_pattern': 'low_balance'  # Minimal activity
-            },
-        ]
+        clear_existing_data(conn)
 
         print("\nCreating accounts and transactions...")
 
-        for acc in accounts:
-            create_account_with_history(cursor, acc)
+        rng = np.random.default_rng(seed)
+        as_of = as_of or date.today()
+        for acc in SCENARIO_ACCOUNTS:
+            create_account_with_history(cursor, acc, as_of, rng)
             conn.commit()
 
+        refresh_account_stats(conn, rebuild=True)
+        conn.commit()
+
         # Show summary
         print("\n" + "-" * 80)
         print("Account Summary:")
@@ -171,7 +191,20 @@ def generate_realistic_data():
         sys.exit(1)
 
 
-def create_account_with_history(cursor, account_info):
+def clear_existing_data(conn):
+    """Clear existing transactions and accounts (disable FK temporarily)"""
+    print("\nClearing existing data...")
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = OFF;")
+    cursor.execute("DELETE FROM transactions;")
+    cursor.execute("DELETE FROM interest_accruals;")
+    cursor.execute("DELETE FROM accounts;")
+    cursor.execute("PRAGMA foreign_keys = ON;")
+    conn.commit()
+    print("  ✓ Existing data cleared")
+
+
+def create_account_with_history(cursor, account_info, as_of: date, rng):
     """Create an account with realistic transaction history"""
 
     # Insert account with 0 balance initially
@@ -190,398 +223,511 @@ def create_account_with_history(cursor, account_info):
 
     # Get product details for interest/fees
     cursor.execute("""
-        SELECT interest_rate, monthly_maintenance_fee, transaction_fee
+        SELECT interest_rate, transaction_fee
         FROM products WHERE product_id = ?;
     """, (account_info['product_id'],))
-    product = cursor.fetchone()
-    interest_rate, monthly_fee, txn_fee = product
+    interest_rate, txn_fee = cursor.fetchone()
 
-    # Generate transaction history
-    opening_date = datetime.strptime(account_info['opening_date'], '%Y-%m-%d')
-    current_date = datetime.now()
+    # Generate transaction history, in chronological order with running balances
+    history = simulate_transactions([dict(account_info, interest_rate=interest_rate, transaction_fee=txn_fee)],
+                                    as_of, rng)
+    transaction_rows, balance = history[account_info['account_id']]
 
-    transactions = generate_transactions(
-        account_info['account_id'],
-        account_info['account_number'],
-        opening_date,
-        current_date,
-        account_info['target_balance'],
-        account_info['transaction_pattern'],
-        interest_rate,
-        monthly_fee,
-        txn_fee
-    )
-
-    # Insert transactions in chronological order, but we'll query them in reverse later
-    running_balance = 0.00
-    for txn in transactions:
-        if txn['type'] == 'Credit':
-            running_balance += txn['amount']
-        else:  # Debit
-            running_balance -= txn['amount']
-
-        txn['running_balance'] = round(running_balance, 2)
-
-        cursor.execute("""
-            INSERT INTO transactions (
-                transaction_id, account_id, transaction_date, value_date,
-                type, category, amount, currency, running_balance,
-                description, reference, channel, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-        """, (
-            txn['transaction_id'],
-            txn['account_id'],
-            txn['transaction_date'],
-            txn['value_date'],
-            txn['type'],
-            txn['category'],
-            txn['amount'],
-            'USD',
-            txn['running_balance'],
-            txn['description'],
-            txn['reference'],
-            txn['channel'],
-            'USR-OFFICER-001'
-        ))
+    cursor.executemany(INSERT_TRANSACTION_SQL, transaction_rows)
 
     # Update account balance to final running balance
     cursor.execute("""
-        UPDATE accounts SET balance = ? WHERE account_id = ?;
-    """, (running_balance, account_info['account_id']))
+        UPDATE accounts SET balance = ?, updated_at = datetime('now') WHERE account_id = ?;
+    """, (balance, account_info['account_id']))
 
-    print(f"  ✓ Created {account_info['account_number']} with {len(transactions)} transactions (Balance: ${running_balance:.2f})")
+    print(f"  ✓ Created {account_info['account_number']} with {len(transaction_rows)} transactions (Balance: ${balance:.2f})")
 
 
-def generate_transactions(account_id, account_number, start_date, end_date, target_balance,
-                         pattern, interest_rate, monthly_fee, txn_fee):
-    """Generate realistic transactions based on account pattern"""
+INSERT_TRANSACTION_SQL = """
+    INSERT INTO transactions (
+        transaction_id, account_id, transaction_date, value_date,
+        type, category, amount, currency, running_balance,
+        description, reference, channel, created_by
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, 'USD', ?, ?, ?, ?, 'USR-OFFICER-001');
+"""
 
-    transactions = []
-    txn_counter = 1
-    current_date = start_date
 
-    # Helper function to calculate running balance from transactions
-    def calc_balance(txns):
-        bal = 0.00
-        for t in txns:
-            if t['type'] == 'Credit':
-                bal += t['amount']
-            else:
-                bal -= t['amount']
-        return round(bal, 2)
-
-    # Transaction patterns
-    if pattern == 'salary_worker':
-        # Monthly salary deposits, weekly/bi-weekly spending
-        while current_date <= end_date:
-            # Monthly salary (1st of month)
-            if current_date.day == 1 or (current_date == start_date):
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(2000, 2500), 2),
-                    'description': 'Salary deposit',
-                    'reference': f'SAL-{current_date.strftime("%Y%m")}',
-                    'channel': 'Batch'
-                })
-                txn_counter += 1
-
-            # Random spending 2-4 times per month
-            if random.random() < 0.15:  # ~15% chance per day
-                amount = round(random.uniform(50, 300), 2)
-                total_debit = amount + (txn_fee if txn_fee > 0 else 0)
-
-                # Only add if we have sufficient balance
-                if calc_balance(transactions) >= total_debit:
-                    transactions.append({
-                        'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                        'account_id': account_id,
-                        'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'value_date': current_date.strftime('%Y-%m-%d'),
-                        'type': 'Debit',
-                        'category': 'Withdrawal',
-                        'amount': amount,
-                        'description': random.choice(['ATM withdrawal', 'POS purchase', 'Online payment']),
-                        'reference': f'WD-{txn_counter:06d}',
-                        'channel': 'API'
-                    })
-                    txn_counter += 1
-
-                    # Transaction fee if applicable
-                    if txn_fee > 0:
-                        transactions.append({
-                            'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                            'account_id': account_id,
-                            'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                            'value_date': current_date.strftime('%Y-%m-%d'),
-                            'type': 'Debit',
-                            'category': 'Fee',
-                            'amount': txn_fee,
-                            'description': 'Transaction fee',
-                            'reference': f'FEE-{txn_counter:06d}',
-                            'channel': 'Batch'
-                        })
-                        txn_counter += 1
-
-            current_date += timedelta(days=1)
-
-    elif pattern == 'savings':
-        # Quarterly deposits, very rare withdrawals
-        while current_date <= end_date:
-            # Quarterly deposits
-            if current_date.month in [1, 4, 7, 10] and current_date.day == 15:
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(1000, 1500), 2),
-                    'description': 'Savings deposit',
-                    'reference': f'SAV-{current_date.strftime("%Y%m")}',
-                    'channel': 'UI'
-                })
-                txn_counter += 1
-
-            current_date += timedelta(days=7)
-
-    elif pattern == 'professional':
-        # Higher salary, moderate spending
-        while current_date <= end_date:
-            if current_date.day == 1 or (current_date == start_date):
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(4000, 5000), 2),
-                    'description': 'Salary deposit',
-                    'reference': f'SAL-{current_date.strftime("%Y%m")}',
-                    'channel': 'Batch'
-                })
-                txn_counter += 1
-
-            if random.random() < 0.1:
-                amount = round(random.uniform(100, 500), 2)
-                if calc_balance(transactions) >= amount:
-                    transactions.append({
-                        'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                        'account_id': account_id,
-                        'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'value_date': current_date.strftime('%Y-%m-%d'),
-                        'type': 'Debit',
-                        'category': 'Withdrawal',
-                        'amount': amount,
-                        'description': random.choice(['ATM withdrawal', 'Online transfer']),
-                        'reference': f'WD-{txn_counter:06d}',
-                        'channel': 'API'
-                    })
-                    txn_counter += 1
-
-            current_date += timedelta(days=1)
-
-    elif pattern == 'student':
-        # Small irregular deposits, frequent small purchases
-        while current_date <= end_date:
-            if random.random() < 0.1:  # Occasional deposit
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(100, 300), 2),
-                    'description': random.choice(['Part-time job', 'Allowance', 'Gift']),
-                    'reference': f'DEP-{txn_counter:06d}',
-                    'channel': 'UI'
-                })
-                txn_counter += 1
-
-            if random.random() < 0.2:  # Frequent small purchases
-                amount = round(random.uniform(5, 50), 2)
-                if calc_balance(transactions) >= amount:
-                    transactions.append({
-                        'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                        'account_id': account_id,
-                        'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'value_date': current_date.strftime('%Y-%m-%d'),
-                        'type': 'Debit',
-                        'category': 'Withdrawal',
-                        'amount': amount,
-                        'description': random.choice(['Coffee shop', 'Grocery', 'Online purchase']),
-                        'reference': f'WD-{txn_counter:06d}',
-                        'channel': 'API'
-                    })
-                    txn_counter += 1
-
-            current_date += timedelta(days=1)
-
-    elif pattern == 'business':
-        # Large irregular deposits and withdrawals
-        while current_date <= end_date:
-            if random.random() < 0.15:
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(2000, 8000), 2),
-                    'description': 'Business revenue',
-                    'reference': f'REV-{current_date.strftime("%Y%m%d")}',
-                    'channel': 'API'
-                })
-                txn_counter += 1
-
-            if random.random() < 0.12:
-                amount = round(random.uniform(1000, 5000), 2)
-                # Only add withdrawal if we have sufficient balance
-                if calc_balance(transactions) >= amount:
-                    transactions.append({
-                        'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                        'account_id': account_id,
-                        'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'value_date': current_date.strftime('%Y-%m-%d'),
-                        'type': 'Debit',
-                        'category': 'Withdrawal',
-                        'amount': amount,
-                        'description': random.choice(['Supplier payment', 'Payroll', 'Rent']),
-                        'reference': f'EXP-{current_date.strftime("%Y%m%d")}',
-                        'channel': 'API'
-                    })
-                    txn_counter += 1
-
-            current_date += timedelta(days=1)
-
-    elif pattern == 'low_balance':
-        # Minimal activity
-        while current_date <= end_date:
-            if random.random() < 0.05:
-                transactions.append({
-                    'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-                    'account_id': account_id,
-                    'transaction_date': current_date.strftime('%Y-%m-%d %H:%M:%S'),
-                    'value_date': current_date.strftime('%Y-%m-%d'),
-                    'type': 'Credit',
-                    'category': 'Deposit',
-                    'amount': round(random.uniform(20, 100), 2),
-                    'description': 'Cash deposit',
-                    'reference': f'DEP-{txn_counter:06d}',
-                    'channel': 'UI'
-                })
-                txn_counter += 1
-
-            current_date += timedelta(days=3)
-
-    # Sort transactions chronologically
-    transactions.sort(key=lambda x: x['transaction_date'])
-
-    # Add monthly interest accrual (last day of each month)
-    if interest_rate > 0:
-        transactions = add_monthly_interest(transactions, account_id, account_number,
-                                           start_date, end_date, interest_rate, txn_counter)
-
-    # Adjust to reach target balance
-    transactions = adjust_to_target_balance(transactions, account_id, account_number,
-                                            target_balance, end_date, len(transactions) + 1)
-
-    return transactions
-
-
-def add_monthly_interest(transactions, account_id, account_number, start_date, end_date,
-                        interest_rate, txn_counter):
-    """Add monthly interest accrual transactions"""
-
-    current_month = start_date.replace(day=1)
-
-    while current_month <= end_date:
-        # Last day of month
-        next_month = current_month.replace(day=28) + timedelta(days=4)
-        last_day = (next_month.replace(day=1) - timedelta(days=1))
-
-        if last_day <= end_date and last_day >= start_date:
-            # Calculate balance at end of month
-            month_balance = 0.00
-            for txn in transactions:
-                txn_date = datetime.strptime(txn['transaction_date'], '%Y-%m-%d %H:%M:%S')
-                if txn_date <= last_day:
-                    if txn['type'] == 'Credit':
-                        month_balance += txn['amount']
-                    else:
-                        month_balance -= txn['amount']
-
-            # Calculate monthly interest (simple interest)
-            if month_balance > 0:
-                daily_rate = interest_rate / 365
-                days_in_month = (last_day - current_month).days + 1
-                interest = round(month_balance * daily_rate * days_in_month, 2)
-
-                if interest > 0:
-                    transactions.append({
-                        'transaction_id': f'TXN-{account_number}-INT-{current_month.strftime("%Y%m")}',
-                        'account_id': account_id,
-                        'transaction_date': last_day.strftime('%Y-%m-%d 23:59:59'),
-                        'value_date': last_day.strftime('%Y-%m-%d'),
-                        'type': 'Credit',
-                        'category': 'Interest',
-                        'amount': interest,
-                        'description': f'Interest for {current_month.strftime("%B %Y")}',
-                        'reference': f'INT-{current_month.strftime("%Y%m")}',
-                        'channel': 'Batch'
-                    })
-
-        current_month = current_month.replace(day=1) + timedelta(days=32)
-        current_month = current_month.replace(day=1)
-
-    transactions.sort(key=lambda x: x['transaction_date'])
-    return transactions
-
-
-def adjust_to_target_balance(transactions, account_id, account_number, target_balance,
-                             end_date, txn_counter):
-    """Add final adjustment transaction to reach exact target balance"""
-
-    # Calculate current balance from all transactions
-    current_balance = 0.00
-    for txn in transactions:
-        if txn['type'] == 'Credit':
-            current_balance += txn['amount']
+# ============================================================================
+# TRANSACTION SIMULATOR
+# ============================================================================
+#
+# Each pattern is a list of event streams. A stream fires on a grid of days
+# counted from the opening date (every `step` days), optionally only in some
+# months or on one day of the month, on the opening day, and/or with a daily
+# probability. Arrivals and amounts are drawn for a whole batch of accounts
+# and days at once; within a day, streams post in the order listed.
+#
+# Balances never go below zero: a debit (with its transaction fee) is dropped
+# where it would overdraw the account, exactly as if debits were checked one
+# by one against the running balance. The running balance of a batch is one
+# cumulative sum; each pass drops the first overdrawing debit of every account
+# that still has one and updates only those accounts, so the cost is linear
+# in the length of the history rather than quadratic.
+#
+# Month-end interest and a final adjustment to the target balance are added
+# after the random activity, as before.
+
+TRANSACTION_PATTERNS = {
+    # Regular salary deposits, modest spending
+    'salary_worker': [
+        {'type': 'Credit', 'category': 'Deposit', 'day_of_month': 1, 'on_opening': True,
+         'amount': (2000, 2500), 'descriptions': ['Salary deposit'], 'reference': 'SAL-{month}',
+         'channel': 'Batch'},
+        {'type': 'Debit', 'category': 'Withdrawal', 'probability': 0.15, 'amount': (50, 300),
+         'descriptions': ['ATM withdrawal', 'POS purchase', 'Online payment'], 'reference': 'WD-{seq:06d}',
+         'channel': 'API', 'transaction_fee': True},
+    ],
+    # Mostly deposits, rare withdrawals
+    'savings': [
+        {'type': 'Credit', 'category': 'Deposit', 'step': 7, 'months': (1, 4, 7, 10), 'day_of_month': 15,
+         'amount': (1000, 1500), 'descriptions': ['Savings deposit'], 'reference': 'SAV-{month}',
+         'channel': 'UI'},
+    ],
+    # Higher salary, moderate spending
+    'professional': [
+        {'type': 'Credit', 'category': 'Deposit', 'day_of_month': 1, 'on_opening': True,
+         'amount': (4000, 5000), 'descriptions': ['Salary deposit'], 'reference': 'SAL-{month}',
+         'channel': 'Batch'},
+        {'type': 'Debit', 'category': 'Withdrawal', 'probability': 0.1, 'amount': (100, 500),
+         'descriptions': ['ATM withdrawal', 'Online transfer'], 'reference': 'WD-{seq:06d}',
+         'channel': 'API'},
+    ],
+    # Small deposits, frequent small purchases
+    'student': [
+        {'type': 'Credit', 'category': 'Deposit', 'probability': 0.1, 'amount': (100, 300),
+         'descriptions': ['Part-time job', 'Allowance', 'Gift'], 'reference': 'DEP-{seq:06d}',
+         'channel': 'UI'},
+        {'type': 'Debit', 'category': 'Withdrawal', 'probability': 0.2, 'amount': (5, 50),
+         'descriptions': ['Coffee shop', 'Grocery', 'Online purchase'], 'reference': 'WD-{seq:06d}',
+         'channel': 'API'},
+    ],
+    # Large deposits and withdrawals
+    'business': [
+        {'type': 'Credit', 'category': 'Deposit', 'probability': 0.15, 'amount': (2000, 8000),
+         'descriptions': ['Business revenue'], 'reference': 'REV-{date}', 'channel': 'API'},
+        {'type': 'Debit', 'category': 'Withdrawal', 'probability': 0.12, 'amount': (1000, 5000),
+         'descriptions': ['Supplier payment', 'Payroll', 'Rent'], 'reference': 'EXP-{date}',
+         'channel': 'API'},
+    ],
+    # Minimal activity
+    'low_balance': [
+        {'type': 'Credit', 'category': 'Deposit', 'step': 3, 'probability': 0.05, 'amount': (20, 100),
+         'descriptions': ['Cash deposit'], 'reference': 'DEP-{seq:06d}', 'channel': 'UI'},
+    ],
+}
+
+# Accounts simulated together; bounds the (accounts × days × streams) arrays
+SIMULATION_BATCH = 1000
+
+_FEE_STREAM = {'type': 'Debit', 'category': 'Fee', 'descriptions': ['Transaction fee'],
+               'reference': 'FEE-{seq:06d}', 'channel': 'Batch'}
+_INTEREST_STREAM = {'type': 'Credit', 'category': 'Interest', 'channel': 'Batch'}
+_ADJUSTMENT_STREAM = {'type': None, 'category': None, 'descriptions': ['Balance adjustment'],
+                      'reference': 'ADJ-{account_number}', 'channel': 'UI'}
+
+
+def simulate_transactions(accounts: list, as_of: date, rng) -> dict:
+    """
+    Simulate transaction histories from each account's opening date to as_of.
+
+    Args:
+        accounts: Dicts with account_id, account_number, opening_date
+                  (YYYY-MM-DD), target_balance, transaction_pattern,
+                  interest_rate and transaction_fee
+        as_of: Last day of history
+        rng: numpy Generator; the same generator state and accounts give the
+             same histories
+
+    Returns:
+        {account_id: (transaction_rows, balance)} where transaction_rows are
+        INSERT_TRANSACTION_SQL parameter tuples in ledger order and balance is
+        the final running balance (the target balance)
+
+    Raises:
+        ValueError: If an account has an unknown transaction_pattern
+    """
+    histories = {}
+    for pattern in sorted({account['transaction_pattern'] for account in accounts}):
+        if pattern not in TRANSACTION_PATTERNS:
+            raise ValueError(f"Unknown transaction pattern: {pattern} "
+                             f"(expected one of {', '.join(TRANSACTION_PATTERNS)})")
+        group = [account for account in accounts if account['transaction_pattern'] == pattern]
+        for start in range(0, len(group), SIMULATION_BATCH):
+            histories.update(_simulate_batch(group[start:start + SIMULATION_BATCH],
+                                             TRANSACTION_PATTERNS[pattern], as_of, rng))
+    return histories
+
+
+def _to_cents(amounts) -> np.ndarray:
+    """Round dollar amounts to an int64 array of cents."""
+    return np.round(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _simulate_batch(accounts: list, pattern: list, as_of: date, rng) -> dict:
+    """Simulate one batch of accounts that share a pattern (see simulate_transactions)."""
+    n = len(accounts)
+    opening = np.array([account['opening_date'] for account in accounts], dtype='datetime64[D]')
+    days = np.arange(opening.min(), np.datetime64(as_of, 'D') + 1)
+    if len(days) == 0:
+        return {account['account_id']: ([], 0.0) for account in accounts}
+
+    offsets = (days[None, :] - opening[:, None]).astype(np.int64)
+    open_mask = offsets >= 0
+    months = days.astype('datetime64[M]')
+    month_of_year = months.astype(np.int64) % 12 + 1
+    day_of_month = (days - months).astype(np.int64) + 1
+    fees = _to_cents([account['transaction_fee'] or 0 for account in accounts])
+
+    # Slots per day: the pattern's streams (a debit with a transaction fee is
+    # followed by its fee slot), then interest, then the balance adjustment.
+    # Amounts are signed cents: credits positive, debits negative.
+    streams = []
+    drop_slots = {}
+    for stream in pattern:
+        streams.append(stream)
+        debit_slot = len(streams) - 1
+        drop_slots[debit_slot] = [debit_slot]
+        if stream.get('transaction_fee'):
+            streams.append(_FEE_STREAM)
+            drop_slots[debit_slot].append(len(streams) - 1)
+            drop_slots[len(streams) - 1] = drop_slots[debit_slot]
+    interest_slot = len(streams)
+    adjustment_slot = interest_slot + 1
+    streams += [_INTEREST_STREAM, _ADJUSTMENT_STREAM]
+
+    amounts = np.zeros((n, len(days), len(streams)), dtype=np.int64)
+    flat = amounts.reshape(n, -1)  # a view: (account, day × slot) in ledger order
+
+    for slot, stream in enumerate(streams[:interest_slot]):
+        if stream is _FEE_STREAM:
+            amounts[:, :, slot] = np.where(amounts[:, :, slot - 1] != 0, -fees[:, None], 0)
+            continue
+        mask = open_mask & (offsets % stream.get('step', 1) == 0)
+        if 'months' in stream:
+            mask &= np.isin(month_of_year, stream['months'])[None, :]
+        if 'day_of_month' in stream:
+            mask &= (day_of_month == stream['day_of_month'])[None, :]
+        if stream.get('on_opening'):
+            mask |= offsets == 0
+        if 'probability' in stream:
+            mask &= rng.random(mask.shape) < stream['probability']
+        low, high = stream['amount']
+        sign = 1 if stream['type'] == 'Credit' else -1
+        amounts[:, :, slot][mask] = sign * _to_cents(rng.uniform(low, high, int(mask.sum())))
+
+    # Drop the first overdrawing debit (and its fee) of each account still
+    # overdrawn, and recompute only those accounts, until none is
+    balances = np.cumsum(flat, axis=1)
+    while True:
+        rows = np.flatnonzero((balances < 0).any(axis=1))
+        if len(rows) == 0:
+            break
+        day_index, slot = np.divmod((balances[rows] < 0).argmax(axis=1), len(streams))
+        for overdrawing_slot in np.unique(slot):
+            selected = slot == overdrawing_slot
+            for dropped_slot in drop_slots[overdrawing_slot]:
+                amounts[rows[selected], day_index[selected], dropped_slot] = 0
+        balances[rows] = np.cumsum(flat[rows], axis=1)
+
+    # Month-end interest: simple interest on the month-end balance, which
+    # includes the interest of earlier months
+    rates = np.array([account['interest_rate'] or 0 for account in accounts], dtype=np.float64)
+    if rates.any():
+        day_balances = balances.reshape(n, len(days), len(streams))[:, :, -1]
+        interest_so_far = np.zeros(n, dtype=np.int64)
+        for day_index in np.flatnonzero((days + 1).astype('datetime64[M]') != months):
+            month_balance = np.maximum(day_balances[:, day_index] + interest_so_far, 0)
+            interest = np.floor(month_balance * rates * day_of_month[day_index] / 365 + 0.5).astype(np.int64)
+            interest[~open_mask[:, day_index]] = 0
+            amounts[:, day_index, interest_slot] = interest
+            interest_so_far += interest
+
+    # Adjust to the exact target balance as the last event of as_of, so a
+    # debit adjustment cannot overdraw the account on an earlier day
+    targets = _to_cents([account['target_balance'] for account in accounts])
+    amounts[:, -1, adjustment_slot] = targets - flat.sum(axis=1)
+
+    return _history_rows(accounts, streams, amounts, days, rng)
+
+
+def _history_rows(accounts: list, streams: list, amounts: np.ndarray, days: np.ndarray, rng) -> dict:
+    """Turn a simulated (account, day, slot) amount array into transaction rows per account."""
+    n, _, slot_count = amounts.shape
+    balances = np.cumsum(amounts.reshape(n, -1), axis=1)
+    account_index, day_index, slot = np.nonzero(amounts)
+    signed = amounts[account_index, day_index, slot]
+    running = balances[account_index, day_index * slot_count + slot]
+
+    # Per-account sequence numbers, 1-based in ledger order
+    sequence = np.arange(len(account_index)) - np.searchsorted(account_index, account_index) + 1
+
+    # Descriptions are drawn per stream, in ledger order
+    description_index = np.zeros(len(account_index), dtype=np.int64)
+    for stream_slot, stream in enumerate(streams):
+        if len(stream.get('descriptions', ())) > 1:
+            in_slot = slot == stream_slot
+            description_index[in_slot] = rng.integers(len(stream['descriptions']), size=int(in_slot.sum()))
+
+    value_dates = np.datetime_as_string(days)
+    interest_slot = len(streams) - 2
+
+    histories = {account['account_id']: ([], 0.0) for account in accounts}
+    for i, d, s, amount, balance, seq, description in zip(
+            account_index.tolist(), day_index.tolist(), slot.tolist(), signed.tolist(),
+            running.tolist(), sequence.tolist(), description_index.tolist()):
+        account = accounts[i]
+        stream = streams[s]
+        value_date = str(value_dates[d])
+        month = value_date[:7].replace('-', '')
+        account_number = account['account_number']
+
+        if s == interest_slot:
+            transaction_id = f"TXN-{account_number}-INT-{month}"
+            description = f"Interest for {datetime.strptime(month, '%Y%m').strftime('%B %Y')}"
+            reference = f"INT-{month}"
         else:
-            current_balance -= txn['amount']
-
-    current_balance = round(current_balance, 2)
-    difference = round(target_balance - current_balance, 2)
-
-    if abs(difference) >= 0.01:  # Only adjust if difference is significant
-        # Add final adjustment transaction
-        adjustment_date = end_date - timedelta(days=random.randint(0, 5))
-
-        transactions.append({
-            'transaction_id': f'TXN-{account_number}-{txn_counter:04d}',
-            'account_id': account_id,
-            'transaction_date': adjustment_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'value_date': adjustment_date.strftime('%Y-%m-%d'),
-            'type': 'Credit' if difference > 0 else 'Debit',
-            'category': 'Deposit' if difference > 0 else 'Withdrawal',
-            'amount': abs(difference),
-            'description': 'Balance adjustment',
-            'reference': f'ADJ-{account_number}',
-            'channel': 'UI'
+            transaction_id = f"TXN-{account_number}-{seq:04d}"
+            description = stream['descriptions'][description]
+            reference = stream['reference'].format(seq=seq, month=month, date=value_date.replace('-', ''),
+                                                   account_number=account_number)
+
+        credit = amount > 0
+        category = stream['category'] or ('Deposit' if credit else 'Withdrawal')
+        time_of_day = '00:00:00' if s < interest_slot else '23:59:59'
+
+        histories[account['account_id']][0].append((
+            transaction_id,
+            account['account_id'],
+            f"{value_date} {time_of_day}",
+            value_date,
+            'Credit' if credit else 'Debit',
+            category,
+            abs(amount) / 100,
+            balance / 100,
+            description,
+            reference,
+            stream['channel'],
+        ))
+
+    for account in accounts:
+        rows = histories[account['account_id']][0]
+        histories[account['account_id']] = (rows, rows[-1][7] if rows else 0.0)
+    return histories
+
+
+# ============================================================================
+# BULK BOOK
+# ============================================================================
+#
+# A large synthetic book is generated in fixed blocks of BOOK_BLOCK accounts.
+# Every block draws from its own generator seeded with (seed, block number),
+# so the book depends only on --seed, --as-of and --accounts, never on the
+# number of workers. Workers simulate blocks in parallel and stage each one
+# as an .npz file; the loader ingests staged blocks in block order with
+# executemany, committing every LOAD_COMMIT_ROWS transactions, while the
+# secondary indexes on transactions are dropped. They are rebuilt once at
+# the end, which is much cheaper than maintaining them row by row.
+
+BOOK_BLOCK = SIMULATION_BATCH
+BOOK_HISTORY_DAYS = 730
+LOAD_COMMIT_ROWS = 500_000
+
+INSERT_ACCOUNT_SQL = """
+    INSERT INTO accounts (
+        account_id, account_number, customer_id, product_id,
+        currency, status, balance, interest_accrued, opening_date, created_by
+    ) VALUES (?, ?, ?, ?, 'USD', 'Active', ?, 0.00, ?, 'USR-OFFICER-001');
+"""
+
+_ACCOUNT_COLUMNS = ('account_id', 'account_number', 'customer_id', 'product_id', 'balance', 'opening_date')
+_TRANSACTION_COLUMNS = ('transaction_id', 'account_id', 'transaction_date', 'value_date', 'type', 'category',
+                        'amount', 'running_balance', 'description', 'reference', 'channel')
+
+
+def _book_block_accounts(block: int, num_accounts: int, as_of: date, product_terms: dict, rng) -> list:
+    """Synthetic accounts of one block, each modelled on a random scenario account."""
+    first = block * BOOK_BLOCK
+    count = min(BOOK_BLOCK, num_accounts - first)
+    scenarios = rng.integers(len(SCENARIO_ACCOUNTS), size=count)
+    opening_offsets = rng.integers(30, BOOK_HISTORY_DAYS, size=count)
+    balance_factors = rng.uniform(0.5, 1.5, size=count)
+
+    accounts = []
+    for i in range(count):
+        scenario = SCENARIO_ACCOUNTS[scenarios[i]]
+        interest_rate, transaction_fee = product_terms[scenario['product_id']]
+        accounts.append({
+            'account_id': f"ACC-SIM-{first + i:09d}",
+            'account_number': f"2{first + i:09d}",
+            'customer_id': scenario['customer_id'],
+            'product_id': scenario['product_id'],
+            'opening_date': (np.datetime64(as_of, 'D') - int(opening_offsets[i])).item().isoformat(),
+            'target_balance': round(scenario['target_balance'] * float(balance_factors[i]), 2),
+            'transaction_pattern': scenario['transaction_pattern'],
+            'interest_rate': interest_rate,
+            'transaction_fee': transaction_fee,
         })
+    return accounts
+
+
+def _stage_book_block(task: tuple) -> tuple:
+    """Worker: simulate one block and stage it as an .npz file. Returns (path, accounts, transactions)."""
+    seed, block, num_accounts, as_of, product_terms, stage_dir = task
+    rng = np.random.default_rng([seed, block])
+    accounts = _book_block_accounts(block, num_accounts, as_of, product_terms, rng)
+    histories = simulate_transactions(accounts, as_of, rng)
+
+    account_rows = [(account['account_id'], account['account_number'], account['customer_id'],
+                     account['product_id'], histories[account['account_id']][1], account['opening_date'])
+                    for account in accounts]
+    transaction_rows = [row for account in accounts for row in histories[account['account_id']][0]]
+
+    columns = {f"account_{name}": np.array(values) for name, values in zip(_ACCOUNT_COLUMNS, zip(*account_rows))}
+    columns.update({f"transaction_{name}": np.array(values)
+                    for name, values in zip(_TRANSACTION_COLUMNS, zip(*transaction_rows))})
+    stage_path = Path(stage_dir) / f"block_{block:06d}.npz"
+    np.savez(stage_path, **columns)
+    return stage_path, len(account_rows), len(transaction_rows)
+
+
+def _load_staged_rows(plan, prefix: str, names: tuple) -> list:
+    """Read one table's columns from a staged block back into parameter tuples."""
+    if f"{prefix}_{names[0]}" not in plan:
+        return []
+    return list(zip(*(plan[f"{prefix}_{name}"].tolist() for name in names)))
+
+
+def generate_book(num_accounts: int, workers: int, seed: int = DEFAULT_SEED, as_of: date = None,
+                  stage_dir: Path = None, db_path: Path = DB_FILE) -> dict:
+    """
+    Generate a synthetic book of num_accounts accounts in parallel and bulk
+    load it into accounts.db, replacing existing accounts and transactions.
+
+    Args:
+        num_accounts: Accounts to generate
+        workers: Worker processes simulating blocks (1 simulates in-process)
+        seed: Random seed; the book is the same for any number of workers
+        as_of: Last day of history (default: today)
+        stage_dir: Directory for staged blocks (default: a temporary directory)
+        db_path: Database to load (default: accounts.db)
+
+    Returns:
+        Dict with accounts, transactions and elapsed seconds
+    """
+    print("=" * 80)
+    print(f"Generating Synthetic Book - {num_accounts:,} accounts ({workers} workers)")
+    print("=" * 80)
+
+    if not db_path.exists():
+        print(f"ERROR: Database not found at {db_path}")
+        print("Please run 'python scripts/init_db.py' first")
+        sys.exit(1)
+
+    as_of = as_of or date.today()
+    start = time.perf_counter()
+    conn = connect(db_path)
+
+    with tempfile.TemporaryDirectory(dir=stage_dir) as staging:
+        try:
+            # Dropped first so clearing a previous book does not maintain them either
+            print("\nDropping secondary indexes on transactions...")
+            index_sql = drop_indexes(conn, 'transactions')
+            conn.commit()
+            print(f"  ✓ Dropped {len(index_sql)} indexes")
+
+            clear_existing_data(conn)
+            product_terms = {product_id: (interest_rate, transaction_fee) for product_id, interest_rate, transaction_fee
+                             in conn.execute("SELECT product_id, interest_rate, transaction_fee FROM products")}
+
+            tasks = [(seed, block, num_accounts, as_of, product_terms, staging)
+                     for block in range(-(-num_accounts // BOOK_BLOCK))]
+            pool = multiprocessing.Pool(workers) if workers > 1 else None
+            try:
+                staged = pool.imap(_stage_book_block, tasks) if pool else map(_stage_book_block, tasks)
+                totals = _load_staged_blocks(conn, staged)
+            finally:
+                if pool:
+                    pool.close()
+                    pool.join()
+
+            print("\nRebuilding secondary indexes on transactions...")
+            restore_indexes(conn, index_sql)
+            conn.commit()
+            print(f"  ✓ Rebuilt {len(index_sql)} indexes")
+
+            print("\nRebuilding account statistics...")
+            refresh_account_stats(conn, rebuild=True)
+            conn.commit()
+            print("  ✓ Account statistics rebuilt")
+        except Exception as e:
+            print(f"\nERROR: {e}")
+            conn.rollback()
+            conn.close()
+            sys.exit(1)
+
+    conn.close()
+    totals["seconds"] = round(time.perf_counter() - start, 1)
+
+    print("\n" + "=" * 80)
+    print(f"Loaded {totals['accounts']:,} accounts and {totals['transactions']:,} transactions "
+          f"in {totals['seconds']}s")
+    print("=" * 80)
+    return totals
+
+
+def _load_staged_blocks(conn, staged) -> dict:
+    """Loader: ingest staged blocks in order, committing every LOAD_COMMIT_ROWS transactions."""
+    print("\nLoading staged blocks...")
+    totals = {"accounts": 0, "transactions": 0}
+    pending_rows = 0
+
+    for stage_path, account_count, transaction_count in staged:
+        with np.load(stage_path, allow_pickle=False) as plan:
+            conn.executemany(INSERT_ACCOUNT_SQL, _load_staged_rows(plan, 'account', _ACCOUNT_COLUMNS))
+            conn.executemany(INSERT_TRANSACTION_SQL, _load_staged_rows(plan, 'transaction', _TRANSACTION_COLUMNS))
+        Path(stage_path).unlink()
+
+        totals["accounts"] += account_count
+        totals["transactions"] += transaction_count
+        pending_rows += transaction_count
+        if pending_rows >= LOAD_COMMIT_ROWS:
+            conn.commit()
+            pending_rows = 0
+            print(f"  ✓ {totals['accounts']:,} accounts, {totals['transactions']:,} transactions")
+
+    conn.commit()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate realistic account data')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f'Random seed; the same seed and --as-of give the same data (default: {DEFAULT_SEED})')
+    parser.add_argument('--as-of', dest='as_of', type=date.fromisoformat, default=None,
+                        metavar='YYYY-MM-DD', help='Last day of generated history (default: today)')
+
+    parser.add_argument('--accounts', type=int, default=None,
+                        help='Generate a synthetic book of N accounts instead of the scenario accounts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes for --accounts (default: CPU count)')
+    parser.add_argument('--stage-dir', dest='stage_dir', type=Path, default=None,
+                        help='Directory for staged blocks with --accounts (default: system temp directory)')
+
+    args = parser.parse_args()
 
-        transactions.sort(key=lambda x: x['transaction_date'])
+    if args.accounts is None:
+        generate_realistic_data(seed=args.seed, as_of=args.as_of)
+        return
 
-    return transactions
+    if args.accounts < 1 or args.workers < 1:
+        parser.error('--accounts and --workers must be at least 1')
+    generate_book(args.accounts, args.workers, seed=args.seed, as_of=args.as_of, stage_dir=args.stage_dir)
 
 
 if __name__ == "__main__":
-    generate_realistic_data()
+    main()
@@ -2,21 +2,31 @@
 """
 Database Initialization Script
 Creates the SQLite database and runs all migrations
+
+Usage:
+    python3 init_db.py [--template]
+
+With --template the database is restored from the cached post-migration
+template (see snapshots.py) instead of replaying every migration; the
+template is built on first use and whenever the migrations change.
 """
 
 import sqlite3
-import os
 import sys
+import argparse
 from pathlib import Path
 
+from db_connection import connect, remove_database
+from snapshots import restore_snapshot, schema_template
+
 # Get database directory
 DB_DIR = Path(__file__).parent.parent
 SCHEMA_DIR = DB_DIR / "schema" / "migrations"
 DB_FILE = DB_DIR / "accounts.db"
 
 
-def create_database():
-    """Create the database file and run migrations"""
+def create_database(use_template: bool = False):
+    """Create the database file and run migrations (or restore the post-migration template)"""
     print("=" * 80)
     print("Account Processing System - Database Initialization")
     print("=" * 80)
@@ -29,44 +39,47 @@ def create_database():
             sys.exit(0)
         else:
             print(f"Removing existing database: {DB_FILE}")
-            os.remove(DB_FILE)
+            remove_database(DB_FILE)
 
     print(f"\nCreating database: {DB_FILE}")
 
     # Create database connection
-    conn = sqlite3.connect(str(DB_FILE))
+    conn = connect(DB_FILE, foreign_keys=True)
     cursor = conn.cursor()
 
-    # Enable foreign keys
-    cursor.execute("PRAGMA foreign_keys = ON;")
-
-    # Get all migration files
-    migration_files = sorted(SCHEMA_DIR.glob("*.sql"))
-
-    if not migration_files:
-        print(f"ERROR: No migration files found in {SCHEMA_DIR}")
-        sys.exit(1)
-
-    print(f"\nFound {len(migration_files)} migration(s):")
-    for migration_file in migration_files:
-        print(f"  - {migration_file.name}")
-
-    # Run each migration
-    print("\nRunning migrations...")
-    for migration_file in migration_files:
-        print(f"\nExecuting: {migration_file.name}")
-        with open(migration_file, 'r') as f:
-            migration_sql = f.read()
-
-        try:
-            cursor.executescript(migration_sql)
-            conn.commit()
-            print(f"  ✓ Success")
-        except sqlite3.Error as e:
-            print(f"  ✗ Error: {e}")
-            conn.rollback()
+    if use_template:
+        template = schema_template()
+        print(f"\nRestoring post-migration template: {template}")
+        restore_snapshot(template, DB_FILE)
+        print(f"  ✓ Success")
+    else:
+        # Get all migration files
+        migration_files = sorted(SCHEMA_DIR.glob("*.sql"))
+
+        if not migration_files:
+            print(f"ERROR: No migration files found in {SCHEMA_DIR}")
             sys.exit(1)
 
+        print(f"\nFound {len(migration_files)} migration(s):")
+        for migration_file in migration_files:
+            print(f"  - {migration_file.name}")
+
+        # Run each migration
+        print("\nRunning migrations...")
+        for migration_file in migration_files:
+            print(f"\nExecuting: {migration_file.name}")
+            with open(migration_file, 'r') as f:
+                migration_sql = f.read()
+
+            try:
+                cursor.executescript(migration_sql)
+                conn.commit()
+                print(f"  ✓ Success")
+            except sqlite3.Error as e:
+                print(f"  ✗ Error: {e}")
+                conn.rollback()
+                sys.exit(1)
+
     # Verify tables were created
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
     tables = cursor.fetchall()
@@ -91,5 +104,14 @@ def create_database():
     print("=" * 80)
 
 
+def main():
+    parser = argparse.ArgumentParser(description='Initialize the database')
+    parser.add_argument('--template', action='store_true',
+                        help='Restore the cached post-migration template instead of running migrations')
+
+    args = parser.parse_args()
+    create_database(use_template=args.template)
+
+
 if __name__ == "__main__":
-    create_database()
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Vectorized Integer-Cents Interest Kernel
+
+Computes simple interest for whole arrays of accounts at once using exact
+integer arithmetic, instead of building Decimal objects one account at a time.
+
+Representation:
+- Balances are integer cents (int64)
+- Annual rates are integer millionths (0.015 -> 15000), see RATE_SCALE
+- Results are integer cents, rounded ROUND_HALF_UP exactly like
+  Decimal.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+Day fractions are passed as (days, year_days) pairs, so the same kernel serves
+the Actual/365 daily accrual (1/365) and the 30/360 monthly posting (30/360).
+Either element may also be an array aligned with the balances, as returned by
+day_count.day_fractions for mixed periods or conventions.
+
+Usage:
+    python3 interest_kernel.py [--verify N]
+
+Options:
+    --verify N         Check N random cases (plus exact half-cent ties) against
+                       calculate_daily_interest and calculate_monthly_interest_30_360,
+                       and against decimal_interest for every day count convention
+
+The same parity is checked under pytest by tests/test_interest_kernel.py.
+"""
+
+import sys
+import argparse
+import math
+import random
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+# Annual rates are carried as integer millionths (six decimal places)
+RATE_SCALE = 1_000_000
+
+# Day fractions used by the batch scripts
+ACTUAL_365_DAILY = (1, 365)
+THIRTY_360_MONTHLY = (30, 360)
+
+
+def to_cents(amounts):
+    """
+    Convert REAL money amounts to integer cents.
+
+    Args:
+        amounts: Sequence or array of float amounts
+
+    Returns:
+        (cents, exact) arrays. exact is False where the stored float is not a
+        whole number of cents (e.g. 1500.0000000000002); callers should fall
+        back to Decimal for those rows to keep results identical.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    cents = np.rint(amounts * 100).astype(np.int64)
+    exact = (cents / 100) == amounts
+    return cents, exact
+
+
+def to_rate_units(rates):
+    """
+    Convert REAL annual rates to integer millionths.
+
+    Args:
+        rates: Sequence or array of float annual rates (e.g. 0.015)
+
+    Returns:
+        (units, exact) arrays, exact being False for rates with more than
+        six decimal places.
+    """
+    rates = np.asarray(rates, dtype=np.float64)
+    units = np.rint(rates * RATE_SCALE).astype(np.int64)
+    exact = (units / RATE_SCALE) == rates
+    return units, exact
+
+
+def interest_cents(balance_cents, rate_units, day_fraction=ACTUAL_365_DAILY):
+    """
+    Calculate simple interest in integer cents for arrays of accounts.
+
+    Formula: (Balance × Annual Rate × days) / year_days, rounded ROUND_HALF_UP
+
+    Args:
+        balance_cents: Integer cents array (or scalar)
+        rate_units: Annual rates in millionths, array or scalar broadcastable
+                    against balance_cents (e.g. one rate for a product group)
+        day_fraction: (days, year_days) tuple of scalars or arrays
+
+    Returns:
+        int64 array of interest in cents. Zero where balance or rate <= 0.
+        If balance × rate × days could overflow int64 the products are
+        computed with Python integers instead (exact, but slower).
+    """
+    balance_cents = np.asarray(balance_cents, dtype=np.int64)
+    rate_units = np.asarray(rate_units, dtype=np.int64)
+
+    days, year_days = (np.asarray(part, dtype=np.int64) for part in day_fraction)
+    divisor = np.gcd(days, year_days)
+    days, year_days = days // divisor, year_days // divisor
+
+    # interest_cents = balance_cents * rate_units * days / (year_days * RATE_SCALE)
+    # Reduce the fraction first so the product stays within int64.
+    bound = (int(np.abs(balance_cents).max(initial=0)) * int(np.abs(rate_units).max(initial=0))
+             * int(np.abs(days).max(initial=0)))
+    if bound >= 2**63:
+        balance_cents, rate_units, days = (a.astype(object) for a in (balance_cents, rate_units, days))
+    numerator = balance_cents * rate_units * days
+    denominator = year_days * RATE_SCALE
+
+    quotient = numerator // denominator
+    remainder = numerator - quotient * denominator
+    rounded = quotient + (2 * remainder >= denominator)
+
+    return np.where((balance_cents > 0) & (rate_units > 0), rounded, 0).astype(np.int64)
+
+
+def group_interest_cents(balances, rates, day_fraction=ACTUAL_365_DAILY):
+    """
+    Calculate interest in cents for a whole product group of REAL balances.
+
+    Rows whose balance or rate cannot be represented exactly in integer cents
+    or millionths are computed with Decimal instead, so the result always
+    matches the per-account Decimal functions.
+
+    Args:
+        balances: Sequence of float balances
+        rates: Sequence of float annual rates, or a single rate for the group
+        day_fraction: (days, year_days) tuple of scalars or arrays aligned
+                      with balances
+
+    Returns:
+        int64 array of interest in cents, aligned with balances
+    """
+    balances = np.asarray(balances, dtype=np.float64)
+    rates = np.broadcast_to(np.asarray(rates, dtype=np.float64), balances.shape)
+
+    balance_cents, balance_exact = to_cents(balances)
+    rate_units, rate_exact = to_rate_units(rates)
+
+    result = interest_cents(balance_cents, rate_units, day_fraction)
+
+    days, year_days = (np.broadcast_to(np.asarray(part, dtype=np.int64), balances.shape) for part in day_fraction)
+    for i in np.flatnonzero(~(balance_exact & rate_exact)):
+        interest = decimal_interest(Decimal(str(float(balances[i]))), Decimal(str(float(rates[i]))),
+                                    (int(days[i]), int(year_days[i])))
+        result[i] = int(interest.scaleb(2))
+
+    return result
+
+
+def group_interest_from_cents(balance_cents, rates, day_fraction=ACTUAL_365_DAILY):
+    """
+    Calculate interest in cents for a product group whose balances are
+    already integer cents (the *_cents columns of migration 009).
+
+    Only rates with more than six decimal places fall back to Decimal.
+
+    Args:
+        balance_cents: Sequence of integer cents balances
+        rates: Sequence of float annual rates, or a single rate for the group
+        day_fraction: (days, year_days) tuple of scalars or arrays aligned
+                      with balance_cents
+
+    Returns:
+        int64 array of interest in cents, aligned with balance_cents
+    """
+    balance_cents = np.asarray(balance_cents, dtype=np.int64)
+    rates = np.broadcast_to(np.asarray(rates, dtype=np.float64), balance_cents.shape)
+
+    rate_units, rate_exact = to_rate_units(rates)
+    result = interest_cents(balance_cents, rate_units, day_fraction)
+
+    days, year_days = (np.broadcast_to(np.asarray(part, dtype=np.int64), balance_cents.shape)
+                       for part in day_fraction)
+    for i in np.flatnonzero(~rate_exact):
+        interest = decimal_interest(cents_to_decimal(balance_cents[i]), Decimal(str(float(rates[i]))),
+                                    (int(days[i]), int(year_days[i])))
+        result[i] = int(interest.scaleb(2))
+
+    return result
+
+
+def decimal_interest(balance: Decimal, annual_rate: Decimal, day_fraction=ACTUAL_365_DAILY) -> Decimal:
+    """
+    Calculate simple interest for one account with Decimal arithmetic.
+
+    Formula: (Balance × Annual Rate × days) / year_days, rounded ROUND_HALF_UP
+
+    Scalar reference for interest_cents, for row-at-a-time code paths.
+
+    Returns:
+        Interest rounded to 2 decimal places; 0 if balance or rate <= 0
+    """
+    if balance <= Decimal('0') or annual_rate <= Decimal('0'):
+        return Decimal('0')
+
+    days, year_days = (int(part) for part in day_fraction)
+    divisor = math.gcd(days, year_days) or 1
+    interest = (balance * annual_rate * Decimal(days // divisor)) / Decimal(year_days // divisor)
+    return interest.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def cents_to_decimal(cents) -> Decimal:
+    """Convert an integer cents value to a 2-decimal Decimal amount."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _tie_balance(rng, rate_units: int, day_fraction) -> int:
+    """Return a balance in cents whose interest is an exact half cent, or 0 if none exists."""
+    days, year_days = day_fraction
+    divisor = math.gcd(days, year_days)
+    denominator = (year_days // divisor) * RATE_SCALE
+    step = denominator // math.gcd(rate_units * (days // divisor), denominator)
+    if step % 2:
+        return 0
+    return (step // 2) * (2 * rng.randint(0, 50) + 1)
+
+
+def verify_against_decimal(cases: int, seed: int = 0) -> int:
+    """
+    Compare the kernel with the existing per-account Decimal functions.
+
+    Returns the number of mismatches found.
+    """
+    from batch_eod_processing import calculate_daily_interest
+    from batch_monthly_accruals import calculate_monthly_interest_30_360
+
+    rng = random.Random(seed)
+
+    balances = []
+    rates = []
+    for _ in range(cases):
+        rate = rng.randint(0, RATE_SCALE // 10)
+        balances.append(rng.randint(-10_000, 10**11))
+        rates.append(rate)
+        for day_fraction in (ACTUAL_365_DAILY, THIRTY_360_MONTHLY):
+            tie = _tie_balance(rng, rate, day_fraction) if rate else 0
+            if tie and tie < 10**13:
+                balances.append(tie)
+                rates.append(rate)
+
+    balance_cents = np.array(balances, dtype=np.int64)
+    rate_units = np.array(rates, dtype=np.int64)
+
+    daily = interest_cents(balance_cents, rate_units, ACTUAL_365_DAILY)
+    monthly = interest_cents(balance_cents, rate_units, THIRTY_360_MONTHLY)
+
+    mismatches = 0
+    for i, (cents, units) in enumerate(zip(balances, rates)):
+        balance = cents_to_decimal(cents)
+        rate = Decimal(units).scaleb(-6)
+
+        expected_daily = calculate_daily_interest(balance, rate)
+        expected_monthly = calculate_monthly_interest_30_360(balance, rate)
+
+        if cents_to_decimal(daily[i]) != expected_daily or cents_to_decimal(monthly[i]) != expected_monthly:
+            print(f"  ✗ balance={balance} rate={rate}: "
+                  f"daily {cents_to_decimal(daily[i])} vs {expected_daily}, "
+                  f"monthly {cents_to_decimal(monthly[i])} vs {expected_monthly}")
+            mismatches += 1
+
+    # Every day count convention, one random period per case, in one array call
+    from day_count import CONVENTIONS, day_fractions
+
+    starts = np.datetime64('2020-01-01') + np.array([rng.randint(0, 3650) for _ in balances], dtype='timedelta64[D]')
+    ends = starts + np.array([rng.randint(1, 400) for _ in balances], dtype='timedelta64[D]')
+    for convention in CONVENTIONS:
+        days, year_days = day_fractions(convention, starts, ends)
+        vectorized = interest_cents(balance_cents, rate_units, (days, year_days))
+        for i, (cents, units) in enumerate(zip(balances, rates)):
+            expected = decimal_interest(cents_to_decimal(cents), Decimal(units).scaleb(-6),
+                                        (days[i], year_days[i]))
+            if cents_to_decimal(vectorized[i]) != expected:
+                print(f"  ✗ {convention} balance={cents_to_decimal(cents)} rate={Decimal(units).scaleb(-6)} "
+                      f"fraction={days[i]}/{year_days[i]}: {cents_to_decimal(vectorized[i])} vs {expected}")
+                mismatches += 1
+
+    print(f"Checked {len(balances)} cases ({len(CONVENTIONS)} day count conventions): {mismatches} mismatches")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Integer-cents interest kernel')
+    parser.add_argument('--verify', type=int, default=100000, metavar='N',
+                        help='Number of random parity cases to check against the Decimal functions')
+
+    args = parser.parse_args()
+
+    sys.exit(1 if verify_against_decimal(args.verify) else 0)
+
+
+if __name__ == "__main__":
+    main()
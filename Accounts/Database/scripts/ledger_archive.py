@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Ledger Archive
+
+Moves closed years of transactions (by value_date), interest accruals (by
+accrual_date) and month-end interest postings (monthly_interest_accruals, by
+posting_date - the value_date of the interest transaction each references)
+out of accounts.db into one SQLite file per year,
+Database/archive/ledger_YYYY.db, so the hot ledger - and every index and
+scan the batch jobs run over it - stops growing with history.
+
+Archiving a year:
+
+1. Refreshes account_stats and month_end_balances, so the derived tables
+   have absorbed the rows before they leave.
+2. Copies the year's rows into the archive file and commits it.
+3. Verifies the copy: every moved row is in the archive with the same
+   account and amount, and the archive's row counts and cent sums equal
+   the totals recorded for it before plus the rows moved.
+4. Deletes the rows from accounts.db, adds them to archived_account_totals
+   (with each account's closing running balance) and records the archive's
+   new totals in ledger_archives, in one commit. Foreign keys are off
+   while rows move (the archive has no accounts table for them to point
+   at); the connection's setting is restored afterwards.
+
+A run interrupted between steps 2 and 4 leaves the rows in both files; the
+next run finds them already copied and finishes the move. Rows posted into
+an archived year afterwards stay in the hot ledger until the year is
+archived again, which merges them.
+
+accrual_compaction.py --archive-daily moves the daily interest accruals of
+compacted months into the same files with archive_accruals(), before their
+year is archived. Such a year is registered in ledger_archives with
+transactions_archived = 0: readers attach it like any other archive, but it
+stays open to postings until its transactions are archived.
+
+The batch jobs only open accounts.db: interest, fees and balance
+verification need no archived rows, and archived_account_totals carries the
+balances the archives hold. Running-balance repairs anchor on its closing
+balance when an account has no earlier hot transaction, and the EOD and
+monthly jobs refuse to post into archived years.
+
+For historical queries, attach_archives() attaches every archive read-only
+and creates the temporary views transactions_all, interest_accruals_all and
+monthly_interest_accruals_all over the hot and archived rows. SQLite
+attaches at most 10 databases to a connection, so at most 10 years can be
+queried together. The API's TransactionRepository (Accounts/Application)
+attaches the archives the same way and reads transaction history through
+transactions_all; it skips (and logs) archive files that are missing and
+refuses to serve history if more archives are registered than it can
+attach. Other SQL against transactions only sees the hot ledger.
+
+Usage:
+    python3 ledger_archive.py archive YEAR
+    python3 ledger_archive.py archive --before YEAR
+    python3 ledger_archive.py verify [YEAR]
+    python3 ledger_archive.py status
+"""
+
+import re
+import sys
+import argparse
+from pathlib import Path
+from datetime import date
+
+from db_connection import connect, ensure_ledger_archive, ensure_integer_ledger_columns
+from account_stats import refresh_account_stats
+from month_end_balances import refresh_month_end_balances
+
+DB_DIR = Path(__file__).parent.parent
+DB_PATH = DB_DIR / "accounts.db"
+ARCHIVE_DIR = DB_DIR / "archive"
+
+# Archived tables: (table, date column, primary key, cents column summed for verification)
+ARCHIVED_TABLES = (
+    ('transactions', 'value_date', 'transaction_id', 'amount_cents'),
+    ('interest_accruals', 'accrual_date', 'accrual_id', 'daily_interest_cents'),
+    ('monthly_interest_accruals', 'posting_date', 'monthly_accrual_id', 'monthly_interest_cents'),
+)
+
+
+def archive_path(year: int, archive_dir: Path = ARCHIVE_DIR) -> Path:
+    """Path of the archive file for year."""
+    return archive_dir / f"ledger_{year}.db"
+
+
+def _period(year: int) -> tuple:
+    """[first day, first day of the next year) as ISO strings; also covers timestamp values."""
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+
+def _stored_columns(conn, schema: str, table: str) -> list:
+    """Columns of schema.table that can be inserted into (generated columns excluded)."""
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_xinfo({table})") if row[6] == 0]
+
+
+def _create_archive(conn, path: Path):
+    """Create path with the current definitions of the archived tables and their indexes."""
+    definitions = conn.execute(f"""
+        SELECT sql FROM main.sqlite_master
+        WHERE tbl_name IN ({', '.join('?' * len(ARCHIVED_TABLES))}) AND sql IS NOT NULL
+        ORDER BY type DESC
+    """, [table for table, *_ in ARCHIVED_TABLES]).fetchall()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    archive = connect(path)
+    try:
+        # Rollback journal: a single file that can be attached read-only
+        archive.execute("PRAGMA journal_mode = DELETE")
+        for (sql,) in definitions:
+            archive.execute(re.sub(r"^CREATE (UNIQUE )?(TABLE|INDEX) (?!IF NOT EXISTS)",
+                                   r"CREATE \1\2 IF NOT EXISTS ", sql))
+        archive.commit()
+    finally:
+        archive.close()
+
+
+def _has_table(conn, schema: str, table: str) -> bool:
+    """Whether schema has table (archives written before migration 016 have no monthly_interest_accruals)."""
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+
+def _totals(conn, schema: str, year: int) -> dict:
+    """{table: (row count, cent sum)} of year's rows in schema."""
+    start, end = _period(year)
+    return {
+        table: tuple(conn.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM({cents_column}), 0) FROM {schema}.{table}
+            WHERE {date_column} >= ? AND {date_column} < ?
+        """, (start, end)).fetchone()) if _has_table(conn, schema, table) else (0, 0)
+        for table, date_column, _, cents_column in ARCHIVED_TABLES
+    }
+
+
+def _recorded_totals(conn, year: int) -> dict:
+    """{table: (row count, cent sum)} recorded in ledger_archives for year (zero if not archived yet)."""
+    row = conn.execute("""
+        SELECT transaction_count, transaction_amount_cents, accrual_count, accrual_interest_cents,
+               monthly_accrual_count, monthly_interest_cents
+        FROM ledger_archives WHERE archive_year = ?
+    """, (year,)).fetchone() or (0, 0, 0, 0, 0, 0)
+    return {'transactions': (row[0], row[1]), 'interest_accruals': (row[2], row[3]),
+            'monthly_interest_accruals': (row[4], row[5])}
+
+
+def _verify_copy(conn, year: int, hot_totals: dict, recorded: dict, period: tuple = None) -> list:
+    """
+    Check the copied rows against the hot rows and the archive's totals, for
+    the tables in hot_totals and the rows in period (default: the whole
+    year). Returns the problems found.
+    """
+    start, end = period or _period(year)
+    problems = []
+    for table, date_column, key_column, cents_column in ARCHIVED_TABLES:
+        if table not in hot_totals:
+            continue
+        copied = tuple(conn.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(h.{cents_column}), 0)
+            FROM main.{table} h
+            INNER JOIN archive.{table} a
+                ON a.{key_column} = h.{key_column}
+               AND a.account_id = h.account_id
+               AND a.{cents_column} = h.{cents_column}
+            WHERE h.{date_column} >= ? AND h.{date_column} < ?
+        """, (start, end)).fetchone())
+        if copied != hot_totals[table]:
+            problems.append(f"{table}: {hot_totals[table]} rows/cents to move, {copied} found in the archive")
+
+    archive_totals = _totals(conn, 'archive', year)
+    for table in hot_totals:
+        expected = tuple(r + h for r, h in zip(recorded[table], hot_totals[table]))
+        if archive_totals[table] != expected:
+            problems.append(f"{table}: archive holds {archive_totals[table]} rows/cents, expected {expected}")
+    return problems
+
+
+def archive_year(conn, year: int, archive_dir: Path = ARCHIVE_DIR, today: date = None) -> dict:
+    """
+    Move year's transactions, interest accruals and monthly interest postings from accounts.db to its archive file.
+
+    Args:
+        conn: Connection to accounts.db (without archives attached)
+        year: Year to archive; must be before the current year
+        archive_dir: Directory of the archive files
+        today: Reference date for the current year (default: today)
+
+    Returns:
+        Dict with year, archive path, and the transactions, accruals and
+        monthly_accruals moved as (row count, cent sum)
+
+    Raises:
+        ValueError: If the year is not closed yet, or the copy does not verify
+                    (nothing is deleted from accounts.db then)
+    """
+    today = today or date.today()
+    if year >= today.year:
+        raise ValueError(f"Year {year} is not closed yet (only years before {today.year} can be archived)")
+
+    ensure_ledger_archive(conn)
+    ensure_integer_ledger_columns(conn)
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        return _archive_year(conn, year, archive_dir)
+    finally:
+        # PRAGMA foreign_keys is a no-op inside a transaction
+        conn.rollback()
+        conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+
+def _archive_year(conn, year: int, archive_dir: Path) -> dict:
+    """archive_year with foreign keys off."""
+    refresh_account_stats(conn)
+    refresh_month_end_balances(conn)
+    conn.commit()
+
+    path = archive_path(year, archive_dir)
+    _create_archive(conn, path)
+    start, end = _period(year)
+
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        hot_totals = _totals(conn, 'main', year)
+        recorded = _recorded_totals(conn, year)
+
+        # Step 2: copy (rows already copied by an interrupted run are kept)
+        for table, date_column, _, _ in ARCHIVED_TABLES:
+            columns = ', '.join(column for column in _stored_columns(conn, 'main', table)
+                                if column in _stored_columns(conn, 'archive', table))
+            conn.execute(f"""
+                INSERT OR IGNORE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table}
+                WHERE {date_column} >= ? AND {date_column} < ?
+            """, (start, end))
+        conn.commit()
+
+        # Step 3: verify
+        problems = _verify_copy(conn, year, hot_totals, recorded)
+        if problems:
+            raise ValueError(f"Archive {path} does not verify: " + "; ".join(problems))
+
+        # Step 4: move
+        conn.execute("""
+            INSERT INTO archived_account_totals (
+                account_id, transaction_count, last_transaction_date, last_value_date,
+                total_credits_cents, total_debits_cents, closing_balance_cents, updated_at
+            )
+            SELECT
+                t.account_id,
+                COUNT(*),
+                MAX(t.transaction_date),
+                MAX(t.value_date),
+                SUM(CASE WHEN t.type = 'Credit' THEN t.amount_cents ELSE 0 END),
+                SUM(CASE WHEN t.type = 'Credit' THEN 0 ELSE t.amount_cents END),
+                (
+                    SELECT c.running_balance_cents
+                    FROM main.transactions c
+                    WHERE c.account_id = t.account_id
+                      AND c.value_date >= ? AND c.value_date < ?
+                    ORDER BY c.value_date DESC, c.created_at DESC, c.rowid DESC
+                    LIMIT 1
+                ),
+                datetime('now')
+            FROM main.transactions t
+            WHERE t.value_date >= ? AND t.value_date < ?
+            GROUP BY t.account_id
+            ON CONFLICT (account_id) DO UPDATE SET
+                transaction_count = transaction_count + excluded.transaction_count,
+                last_transaction_date = MAX(last_transaction_date, excluded.last_transaction_date),
+                last_value_date = MAX(last_value_date, excluded.last_value_date),
+                total_credits_cents = total_credits_cents + excluded.total_credits_cents,
+                total_debits_cents = total_debits_cents + excluded.total_debits_cents,
+                -- the closing balance is the one of the latest archived year
+                closing_balance_cents = CASE WHEN excluded.last_value_date >= last_value_date
+                                             THEN excluded.closing_balance_cents
+                                             ELSE closing_balance_cents END,
+                updated_at = excluded.updated_at
+        """, (start, end, start, end))
+        # Referencing rows (monthly_interest_accruals) before the transactions they reference
+        for table, date_column, _, _ in reversed(ARCHIVED_TABLES):
+            conn.execute(f"DELETE FROM main.{table} WHERE {date_column} >= ? AND {date_column} < ?", (start, end))
+
+        archived = {table: tuple(r + h for r, h in zip(recorded[table], hot_totals[table]))
+                    for table, *_ in ARCHIVED_TABLES}
+        conn.execute("""
+            INSERT OR REPLACE INTO ledger_archives (
+                archive_year, archive_file, transaction_count, transaction_amount_cents,
+                accrual_count, accrual_interest_cents, monthly_accrual_count, monthly_interest_cents,
+                archived_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+        """, (year, path.name, *archived['transactions'], *archived['interest_accruals'],
+              *archived['monthly_interest_accruals']))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+    return {"year": year, "path": path,
+            "transactions": hot_totals['transactions'], "accruals": hot_totals['interest_accruals'],
+            "monthly_accruals": hot_totals['monthly_interest_accruals']}
+
+
+def archive_accruals(conn, start: str, end: str, archive_dir: Path = ARCHIVE_DIR) -> tuple:
+    """
+    Copy the interest accruals dated in [start, end), within one year, to the
+    year's archive file and verify them there. The year's transactions are
+    not touched.
+
+    The caller deletes the rows from accounts.db and calls
+    record_archived_accruals in one transaction, as accrual_compaction.py
+    does. A caller interrupted before that finds the rows already copied on
+    its next run.
+
+    Returns:
+        (archive path, (row count, cent sum) of the rows copied)
+
+    Raises:
+        ValueError: If the copy does not verify
+    """
+    year = int(start[:4])
+    ensure_ledger_archive(conn)
+    ensure_integer_ledger_columns(conn)
+    path = archive_path(year, archive_dir)
+    _create_archive(conn, path)
+
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        moved = tuple(conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(daily_interest_cents), 0) FROM main.interest_accruals
+            WHERE accrual_date >= ? AND accrual_date < ?
+        """, (start, end)).fetchone())
+        recorded = _recorded_totals(conn, year)
+
+        columns = ', '.join(column for column in _stored_columns(conn, 'main', 'interest_accruals')
+                            if column in _stored_columns(conn, 'archive', 'interest_accruals'))
+        conn.execute(f"""
+            INSERT OR IGNORE INTO archive.interest_accruals ({columns})
+            SELECT {columns} FROM main.interest_accruals
+            WHERE accrual_date >= ? AND accrual_date < ?
+        """, (start, end))
+        conn.commit()
+
+        problems = _verify_copy(conn, year, {'interest_accruals': moved}, recorded, (start, end))
+        if problems:
+            raise ValueError(f"Archive {path} does not verify: " + "; ".join(problems))
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+    return path, moved
+
+
+def record_archived_accruals(conn, year: int, path: Path, moved: tuple):
+    """
+    Add accruals copied by archive_accruals to the year's ledger_archives row
+    (creating it, with transactions_archived = 0, if the year has none).
+    Caller deletes the rows and commits.
+    """
+    conn.execute("""
+        INSERT INTO ledger_archives (
+            archive_year, archive_file, transaction_count, transaction_amount_cents,
+            accrual_count, accrual_interest_cents, transactions_archived, archived_at
+        ) VALUES (?, ?, 0, 0, ?, ?, 0, datetime('now'))
+        ON CONFLICT (archive_year) DO UPDATE SET
+            accrual_count = accrual_count + excluded.accrual_count,
+            accrual_interest_cents = accrual_interest_cents + excluded.accrual_interest_cents
+    """, (year, path.name, *moved))
+
+
+def verify_archive(conn, year: int, archive_dir: Path = ARCHIVE_DIR) -> list:
+    """Compare an archive file's row counts and cent sums with ledger_archives. Returns the problems found."""
+    ensure_ledger_archive(conn)
+    path = archive_path(year, archive_dir)
+    if not path.exists():
+        return [f"{path} is missing"]
+
+    conn.execute("ATTACH DATABASE ? AS archive", (f"file:{path}?mode=ro",))
+    try:
+        archive_totals = _totals(conn, 'archive', year)
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+    recorded = _recorded_totals(conn, year)
+    return [f"{table}: archive holds {archive_totals[table]} rows/cents, ledger_archives records {recorded[table]}"
+            for table, *_ in ARCHIVED_TABLES if archive_totals[table] != recorded[table]]
+
+
+def attach_archives(conn, archive_dir: Path = ARCHIVE_DIR) -> list:
+    """
+    Attach every archive read-only (as archive_YYYY) and create the temporary
+    views transactions_all, interest_accruals_all and
+    monthly_interest_accruals_all over the hot and archived rows, with the
+    columns the hot tables and all archives share.
+
+    Returns:
+        The archived years attached
+    """
+    ensure_ledger_archive(conn)
+    years = [year for (year,) in conn.execute("SELECT archive_year FROM ledger_archives ORDER BY archive_year")]
+    for year in years:
+        conn.execute(f"ATTACH DATABASE ? AS archive_{year}", (f"file:{archive_path(year, archive_dir)}?mode=ro",))
+
+    for table, *_ in ARCHIVED_TABLES:
+        schemas = ['main'] + [f"archive_{year}" for year in years if _has_table(conn, f"archive_{year}", table)]
+        shared = [row[1] for row in conn.execute(f"PRAGMA main.table_xinfo({table})")]
+        for schema in schemas[1:]:
+            archived_columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_xinfo({table})")}
+            shared = [column for column in shared if column in archived_columns]
+        columns = ', '.join(shared)
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_all")
+        conn.execute(f"CREATE TEMP VIEW {table}_all AS " +
+                     " UNION ALL ".join(f"SELECT {columns} FROM {schema}.{table}" for schema in schemas))
+    return years
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move closed years of the ledger to archive databases')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    archive_parser = subparsers.add_parser('archive', help='Archive a closed year')
+    target = archive_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('year', type=int, nargs='?', help='Year to archive')
+    target.add_argument('--before', type=int, metavar='YEAR', help='Archive every year with rows before YEAR')
+    verify_parser = subparsers.add_parser('verify', help='Check archives against their recorded totals')
+    verify_parser.add_argument('year', type=int, nargs='?', help='Year to verify (default: every archive)')
+    subparsers.add_parser('status', help='List archived years')
+
+    args = parser.parse_args()
+
+    try:
+        conn = connect(DB_PATH)
+        ensure_ledger_archive(conn)
+
+        if args.command == 'archive':
+            if args.year is not None:
+                years = [args.year]
+            else:
+                first = conn.execute("""
+                    SELECT MIN(first_date) FROM (
+                        SELECT MIN(value_date) AS first_date FROM transactions
+                        UNION ALL
+                        SELECT MIN(accrual_date) FROM interest_accruals
+                    )
+                """).fetchone()[0]
+                years = list(range(int(first[:4]), args.before)) if first else []
+            for year in years:
+                result = archive_year(conn, year)
+                print(f"✓ Archived {year} to {result['path']}: "
+                      f"{result['transactions'][0]:,} transactions, {result['accruals'][0]:,} interest accruals")
+
+        elif args.command == 'verify':
+            years = [args.year] if args.year is not None else [
+                year for (year,) in conn.execute("SELECT archive_year FROM ledger_archives ORDER BY archive_year")]
+            failed = False
+            for year in years:
+                problems = verify_archive(conn, year)
+                failed = failed or bool(problems)
+                print(f"{'✗' if problems else '✓'} {year}" + "".join(f"\n    {problem}" for problem in problems))
+            if failed:
+                sys.exit(1)
+
+        elif args.command == 'status':
+            rows = conn.execute("""
+                SELECT archive_year, archive_file, transaction_count, accrual_count, archived_at,
+                       transactions_archived
+                FROM ledger_archives ORDER BY archive_year
+            """).fetchall()
+            if not rows:
+                print("No archived years")
+            for year, archive_file, transaction_count, accrual_count, archived_at, transactions_archived in rows:
+                print(f"  {year}  {archive_file:<18} {transaction_count:>12,} transactions "
+                      f"{accrual_count:>12,} accruals  (archived {archived_at})"
+                      + ("" if transactions_archived else "  [compacted accruals only]"))
+
+        conn.close()
+
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Ledger Row Identifiers
+
+Generates the TEXT primary keys of rows the batch scripts insert, e.g.
+TXN-FEE-01K7G3Z4QW8N2J5T6V9XBCDEFH. The part after the prefix is a ULID:
+
+- 10 characters of millisecond timestamp, then 16 characters of randomness
+- Crockford base32 (0-9, A-Z without I, L, O, U), so text order is time order
+- monotonic within a process: IDs generated in the same millisecond
+  increment the random part instead of drawing a new one
+
+uuid4 keys land at random positions in the primary key index, so every
+insert touches a different leaf page and splits leave pages half full.
+Time-ordered keys with a common prefix append to the right edge of the
+index instead, which keeps it dense and the batch's working set small.
+They are also 10 characters shorter than a uuid4.
+
+IDs from different processes (sharded EOD workers) interleave within a
+millisecond but never collide: each process draws its own 80 random bits.
+
+Usage:
+    from ledger_ids import new_id
+    transaction_id = new_id("TXN-FEE")
+"""
+
+import os
+import time
+import base64
+
+# RFC 4648 base32 digits mapped onto Crockford's, which sort in value order
+_CROCKFORD = b"0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_TO_CROCKFORD = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", _CROCKFORD)
+
+_RANDOM_BYTES = 10
+_RANDOM_LIMIT = 1 << (8 * _RANDOM_BYTES)
+
+
+def _encode_timestamp(milliseconds: int) -> str:
+    """The 10 Crockford base32 characters of a 48-bit millisecond timestamp."""
+    return "".join(chr(_CROCKFORD[(milliseconds >> shift) & 31]) for shift in range(45, -5, -5))
+
+
+class MonotonicIdGenerator:
+    """ULID generator whose IDs strictly increase for the lifetime of the instance."""
+
+    def __init__(self):
+        self._milliseconds = -1
+        self._timestamp = ""
+        self._random = 0
+        self._pid = os.getpid()
+
+    def ulid(self) -> str:
+        """Next 26-character ULID."""
+        milliseconds = time.time_ns() // 1_000_000
+        if os.getpid() != self._pid:
+            # Forked worker: do not continue the parent's random sequence
+            self._pid = os.getpid()
+            self._milliseconds = -1
+
+        if milliseconds > self._milliseconds:
+            self._milliseconds = milliseconds
+            self._timestamp = _encode_timestamp(milliseconds)
+            self._random = int.from_bytes(os.urandom(_RANDOM_BYTES), "big")
+        else:
+            # Same millisecond, or the clock stepped back: keep counting from the last ID
+            self._random += 1
+            if self._random == _RANDOM_LIMIT:
+                self._milliseconds += 1
+                self._timestamp = _encode_timestamp(self._milliseconds)
+                self._random = 0
+
+        randomness = base64.b32encode(self._random.to_bytes(_RANDOM_BYTES, "big"))
+        return self._timestamp + randomness.translate(_TO_CROCKFORD).decode()
+
+    def new_id(self, prefix: str) -> str:
+        """Next ID with prefix, e.g. 'TXN-FEE' -> 'TXN-FEE-01K7G3Z4QW8N2J5T6V9XBCDEFH'."""
+        return f"{prefix}-{self.ulid()}"
+
+
+_generator = MonotonicIdGenerator()
+
+
+def new_id(prefix: str) -> str:
+    """Next time-ordered ID with prefix from the process-wide generator."""
+    return _generator.new_id(prefix)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Ledger Running-Balance Repair
+
+A transaction inserted with a past value_date (e.g. month-end interest posted
+by a catch-up run) leaves every later transaction of the account with a
+running_balance that does not include it. This module recomputes running
+balances for the affected suffix of each account's history only, in bulk:
+
+1. The earliest backdated value date per account goes into a temp table.
+2. The anchor is the running_balance of the account's last transaction
+   dated before that day. With no such transaction in accounts.db it is the
+   closing balance of the account's archived years (archived_account_totals,
+   see ledger_archive.py), or 0 if nothing was archived either.
+3. One window SUM over the suffix, in ledger order (value_date, created_at,
+   rowid), gives the new running balances; only rows whose rounded value
+   changed are rewritten.
+4. accounts.balance is set to the last running_balance of each account, and
+   the month_end_balances snapshot is refreshed for the months touched.
+
+Usage:
+    python3 ledger_repair.py --from YYYY-MM-DD [--account ACCOUNT_ID ...]
+
+Options:
+    --from YYYY-MM-DD     Recompute running balances from this value date on
+    --account ID          Limit the repair to these accounts (default: all)
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import date
+
+from db_connection import connect, ensure_ledger_archive
+from month_end_balances import ensure_month_end_balances, refresh_account_months
+
+DB_PATH = Path(__file__).parent.parent / "accounts.db"
+
+
+def _load_repair_starts(cursor, backdated):
+    """Fill temp.repair_starts with the earliest value date per account."""
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS repair_starts (
+            account_id TEXT PRIMARY KEY,
+            from_date TEXT NOT NULL,
+            anchor_balance REAL NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("DELETE FROM temp.repair_starts")
+    cursor.executemany("""
+        INSERT INTO temp.repair_starts (account_id, from_date) VALUES (?, ?)
+        ON CONFLICT (account_id) DO UPDATE SET from_date = min(from_date, excluded.from_date)
+    """, backdated)
+
+    # Running balance just before the suffix: last transaction dated earlier,
+    # else the balance the archived years closed on (archives written before
+    # migration 014 have no closing balance; credits - debits is the same)
+    cursor.execute("""
+        UPDATE temp.repair_starts
+        SET anchor_balance = COALESCE((
+            SELECT t.running_balance
+            FROM transactions t
+            WHERE t.account_id = repair_starts.account_id
+              AND t.value_date < repair_starts.from_date
+            ORDER BY t.value_date DESC, t.created_at DESC, t.rowid DESC
+            LIMIT 1
+        ), (
+            SELECT COALESCE(a.closing_balance_cents, a.total_credits_cents - a.total_debits_cents) / 100.0
+            FROM archived_account_totals a
+            WHERE a.account_id = repair_starts.account_id
+        ), 0)
+    """)
+
+
+def repair_running_balances(conn, backdated) -> dict:
+    """
+    Recompute running balances after backdated inserts. Caller commits.
+
+    Args:
+        backdated: Iterable of (account_id, value_date) for the backdated
+                   transactions (or any date to repair from); several
+                   entries per account are fine, the earliest wins
+
+    Returns:
+        Dict with accounts (accounts examined), transactions_repaired and
+        balances_updated
+    """
+    ensure_month_end_balances(conn)
+    ensure_ledger_archive(conn)
+    cursor = conn.cursor()
+    _load_repair_starts(cursor, backdated)
+
+    accounts = cursor.execute("SELECT COUNT(*) FROM temp.repair_starts").fetchone()[0]
+    if not accounts:
+        return {"accounts": 0, "transactions_repaired": 0, "balances_updated": 0}
+
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS repaired_balances (
+            txn_rowid INTEGER PRIMARY KEY,
+            running_balance REAL NOT NULL
+        )
+    """)
+    cursor.execute("DELETE FROM temp.repaired_balances")
+    cursor.execute("""
+        INSERT INTO temp.repaired_balances (txn_rowid, running_balance)
+        SELECT txn_rowid, new_balance
+        FROM (
+            SELECT
+                t.rowid AS txn_rowid,
+                t.running_balance AS old_balance,
+                round(s.anchor_balance + SUM(
+                    CASE WHEN t.type = 'Credit' THEN t.amount ELSE -t.amount END
+                ) OVER (
+                    PARTITION BY t.account_id
+                    ORDER BY t.value_date, t.created_at, t.rowid
+                    ROWS UNBOUNDED PRECEDING
+                ), 2) AS new_balance
+            FROM temp.repair_starts s
+            INNER JOIN transactions t
+                ON t.account_id = s.account_id
+               AND t.value_date >= s.from_date
+        )
+        WHERE new_balance IS NOT round(old_balance, 2)
+    """)
+    transactions_repaired = cursor.rowcount
+
+    cursor.execute("""
+        UPDATE transactions
+        SET running_balance = r.running_balance
+        FROM temp.repaired_balances r
+        WHERE transactions.rowid = r.txn_rowid
+    """)
+
+    # Current balance is the running balance of the account's last transaction
+    cursor.execute("""
+        UPDATE accounts
+        SET balance = latest.running_balance,
+            updated_at = datetime('now')
+        FROM (
+            SELECT s.account_id, (
+                SELECT t.running_balance
+                FROM transactions t
+                WHERE t.account_id = s.account_id
+                ORDER BY t.value_date DESC, t.created_at DESC, t.rowid DESC
+                LIMIT 1
+            ) AS running_balance
+            FROM temp.repair_starts s
+        ) latest
+        WHERE accounts.account_id = latest.account_id
+          AND latest.running_balance IS NOT NULL
+          AND accounts.balance IS NOT latest.running_balance
+    """)
+    balances_updated = cursor.rowcount
+
+    if transactions_repaired:
+        refresh_account_months(cursor, cursor.execute("""
+            SELECT DISTINCT t.account_id, substr(t.value_date, 1, 7)
+            FROM temp.repaired_balances r
+            INNER JOIN transactions t ON t.rowid = r.txn_rowid
+        """).fetchall())
+
+    return {
+        "accounts": accounts,
+        "transactions_repaired": transactions_repaired,
+        "balances_updated": balances_updated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute ledger running balances')
+    parser.add_argument('--from', dest='from_date', type=date.fromisoformat, required=True,
+                        metavar='YYYY-MM-DD', help='Recompute from this value date on')
+    parser.add_argument('--account', dest='accounts', action='append', metavar='ACCOUNT_ID',
+                        help='Account to repair (repeatable; default: all accounts)')
+
+    args = parser.parse_args()
+
+    try:
+        conn = connect(DB_PATH)
+        accounts = args.accounts or [row[0] for row in conn.execute("SELECT account_id FROM accounts")]
+        result = repair_running_balances(conn, [(account_id, args.from_date.isoformat())
+                                                for account_id in accounts])
+        conn.commit()
+        conn.close()
+
+        print(f"✓ Ledger repaired: {result['accounts']} accounts, "
+              f"{result['transactions_repaired']} running balances, "
+              f"{result['balances_updated']} account balances updated")
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,11 @@
 Migration script to add customers table and update accounts
 """
 
-import sqlite3
 import sys
 from pathlib import Path
 
+from db_connection import connect
+
 # Database path
 DB_PATH = Path(__file__).parent.parent / "accounts.db"
 MIGRATION_FILE = Path(__file__).parent.parent / "schema/migrations/002_add_customers.sql"
@@ -19,7 +20,7 @@ def run_migration():
             migration_sql = f.read()
 
         # Connect to database
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect(DB_PATH)
         cursor = conn.cursor()
 
         print("Applying migration: 002_add_customers.sql")
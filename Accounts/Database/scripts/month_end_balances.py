@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Month-End Balance Snapshots
+
+Maintains month_end_balances: each account's closing balance for every month
+that has transactions, i.e. the running_balance of the month's last
+transaction (value_date DESC, created_at DESC, latest insert on ties).
+
+The maintainer is incremental. A watermark in snapshot_watermarks records the
+last transactions rowid absorbed; a refresh reads only the rows inserted
+since, collects the (account, value month) pairs they touch - backdated value
+dates included - and recomputes just those months. If the watermark no longer
+points at the same transaction (VACUUM renumbered rowids, or the ledger was
+deleted and reloaded), the snapshot is rebuilt from scratch.
+
+Transactions are append-only here; code that rewrites running_balance on
+existing rows must refresh the affected months itself with
+refresh_account_months().
+
+Usage:
+    python3 month_end_balances.py [--rebuild]
+
+Options:
+    --rebuild    Discard the snapshot and rebuild it from all transactions
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import date
+from decimal import Decimal
+
+from db_connection import connect, ensure_table, last_archived_year, MIGRATIONS_DIR
+
+DB_PATH = Path(__file__).parent.parent / "accounts.db"
+
+MONTH_END_BALANCES_MIGRATION = MIGRATIONS_DIR / "007_add_month_end_balances.sql"
+SNAPSHOT_NAME = "month_end_balances"
+
+
+def ensure_month_end_balances(conn):
+    """Create the snapshot tables on databases initialised before migration 007."""
+    ensure_table(conn, "month_end_balances", MONTH_END_BALANCES_MIGRATION)
+
+
+def get_watermark(cursor, snapshot_name: str = SNAPSHOT_NAME):
+    """Return the stored (last_transaction_rowid, last_transaction_id) of snapshot_name, or None."""
+    return cursor.execute("""
+        SELECT last_transaction_rowid, last_transaction_id
+        FROM snapshot_watermarks
+        WHERE snapshot_name = ?
+    """, (snapshot_name,)).fetchone()
+
+
+def watermark_is_valid(cursor, watermark) -> bool:
+    """True if the watermark rowid still holds the transaction it was taken at."""
+    last_rowid, last_transaction_id = watermark
+    if last_rowid == 0:
+        return last_transaction_id is None
+    row = cursor.execute(
+        "SELECT transaction_id FROM transactions WHERE rowid = ?", (last_rowid,)
+    ).fetchone()
+    return row is not None and row[0] == last_transaction_id
+
+
+def advance_watermark(cursor, snapshot_name: str = SNAPSHOT_NAME):
+    """Move the watermark of snapshot_name to the newest transaction."""
+    row = cursor.execute("""
+        SELECT rowid, transaction_id FROM transactions ORDER BY rowid DESC LIMIT 1
+    """).fetchone()
+    last_rowid, last_transaction_id = row if row else (0, None)
+    cursor.execute("""
+        INSERT OR REPLACE INTO snapshot_watermarks (
+            snapshot_name, last_transaction_rowid, last_transaction_id, updated_at
+        ) VALUES (?, ?, ?, datetime('now'))
+    """, (snapshot_name, last_rowid, last_transaction_id))
+    return last_rowid
+
+
+def _rebuild(cursor, archived_year) -> int:
+    """
+    Recompute every account's months in one scan. Returns months written.
+
+    Months up to archived_year (see ledger_archive.py) are no longer in the
+    hot ledger and are kept as they are.
+    """
+    after_month = f"{archived_year}-12" if archived_year is not None else ""
+    cursor.execute("DELETE FROM month_end_balances WHERE month_key > ?", (after_month,))
+    cursor.execute("""
+        INSERT INTO month_end_balances (
+            account_id, month_key, closing_balance, last_transaction_id, last_value_date, updated_at
+        )
+        SELECT account_id, month_key, running_balance, transaction_id, value_date, datetime('now')
+        FROM (
+            SELECT
+                t.account_id,
+                substr(t.value_date, 1, 7) AS month_key,
+                t.running_balance,
+                t.transaction_id,
+                t.value_date,
+                ROW_NUMBER() OVER (
+                    PARTITION BY t.account_id, substr(t.value_date, 1, 7)
+                    ORDER BY t.value_date DESC, t.created_at DESC, t.rowid DESC
+                ) AS rn
+            FROM transactions t
+            WHERE substr(t.value_date, 1, 7) > ?
+        )
+        WHERE rn = 1
+    """, (after_month,))
+    return cursor.rowcount
+
+
+def _recompute_affected_months(cursor) -> int:
+    """
+    Recompute the months listed in temp.affected_months. Returns months written.
+
+    Each month is read through idx_transactions_account_value_date with a
+    'YYYY-MM-01' <= value_date < 'YYYY-MM-32' range, which covers both date
+    and timestamp values of the month.
+    """
+    cursor.execute("""
+        INSERT OR REPLACE INTO month_end_balances (
+            account_id, month_key, closing_balance, last_transaction_id, last_value_date, updated_at
+        )
+        SELECT account_id, month_key, running_balance, transaction_id, value_date, datetime('now')
+        FROM (
+            SELECT
+                m.account_id,
+                m.month_key,
+                t.running_balance,
+                t.transaction_id,
+                t.value_date,
+                ROW_NUMBER() OVER (
+                    PARTITION BY m.account_id, m.month_key
+                    ORDER BY t.value_date DESC, t.created_at DESC, t.rowid DESC
+                ) AS rn
+            FROM temp.affected_months m
+            INNER JOIN transactions t
+                ON t.account_id = m.account_id
+               AND t.value_date >= m.month_key || '-01'
+               AND t.value_date < m.month_key || '-32'
+        )
+        WHERE rn = 1
+    """)
+    return cursor.rowcount
+
+
+def _create_affected_months(cursor):
+    """Create (or empty) the temp table of months to recompute."""
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS affected_months (
+            account_id TEXT NOT NULL,
+            month_key TEXT NOT NULL,
+            PRIMARY KEY (account_id, month_key)
+        )
+    """)
+    cursor.execute("DELETE FROM temp.affected_months")
+
+
+def refresh_account_months(cursor, account_months):
+    """
+    Recompute specific (account_id, 'YYYY-MM') months, e.g. after running
+    balances of existing transactions were rewritten. Caller commits.
+
+    Returns the number of months written.
+    """
+    _create_affected_months(cursor)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO temp.affected_months (account_id, month_key) VALUES (?, ?)",
+        account_months,
+    )
+    return _recompute_affected_months(cursor)
+
+
+def refresh_month_end_balances(conn, rebuild: bool = False) -> dict:
+    """
+    Bring month_end_balances up to date with transactions. Caller commits.
+
+    Only transactions inserted after the watermark are read; every
+    (account, value month) they fall in is recomputed, so backdated postings
+    update the month they belong to rather than the month they were posted in.
+
+    Args:
+        rebuild: Discard the snapshot and rebuild from all transactions
+
+    Returns:
+        Dict with mode ('rebuild' or 'incremental'), new_transactions and
+        months_refreshed
+    """
+    ensure_month_end_balances(conn)
+    cursor = conn.cursor()
+
+    watermark = get_watermark(cursor)
+    if rebuild or watermark is None or not watermark_is_valid(cursor, watermark):
+        new_transactions = cursor.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        months_refreshed = _rebuild(cursor, last_archived_year(conn))
+        advance_watermark(cursor)
+        return {"mode": "rebuild", "new_transactions": new_transactions,
+                "months_refreshed": months_refreshed}
+
+    last_rowid = watermark[0]
+    new_transactions = cursor.execute(
+        "SELECT COUNT(*) FROM transactions WHERE rowid > ?", (last_rowid,)
+    ).fetchone()[0]
+    if not new_transactions:
+        return {"mode": "incremental", "new_transactions": 0, "months_refreshed": 0}
+
+    _create_affected_months(cursor)
+    cursor.execute("""
+        INSERT OR IGNORE INTO temp.affected_months (account_id, month_key)
+        SELECT account_id, substr(value_date, 1, 7)
+        FROM transactions
+        WHERE rowid > ?
+    """, (last_rowid,))
+    months_refreshed = _recompute_affected_months(cursor)
+    advance_watermark(cursor)
+    return {"mode": "incremental", "new_transactions": new_transactions,
+            "months_refreshed": months_refreshed}
+
+
+def get_balance_at_month_end(conn, account_id: str, month_end_date: date) -> Decimal:
+    """
+    Get account balance at the end of a specific month from the snapshot.
+
+    The closing balance of the latest month on or before month_end_date is
+    the running_balance of the last transaction on or before that date. If
+    no transactions exist, uses opening balance (0). Returns None if the
+    account was not open yet.
+
+    The snapshot must be refreshed (refresh_month_end_balances) for
+    transactions posted since the last refresh to be reflected.
+    """
+    cursor = conn.cursor()
+
+    row = cursor.execute("""
+        SELECT closing_balance
+        FROM month_end_balances
+        WHERE account_id = ?
+          AND month_key <= ?
+        ORDER BY month_key DESC
+        LIMIT 1
+    """, (account_id, month_end_date.strftime('%Y-%m'))).fetchone()
+
+    if row:
+        return Decimal(str(row[0]))
+
+    # No transactions yet - check if account was open
+    account_info = cursor.execute("""
+        SELECT opening_date
+        FROM accounts
+        WHERE account_id = ?
+    """, (account_id,)).fetchone()
+
+    if account_info and date.fromisoformat(account_info[0]) <= month_end_date:
+        return Decimal('0')  # Account was open but no transactions
+
+    return None  # Account didn't exist yet
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh month-end balance snapshots')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the snapshot from all transactions')
+
+    args = parser.parse_args()
+
+    try:
+        conn = connect(DB_PATH)
+        result = refresh_month_end_balances(conn, rebuild=args.rebuild)
+        conn.commit()
+        conn.close()
+
+        print(f"✓ Month-end balances refreshed ({result['mode']}): "
+              f"{result['new_transactions']} transactions, {result['months_refreshed']} months")
+        sys.exit(0)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
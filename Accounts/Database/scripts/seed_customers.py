@@ -3,15 +3,16 @@
 Seed customer data for testing
 """
 
-import sqlite3
 from datetime import datetime, UTC
 from pathlib import Path
 
+from db_connection import connect
+
 DB_PATH = Path(__file__).parent.parent / "accounts.db"
 
 def seed_customers():
     """Create sample customers"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect(DB_PATH)
     cursor = conn.cursor()
 
     # Use SQLite datetime format: YYYY-MM-DD HH:MM:SS
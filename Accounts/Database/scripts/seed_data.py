@@ -8,6 +8,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from db_connection import connect
+from account_stats import refresh_account_stats
+
 # Get database directory
 DB_DIR = Path(__file__).parent.parent
 SEED_DIR = DB_DIR / "schema" / "seed"
@@ -29,12 +32,9 @@ def seed_database():
     print(f"\nDatabase: {DB_FILE}")
 
     # Create database connection
-    conn = sqlite3.connect(str(DB_FILE))
+    conn = connect(DB_FILE, foreign_keys=True)
     cursor = conn.cursor()
 
-    # Enable foreign keys
-    cursor.execute("PRAGMA foreign_keys = ON;")
-
     # Get all seed files
     seed_files = sorted(SEED_DIR.glob("*.sql"))
 
@@ -69,6 +69,9 @@ def seed_database():
             # Continue with other seed files even if one fails
             continue
 
+    refresh_account_stats(conn, rebuild=True)
+    conn.commit()
+
     # Show summary
     print("\n" + "-" * 80)
     print("Data Summary:")
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Database Snapshots
+
+Saves and restores whole databases with SQLite's online backup API, so a
+reset to a known state is one page copy instead of DELETE FROM on every
+table followed by a row-by-row rebuild. Restoring replaces the content of
+accounts.db in place; it is safe while the database is open elsewhere,
+which sees the restored content on its next transaction.
+
+Snapshots are plain SQLite files in Database/snapshots/. Golden snapshots
+are built on demand by GOLDEN_SNAPSHOTS below:
+
+- schema          Every migration applied, no data
+- demo            schema + the seed data of seed_data.py
+- benchmark-100k  schema + users and products seed + a 100k-account
+                  synthetic book (generate_realistic_data.py --accounts)
+
+init_db.py --template starts from the post-migration template, a cached
+schema snapshot keyed by the content of the migration files, so it is
+rebuilt automatically whenever a migration is added or changed.
+
+Usage:
+    python3 snapshots.py list
+    python3 snapshots.py save NAME
+    python3 snapshots.py restore NAME
+    python3 snapshots.py build NAME [--force]
+"""
+
+import os
+import sys
+import time
+import argparse
+import hashlib
+import sqlite3
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from db_connection import connect, remove_database, MIGRATIONS_DIR
+from account_stats import refresh_account_stats
+
+DB_DIR = Path(__file__).parent.parent
+DB_FILE = DB_DIR / "accounts.db"
+SEED_DIR = DB_DIR / "schema" / "seed"
+SNAPSHOT_DIR = DB_DIR / "snapshots"
+
+# Fixed so the benchmark book is the same whenever it is rebuilt
+BENCHMARK_AS_OF = date(2025, 10, 31)
+BENCHMARK_ACCOUNTS = 100_000
+
+# Pages copied per backup step
+BACKUP_PAGES = 65536
+
+
+def snapshot_path(name: str) -> Path:
+    """Path of the snapshot file for name."""
+    if not name or os.sep in name or name.startswith('.'):
+        raise ValueError(f"Invalid snapshot name: {name!r}")
+    return SNAPSHOT_DIR / f"{name}.db"
+
+
+def list_snapshots() -> list:
+    """(name, size in bytes, modified timestamp) of every saved snapshot, by name."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return [(path.stem, path.stat().st_size, path.stat().st_mtime) for path in sorted(SNAPSHOT_DIR.glob("*.db"))]
+
+
+def save_snapshot(name: str, db_path: Path = DB_FILE) -> Path:
+    """
+    Save db_path as snapshot name, replacing an existing snapshot of that name.
+
+    The copy is written to a temporary file and renamed into place, so a
+    failed save never leaves a partial snapshot behind.
+    """
+    target = snapshot_path(name)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    handle, partial = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".partial")
+    os.close(handle)
+    source = connect(db_path)
+    try:
+        destination = sqlite3.connect(partial)
+        try:
+            source.backup(destination, pages=BACKUP_PAGES)
+            # A single self-contained file: no -wal sidecar to copy along
+            destination.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            destination.close()
+        os.replace(partial, target)
+    except Exception:
+        remove_database(Path(partial))
+        raise
+    finally:
+        source.close()
+    return target
+
+
+def restore_snapshot(name: str, db_path: Path = DB_FILE):
+    """
+    Replace the content of db_path with snapshot name.
+
+    Raises:
+        FileNotFoundError: If the snapshot does not exist
+    """
+    source_path = snapshot_path(name)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Snapshot not found: {source_path}")
+
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    destination = connect(db_path)
+    try:
+        source.backup(destination, pages=BACKUP_PAGES)
+        # Snapshots are saved in rollback-journal mode; keep the profile's WAL
+        destination.execute("PRAGMA journal_mode = WAL")
+    finally:
+        destination.close()
+        source.close()
+
+
+# ============================================================================
+# POST-MIGRATION TEMPLATE
+# ============================================================================
+
+def migrations_digest() -> str:
+    """Digest of the names and content of every migration file."""
+    digest = hashlib.sha256()
+    for migration_file in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        digest.update(migration_file.name.encode())
+        digest.update(migration_file.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def schema_template() -> str:
+    """
+    Name of the post-migration template snapshot, building it if the current
+    migrations have none yet. Templates of older migrations are removed.
+    """
+    name = f"schema-{migrations_digest()}"
+    if not snapshot_path(name).exists():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = Path(tmp_dir) / "schema.db"
+            conn = connect(db_path, foreign_keys=True)
+            for migration_file in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                conn.executescript(migration_file.read_text())
+            conn.commit()
+            conn.close()
+            save_snapshot(name, db_path)
+
+        for stale in SNAPSHOT_DIR.glob("schema-*.db"):
+            if stale.stem != name:
+                stale.unlink()
+    return name
+
+
+# ============================================================================
+# GOLDEN SNAPSHOTS
+# ============================================================================
+#
+# Each builder fills a fresh database at db_path that already holds the
+# post-migration template.
+
+def _load_seed_files(db_path: Path, seed_files: list):
+    conn = connect(db_path, foreign_keys=True)
+    for seed_file in seed_files:
+        conn.executescript(seed_file.read_text())
+    refresh_account_stats(conn, rebuild=True)
+    conn.commit()
+    conn.close()
+
+
+def _build_demo(db_path: Path):
+    _load_seed_files(db_path, sorted(SEED_DIR.glob("*.sql")))
+
+
+def _build_benchmark_book(db_path: Path):
+    from generate_realistic_data import generate_book
+
+    _load_seed_files(db_path, [SEED_DIR / "001_seed_users.sql", SEED_DIR / "002_seed_products.sql"])
+    generate_book(BENCHMARK_ACCOUNTS, os.cpu_count(), as_of=BENCHMARK_AS_OF, db_path=db_path)
+
+
+GOLDEN_SNAPSHOTS = {
+    'schema': None,
+    'demo': _build_demo,
+    'benchmark-100k': _build_benchmark_book,
+}
+
+
+def build_golden_snapshot(name: str, force: bool = False) -> Path:
+    """
+    Build golden snapshot name unless it is already saved (or force is set).
+
+    Raises:
+        ValueError: If name is not one of GOLDEN_SNAPSHOTS
+    """
+    if name not in GOLDEN_SNAPSHOTS:
+        raise ValueError(f"Unknown golden snapshot: {name} (expected one of {', '.join(GOLDEN_SNAPSHOTS)})")
+
+    target = snapshot_path(name)
+    if target.exists() and not force:
+        return target
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / f"{name}.db"
+        restore_snapshot(schema_template(), db_path)
+        if GOLDEN_SNAPSHOTS[name]:
+            GOLDEN_SNAPSHOTS[name](db_path)
+        return save_snapshot(name, db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Save and restore database snapshots')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List saved snapshots')
+    save_parser = subparsers.add_parser('save', help='Save accounts.db as a snapshot')
+    save_parser.add_argument('name')
+    restore_parser = subparsers.add_parser('restore', help='Reset accounts.db to a snapshot')
+    restore_parser.add_argument('name')
+    build_parser = subparsers.add_parser('build', help='Build a golden snapshot')
+    build_parser.add_argument('name', choices=list(GOLDEN_SNAPSHOTS))
+    build_parser.add_argument('--force', action='store_true', help='Rebuild even if already saved')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'list':
+            snapshots = list_snapshots()
+            if not snapshots:
+                print(f"No snapshots in {SNAPSHOT_DIR}")
+            for name, size, modified in snapshots:
+                print(f"  {name:<28} {size / 1048576:>10.1f} MB  {time.strftime('%Y-%m-%d %H:%M', time.localtime(modified))}")
+
+        elif args.command == 'save':
+            start = time.perf_counter()
+            path = save_snapshot(args.name)
+            print(f"✓ Saved {DB_FILE.name} as snapshot '{args.name}' ({path}) in {time.perf_counter() - start:.1f}s")
+
+        elif args.command == 'restore':
+            # Golden snapshots are built on first use
+            if args.name in GOLDEN_SNAPSHOTS:
+                build_golden_snapshot(args.name)
+            start = time.perf_counter()
+            restore_snapshot(args.name)
+            print(f"✓ Restored snapshot '{args.name}' into {DB_FILE} in {time.perf_counter() - start:.1f}s")
+
+        elif args.command == 'build':
+            start = time.perf_counter()
+            path = build_golden_snapshot(args.name, force=args.force)
+            print(f"✓ Golden snapshot '{args.name}' ready ({path}) in {time.perf_counter() - start:.1f}s")
+
+    except (ValueError, FileNotFoundError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Make the batch scripts importable the way they import each other (by module name)."""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from db_connection import connect, MIGRATIONS_DIR  # noqa: E402
+from ledger_ids import new_id  # noqa: E402
+from ledger_repair import repair_running_balances  # noqa: E402
+
+
+class Book:
+    """A freshly migrated accounts.db in a temporary directory, with helpers to fill it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        conn = connect(path)
+        for migration in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            conn.executescript(migration.read_text())
+        conn.commit()
+        conn.close()
+        # Migration 001 turns foreign keys on; the batch scripts' connections leave them off
+        self.conn = connect(path)
+
+    def add_product(self, product_id: str, interest_rate: float = 0.0, minimum_balance: float = 0.0,
+                    monthly_fee: float = 0.0, convention: str = None):
+        self.conn.execute("""
+            INSERT INTO products (product_id, product_name, product_code, interest_rate,
+                                  minimum_balance_for_interest, monthly_maintenance_fee, day_count_convention)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (product_id, product_id, product_id, interest_rate, minimum_balance, monthly_fee, convention))
+        self.conn.commit()
+
+    def open_account(self, account_id: str, product_id: str, opening_date: str, deposit: float = 0.0):
+        self.conn.execute("""
+            INSERT INTO accounts (account_id, account_number, customer_id, product_id, currency, opening_date)
+            VALUES (?, ?, 'CUST-1', ?, 'USD', ?)
+        """, (account_id, f"NO-{account_id}", product_id, opening_date))
+        if deposit:
+            self.post(account_id, opening_date, deposit, category='Opening')
+        self.conn.commit()
+
+    def post(self, account_id: str, value_date: str, amount: float, category: str = 'Deposit'):
+        """Post a transaction (a debit if amount < 0) and keep the ledger consistent, like the API."""
+        self.conn.execute("""
+            INSERT INTO transactions (transaction_id, account_id, transaction_date, value_date, type,
+                                      category, amount, currency, running_balance, description,
+                                      created_at)
+            VALUES (?, ?, datetime('now'), ?, ?, ?, ?, 'USD', 0, 'Test posting', ?)
+        """, (new_id("TXN"), account_id, value_date, 'Credit' if amount > 0 else 'Debit',
+              category if amount > 0 else 'Withdrawal', abs(amount), datetime.now().isoformat()))
+        repair_running_balances(self.conn, [(account_id, value_date)])
+        self.conn.commit()
+
+    def rows(self, query: str, params: tuple = ()) -> list:
+        return self.conn.execute(query, params).fetchall()
+
+
+@pytest.fixture
+def book(tmp_path):
+    """Factory for empty migrated books: book() -> Book at tmp_path/<n>/accounts.db."""
+    books = []
+
+    def make() -> Book:
+        directory = tmp_path / str(len(books))
+        directory.mkdir()
+        books.append(Book(directory / "accounts.db"))
+        return books[-1]
+
+    yield make
+    for made in books:
+        made.conn.close()
@@ -0,0 +1,102 @@
+"""
+Accrual compaction: closed months only, reconciliation with
+accounts.interest_accrued, and daily rows kept in the ledger archive.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import batch_eod_processing as eod
+from accrual_compaction import compact_month, compact_closed_months, last_closed_month
+from db_connection import last_archived_year
+from ledger_archive import archive_year, attach_archives, verify_archive
+
+TODAY = date(2025, 3, 15)
+
+DAILY_COLUMNS = "accrual_id, account_id, accrual_date, balance, daily_interest, cumulative_accrued"
+
+
+def _accrued_book(book, last_day: date):
+    """A book with EOD accruals from 2025-01-01 through last_day."""
+    accrued = book()
+    accrued.add_product('P-SAV', interest_rate=0.05)
+    accrued.add_product('P-360', interest_rate=0.02, convention='ACT/360')
+    accrued.open_account('ACC-1', 'P-SAV', '2024-12-01', 1000.00)
+    accrued.open_account('ACC-2', 'P-360', '2024-12-01', 25000.00)
+    day = date(2025, 1, 1)
+    while day <= last_day:
+        if day == date(2025, 1, 16):
+            accrued.post('ACC-1', day.isoformat(), 400.00)
+        eod.accrue_interest_bulk(accrued.conn, day)
+        day += timedelta(days=1)
+    return accrued
+
+
+def test_only_months_whose_last_day_was_accrued_are_closed(book):
+    accrued = _accrued_book(book, date(2025, 2, 27))
+    assert last_closed_month(accrued.conn) == '2025-01'
+
+    with pytest.raises(ValueError, match="not closed"):
+        compact_month(accrued.conn, '2025-02', today=TODAY)
+
+    results = compact_closed_months(accrued.conn, today=TODAY)
+    assert [result["month"] for result in results] == ['2025-01']
+    assert accrued.rows("SELECT MIN(accrual_date) FROM interest_accruals") == [('2025-02-01',)]
+
+
+def test_compaction_reconciles_with_interest_accrued(book):
+    accrued = _accrued_book(book, date(2025, 2, 10))
+    daily_before = accrued.rows("SELECT COUNT(*) FROM interest_accruals")
+    january_close = accrued.rows("""
+        SELECT account_id, cumulative_accrued_cents FROM interest_accruals
+        WHERE accrual_date = '2025-01-31' ORDER BY 1
+    """)
+
+    # interest_accrued no longer matches the daily rows: nothing is compacted
+    accrued.conn.execute("UPDATE accounts SET interest_accrued = interest_accrued + 0.01 WHERE account_id = 'ACC-2'")
+    accrued.conn.commit()
+    with pytest.raises(ValueError, match="ACC-2"):
+        compact_month(accrued.conn, '2025-01', today=TODAY)
+
+    assert accrued.rows("SELECT COUNT(*) FROM interest_accruals") == daily_before
+    assert accrued.rows("SELECT COUNT(*) FROM interest_accrual_summaries") == [(0,)]
+
+    accrued.conn.execute("UPDATE accounts SET interest_accrued = interest_accrued - 0.01 WHERE account_id = 'ACC-2'")
+    accrued.conn.commit()
+    result = compact_month(accrued.conn, '2025-01', today=TODAY)
+
+    assert result["daily_rows"] == 62
+    assert accrued.rows("""
+        SELECT account_id, closing_accrued_cents FROM interest_accrual_summaries ORDER BY 1
+    """) == january_close
+
+
+def test_archived_daily_rows_join_the_ledger_archive(book, tmp_path):
+    accrued = _accrued_book(book, date(2025, 2, 10))
+    january = accrued.rows(f"SELECT {DAILY_COLUMNS} FROM interest_accruals "
+                           "WHERE accrual_date < '2025-02-01' ORDER BY accrual_id")
+    archive_dir = tmp_path / "archive"
+
+    result = compact_month(accrued.conn, '2025-01', today=TODAY, archive_dir=archive_dir)
+
+    assert result["archive"] == archive_dir / "ledger_2025.db"
+    assert accrued.rows("""
+        SELECT archive_year, archive_file, transaction_count, accrual_count, transactions_archived
+        FROM ledger_archives
+    """) == [(2025, 'ledger_2025.db', 0, 62, 0)]
+    assert verify_archive(accrued.conn, 2025, archive_dir) == []
+    # Compacted accruals do not close the year to postings
+    assert last_archived_year(accrued.conn) is None
+
+    attach_archives(accrued.conn, archive_dir)
+    assert accrued.rows(f"SELECT {DAILY_COLUMNS} FROM interest_accruals_all "
+                        "WHERE accrual_date < '2025-02-01' ORDER BY accrual_id") == january
+
+    # Archiving the year later merges the rest of it into the same file
+    accrued.conn.execute("DETACH DATABASE archive_2025")
+    moved = archive_year(accrued.conn, 2025, archive_dir, today=date(2026, 1, 2))
+    assert moved["accruals"][0] == 2 * 10
+    assert accrued.rows("SELECT accrual_count, transactions_archived FROM ledger_archives") == [(82, 1)]
+    assert verify_archive(accrued.conn, 2025, archive_dir) == []
+    assert last_archived_year(accrued.conn) == 2025
@@ -0,0 +1,189 @@
+"""
+EOD batch modes against the day-by-day bulk run.
+
+Each test builds the same small book twice (or more) and checks that a
+batch mode leaves the ledger exactly as running accrue_interest_bulk and
+apply_monthly_fees_bulk once per day would.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import batch_eod_processing as eod
+
+START = date(2025, 1, 5)
+END = date(2025, 2, 28)
+
+# Postings inside the catch-up window: (value_date, account_id, amount)
+WINDOW_POSTINGS = [
+    ('2025-01-10', 'ACC-SAV', 500.00),
+    ('2025-01-20', 'ACC-MIN', -100.00),   # drops below the interest minimum
+    ('2025-02-05', 'ACC-CHK', 20.00),     # after the January fee
+    ('2025-02-14', 'ACC-SAV', -250.50),
+]
+
+
+def _open_accounts(book):
+    book.add_product('P-SAV', interest_rate=0.05, minimum_balance=100.0)
+    book.add_product('P-CHK', interest_rate=0.01, monthly_fee=5.0, convention='ACT/360')
+    book.open_account('ACC-SAV', 'P-SAV', '2024-12-01', 1000.00)
+    book.open_account('ACC-MIN', 'P-SAV', '2024-12-01', 150.00)
+    book.open_account('ACC-CHK', 'P-CHK', '2024-12-01', 7.00)
+    book.open_account('ACC-LOW', 'P-CHK', '2024-12-01', 3.00)   # never covers the fee
+
+
+def _days(start: date, end: date):
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def _ledger(book) -> dict:
+    """Everything a batch mode writes, without ids and timestamps that differ per run."""
+    return {
+        "accruals": book.rows("""
+            SELECT account_id, accrual_date, balance, annual_rate, daily_interest, cumulative_accrued
+            FROM interest_accruals ORDER BY account_id, accrual_date
+        """),
+        "transactions": book.rows("""
+            SELECT account_id, value_date, type, category, amount, running_balance, reference
+            FROM transactions ORDER BY account_id, value_date, created_at, rowid
+        """),
+        "fee_ids": book.rows("SELECT transaction_id FROM transactions WHERE category = 'Fee' ORDER BY 1"),
+        "fee_skips": book.rows("""
+            SELECT account_id, fee_reference, processing_date, balance, monthly_fee
+            FROM fee_skip_report ORDER BY 1, 2
+        """),
+        "accounts": book.rows("SELECT account_id, balance, interest_accrued FROM accounts ORDER BY 1"),
+        "stats": book.rows("""
+            SELECT account_id, transaction_count, last_value_date, total_credits_cents, total_debits_cents
+            FROM account_stats ORDER BY 1
+        """),
+    }
+
+
+def _run_daily(book, days, postings=()):
+    """Reference: post each day's transactions, then run the bulk EOD for that day."""
+    for day in days:
+        for value_date, account_id, amount in postings:
+            if value_date == day.isoformat():
+                book.post(account_id, value_date, amount)
+        eod.accrue_interest_bulk(book.conn, day)
+        eod.apply_monthly_fees_bulk(book.conn, day)
+
+
+def test_catch_up_matches_daily_runs_with_postings_in_the_window(book):
+    daily, catch_up = book(), book()
+    for each in (daily, catch_up):
+        _open_accounts(each)
+
+    _run_daily(daily, _days(START, END), WINDOW_POSTINGS)
+
+    # The catch-up run only sees the window's postings after the fact
+    for value_date, account_id, amount in WINDOW_POSTINGS:
+        catch_up.post(account_id, value_date, amount)
+    summary = eod.run_catch_up_eod(catch_up.conn, START, END)
+
+    expected = _ledger(daily)
+    assert _ledger(catch_up) == expected
+    assert summary["accruals_posted"] == len(expected["accruals"])
+    assert summary["fees_posted"] == len(expected["fee_ids"])
+    # The withdrawal took ACC-MIN below the minimum from 2025-01-20 on
+    assert max(row[1] for row in expected["accruals"] if row[0] == 'ACC-MIN') == '2025-01-19'
+    # ACC-CHK paid both fees (February's from the deposit made after January's)
+    assert [row[0] for row in expected["fee_ids"]] == ['TXN-FEE-202501-ACC-CHK', 'TXN-FEE-202502-ACC-CHK']
+    assert [row[:2] for row in expected["fee_skips"]] == [('ACC-LOW', 'FEE-202501'), ('ACC-LOW', 'FEE-202502')]
+
+
+def test_catch_up_resumes_after_committed_months(book):
+    whole, resumed = book(), book()
+    for each in (whole, resumed):
+        _open_accounts(each)
+        for value_date, account_id, amount in WINDOW_POSTINGS:
+            each.post(account_id, value_date, amount)
+
+    eod.run_catch_up_eod(whole.conn, START, END)
+
+    # January was committed before the run stopped; the rerun covers the whole range
+    eod.run_catch_up_eod(resumed.conn, START, date(2025, 1, 31))
+    summary = eod.run_catch_up_eod(resumed.conn, START, END)
+
+    assert _ledger(resumed) == _ledger(whole)
+    assert summary["fees_posted"] == 1   # only February's; January's is already in
+
+
+def test_fee_reruns_do_not_charge_twice_on_either_path(book):
+    bulk, row = book(), book()
+    for each in (bulk, row):
+        _open_accounts(each)
+    month_end = date(2025, 1, 31)
+
+    eod.apply_monthly_fees_bulk(bulk.conn, month_end)
+    eod.apply_monthly_fees(row.conn, month_end)
+    assert _ledger(row) == _ledger(bulk) | {"fee_skips": []}   # only the bulk path keeps a skip report
+
+    # A rerun on the same path or the other one finds the month's fees already posted
+    expected = _ledger(bulk)
+    eod.apply_monthly_fees_bulk(bulk.conn, month_end)
+    eod.apply_monthly_fees(bulk.conn, month_end)
+    assert _ledger(bulk) == expected
+    assert expected["fee_ids"] == [('TXN-FEE-202501-ACC-CHK',)]
+
+
+def _open_more_accounts(book, count: int = 8):
+    """Enough accounts for every shard and several checkpoint chunks."""
+    _open_accounts(book)
+    for n in range(count):
+        book.open_account(f'ACC-X{n}', 'P-SAV' if n % 2 else 'P-CHK', '2024-12-01', 40.00 + 300 * n)
+
+
+def test_sharded_run_matches_the_serial_bulk_run(book):
+    serial, sharded = book(), book()
+    for each in (serial, sharded):
+        _open_more_accounts(each)
+    days = _days(date(2025, 1, 30), date(2025, 2, 1))   # across a month end
+
+    _run_daily(serial, days)
+    for day in days:
+        summary = eod.run_sharded_eod(sharded.path, day, workers=3, commit_rows=4)
+
+    assert _ledger(sharded) == _ledger(serial)
+    assert summary["accruals_posted"] == len(serial.rows(
+        "SELECT 1 FROM interest_accruals WHERE accrual_date = '2025-02-01'"))
+    # Every shard had accounts to work on
+    assert {eod.shard_of(account_id, 3) for (account_id,) in serial.rows("SELECT account_id FROM accounts")} == {0, 1, 2}
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.mark.parametrize("stage_writer", ["write_interest_accruals", "write_fee_postings"])
+def test_checkpointed_run_resumes_after_an_interrupt(book, monkeypatch, stage_writer):
+    serial, checkpointed = book(), book()
+    for each in (serial, checkpointed):
+        _open_more_accounts(each)
+    month_end = date(2025, 1, 31)
+    _run_daily(serial, [month_end])
+
+    # The stage dies on its third chunk, after two were committed
+    write = getattr(eod, stage_writer)
+    calls = []
+
+    def failing_write(cursor, *args):
+        calls.append(args)
+        if len(calls) == 3:
+            raise Interrupted(stage_writer)
+        write(cursor, *args)
+
+    monkeypatch.setattr(eod, stage_writer, failing_write)
+    with pytest.raises(Interrupted):
+        eod.run_checkpointed_eod(checkpointed.conn, month_end, chunk_size=2)
+    assert checkpointed.rows("SELECT status FROM batch_runs") == [('Failed',)]
+
+    monkeypatch.setattr(eod, stage_writer, write)
+    summary = eod.run_checkpointed_eod(checkpointed.conn, month_end, chunk_size=2)
+
+    assert _ledger(checkpointed) == _ledger(serial)
+    assert checkpointed.rows("SELECT status FROM batch_runs") == [('Completed',)]
+    stage = "interest_accrual" if stage_writer == "write_interest_accruals" else "monthly_fees"
+    assert summary[stage]["resumed_chunks"] == 2
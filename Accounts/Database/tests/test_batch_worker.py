@@ -0,0 +1,41 @@
+"""Batch worker jobs: plan files stay in the plans directory, reports stay in the log."""
+
+import pytest
+
+import batch_monthly_accruals
+import batch_worker
+from batch_worker import run_job
+
+
+@pytest.fixture
+def plans_dir(tmp_path, monkeypatch):
+    plans = tmp_path / "plans"
+    monkeypatch.setattr(batch_monthly_accruals, "PLANS_DIR", plans)
+    monkeypatch.setattr(batch_worker, "PLANS_DIR", plans)
+    return plans
+
+
+@pytest.mark.parametrize("plan", ["/tmp/plan.npz", "../accounts.db", "../plans_old/plan.npz", "plan.txt"])
+def test_plans_outside_the_plans_directory_are_refused(book, plans_dir, plan):
+    worker_book = book()
+
+    response = run_job(worker_book.conn, {"job": "monthly_accruals", "month": "2025-03",
+                                          "dry_run": True, "plan": plan})
+
+    assert response == {"ok": False, "error": f"plan must be a .npz file in {plans_dir}: {plan}"}
+
+
+def test_dry_run_then_apply_returns_the_summary_only(book, plans_dir, capsys):
+    worker_book = book()
+    worker_book.add_product('P-SAV', interest_rate=0.04)
+    worker_book.open_account('ACC-1', 'P-SAV', '2025-01-06', 1500.00)
+    job = {"job": "monthly_accruals", "month": "2025-03", "plan": "march.npz"}
+
+    planned = run_job(worker_book.conn, job | {"dry_run": True})
+    applied = run_job(worker_book.conn, job | {"apply_plan": True})
+
+    assert (plans_dir / "march.npz").exists()
+    assert set(planned) == set(applied) == {"ok", "result"}
+    assert applied["result"]["months_processed"] == planned["result"]["months_processed"] == 3
+    assert "NO-ACC-1" in capsys.readouterr().out   # the report went to the worker's log
+    assert worker_book.rows("SELECT COUNT(*) FROM monthly_interest_accruals") == [(3,)]
@@ -0,0 +1,171 @@
+"""
+Parity of the integer-cents interest kernel with the Decimal functions.
+
+Seeded random cases cover balances (including zero and negative), rates,
+exact half-cent ties, every day count convention, the Python-integer
+fallback for products that would overflow int64, and the Decimal fallback
+for REAL values that are not whole cents or millionths.
+"""
+
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from batch_eod_processing import calculate_daily_interest
+from batch_monthly_accruals import calculate_monthly_interest_30_360
+from day_count import CONVENTIONS, day_fractions
+from interest_kernel import (
+    ACTUAL_365_DAILY, THIRTY_360_MONTHLY, RATE_SCALE, interest_cents, group_interest_cents,
+    group_interest_from_cents, decimal_interest, cents_to_decimal, _tie_balance,
+)
+
+SEEDS = range(10)
+CASES_PER_SEED = 500
+
+# (day fraction, Decimal reference) of the two batch calculations
+BATCH_CALCULATIONS = {
+    'daily': (ACTUAL_365_DAILY, calculate_daily_interest),
+    'monthly_30_360': (THIRTY_360_MONTHLY, calculate_monthly_interest_30_360),
+}
+
+
+def _rate(units: int) -> Decimal:
+    return Decimal(int(units)).scaleb(-6)
+
+
+def _random_cases(seed: int) -> tuple:
+    """(balance cents, rate millionths) lists: up to $1bn balances, rates up to 10%."""
+    rng = random.Random(seed)
+    balances = [rng.choice([rng.randint(-10_000, 0), rng.randint(1, 10**5), rng.randint(1, 10**11)])
+                for _ in range(CASES_PER_SEED)]
+    rates = [rng.choice([0, rng.randint(1, RATE_SCALE // 10)]) for _ in range(CASES_PER_SEED)]
+    return balances, rates
+
+
+def _tie_cases(seed: int, day_fraction) -> tuple:
+    """(balance cents, rate millionths) lists whose interest is exactly half a cent plus whole cents."""
+    rng = random.Random(seed)
+    balances, rates = [], []
+    while len(balances) < CASES_PER_SEED // 10:
+        rate = rng.randint(1, RATE_SCALE // 10)
+        tie = _tie_balance(rng, rate, day_fraction)
+        if tie and tie < 10**13:
+            balances.append(tie)
+            rates.append(rate)
+    return balances, rates
+
+
+@pytest.mark.parametrize('calculation', BATCH_CALCULATIONS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_kernel_matches_batch_decimal_functions(seed, calculation):
+    day_fraction, reference = BATCH_CALCULATIONS[calculation]
+    balances, rates = _random_cases(seed)
+
+    result = interest_cents(np.array(balances), np.array(rates), day_fraction)
+
+    for cents, units, interest in zip(balances, rates, result):
+        assert cents_to_decimal(interest) == reference(cents_to_decimal(cents), _rate(units)), (cents, units)
+
+
+@pytest.mark.parametrize('calculation', BATCH_CALCULATIONS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_half_cent_ties_round_up(seed, calculation):
+    day_fraction, reference = BATCH_CALCULATIONS[calculation]
+    balances, rates = _tie_cases(seed, day_fraction)
+
+    result = interest_cents(np.array(balances), np.array(rates), day_fraction)
+
+    days, year_days = day_fraction
+    for cents, units, interest in zip(balances, rates, result):
+        exact = Decimal(cents) * units * days / (year_days * RATE_SCALE)
+        assert exact % 1 == Decimal('0.5'), (cents, units)
+        assert interest == int(exact + Decimal('0.5')), (cents, units)
+        assert cents_to_decimal(interest) == reference(cents_to_decimal(cents), _rate(units)), (cents, units)
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+@pytest.mark.parametrize('seed', SEEDS)
+def test_kernel_matches_decimal_interest_for_every_convention(seed, convention):
+    rng = random.Random(seed)
+    balances, rates = _random_cases(seed)
+    starts = np.datetime64('2020-01-01') + np.array([rng.randint(0, 3650) for _ in balances], dtype='timedelta64[D]')
+    ends = starts + np.array([rng.randint(1, 400) for _ in balances], dtype='timedelta64[D]')
+    days, year_days = day_fractions(convention, starts, ends)
+
+    result = interest_cents(np.array(balances), np.array(rates), (days, year_days))
+
+    for i, (cents, units) in enumerate(zip(balances, rates)):
+        expected = decimal_interest(cents_to_decimal(cents), _rate(units), (days[i], year_days[i]))
+        assert cents_to_decimal(result[i]) == expected, (convention, cents, units, days[i], year_days[i])
+
+
+@pytest.mark.parametrize('convention', CONVENTIONS)
+def test_half_cent_ties_for_every_convention(convention):
+    rng = random.Random(convention)
+    for days_in_period in (1, 28, 30, 31, 365):
+        days, year_days = day_fractions(convention, [np.datetime64('2024-01-01')],
+                                        [np.datetime64('2024-01-01') + days_in_period])
+        day_fraction = (int(days[0]), int(year_days[0]))
+        balances, rates = _tie_cases(rng.randint(0, 10**6), day_fraction)
+
+        result = interest_cents(np.array(balances), np.array(rates), day_fraction)
+
+        for cents, units, interest in zip(balances, rates, result):
+            assert cents_to_decimal(interest) == decimal_interest(cents_to_decimal(cents), _rate(units), day_fraction)
+
+
+@pytest.mark.parametrize('calculation', BATCH_CALCULATIONS)
+def test_int64_overflow_falls_back_to_exact_integers(calculation):
+    day_fraction, reference = BATCH_CALCULATIONS[calculation]
+    # balance * rate * days reaches 2**63 for the largest of these
+    balances = [10**15, 9 * 10**17, 1, 123_456_789]
+    rates = [RATE_SCALE, 999_999, 15_000, 25_000]
+    assert balances[1] * rates[1] * day_fraction[0] >= 2**63
+
+    result = interest_cents(np.array(balances), np.array(rates), day_fraction)
+
+    for cents, units, interest in zip(balances, rates, result):
+        assert cents_to_decimal(interest) == reference(cents_to_decimal(cents), _rate(units)), (cents, units)
+
+
+def test_int64_overflow_with_long_periods():
+    balances = np.array([5 * 10**14, 10**6])
+    rates = np.array([RATE_SCALE, 30_000])
+    day_fraction = (np.array([36_600, 36_600]), np.array([365 * 366, 365 * 366]))
+
+    result = interest_cents(balances, rates, day_fraction)
+
+    for i in range(len(balances)):
+        expected = decimal_interest(cents_to_decimal(balances[i]), _rate(rates[i]), (36_600, 365 * 366))
+        assert cents_to_decimal(result[i]) == expected
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_group_functions_match_decimal_on_real_values(seed):
+    rng = random.Random(seed)
+    # Whole cents, plus values a REAL column can hold that are not whole cents
+    balances = [rng.randint(0, 10**9) / 100 for _ in range(CASES_PER_SEED)]
+    balances += [1500.0000000000002, 0.1 + 0.2, 1234.565, 99.995]
+    rates = [rng.choice([0.015, 0.025, 0.0123456789, 0.1 + 0.2 - 0.29]) for _ in balances]
+
+    daily = group_interest_cents(balances, rates, ACTUAL_365_DAILY)
+    monthly = group_interest_cents(balances, rates, THIRTY_360_MONTHLY)
+
+    for balance, rate, day, month in zip(balances, rates, daily, monthly):
+        balance, rate = Decimal(str(balance)), Decimal(str(rate))
+        assert cents_to_decimal(day) == calculate_daily_interest(balance, rate), (balance, rate)
+        assert cents_to_decimal(month) == calculate_monthly_interest_30_360(balance, rate), (balance, rate)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_group_from_cents_matches_daily_decimal(seed):
+    balances, _ = _random_cases(seed)
+    balances = [abs(cents) for cents in balances]
+    rate = random.Random(seed).choice([0.015, 0.0123456789])
+
+    result = group_interest_from_cents(balances, rate, ACTUAL_365_DAILY)
+
+    for cents, interest in zip(balances, result):
+        assert cents_to_decimal(interest) == calculate_daily_interest(cents_to_decimal(cents), Decimal(str(rate)))
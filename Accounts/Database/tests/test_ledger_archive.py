@@ -0,0 +1,79 @@
+"""
+Ledger archives: moving a closed year (copy, verify, delete), reading it
+back through the union views, and repairs anchored on the archived close.
+"""
+
+from datetime import date
+
+from batch_monthly_accruals import process_monthly_accruals
+from ledger_archive import archive_year, attach_archives, verify_archive
+
+AFTER_2024 = date(2025, 6, 1)
+
+TRANSACTION_COLUMNS = "transaction_id, account_id, value_date, type, amount, running_balance"
+MONTHLY_COLUMNS = "monthly_accrual_id, account_id, accrual_month, monthly_interest, transaction_id"
+
+
+def _book_with_2024(book):
+    ledger = book()
+    ledger.add_product('P-SAV', interest_rate=0.04)
+    ledger.open_account('ACC-1', 'P-SAV', '2024-10-03', 2000.00)
+    ledger.open_account('ACC-2', 'P-SAV', '2024-11-20', 500.00)
+    ledger.post('ACC-1', '2024-11-15', -300.00)
+    process_monthly_accruals(ledger.conn, '2024-12')
+    ledger.post('ACC-1', '2025-01-10', 100.00)
+    ledger.post('ACC-2', '2025-02-01', 50.00)
+    return ledger
+
+
+def test_archive_year_moves_verifies_and_restores_foreign_keys(book, tmp_path):
+    ledger = _book_with_2024(book)
+    transactions = ledger.rows(f"SELECT {TRANSACTION_COLUMNS} FROM transactions ORDER BY 1")
+    monthly = ledger.rows(f"SELECT {MONTHLY_COLUMNS} FROM monthly_interest_accruals ORDER BY 1")
+    assert len(monthly) == 5
+    archive_dir = tmp_path / "archive"
+
+    ledger.conn.execute("PRAGMA foreign_keys = ON")
+    result = archive_year(ledger.conn, 2024, archive_dir, today=AFTER_2024)
+
+    assert ledger.rows("PRAGMA foreign_keys") == [(1,)]
+    assert ledger.rows("PRAGMA foreign_key_check") == []
+    assert result["transactions"][0] == 3 + 5          # 2 openings, 1 withdrawal, 5 interest postings
+    assert result["monthly_accruals"][0] == 5
+    assert ledger.rows("SELECT MIN(value_date) FROM transactions") == [('2025-01-10',)]
+    assert ledger.rows("SELECT COUNT(*) FROM monthly_interest_accruals") == [(0,)]
+    assert verify_archive(ledger.conn, 2024, archive_dir) == []
+
+    attach_archives(ledger.conn, archive_dir)
+    assert ledger.rows(f"SELECT {TRANSACTION_COLUMNS} FROM transactions_all ORDER BY 1") == transactions
+    assert ledger.rows(f"SELECT {MONTHLY_COLUMNS} FROM monthly_interest_accruals_all ORDER BY 1") == monthly
+
+
+def test_verify_reports_a_tampered_archive(book, tmp_path):
+    ledger = _book_with_2024(book)
+    archive_dir = tmp_path / "archive"
+    archive_year(ledger.conn, 2024, archive_dir, today=AFTER_2024)
+
+    ledger.conn.execute("ATTACH DATABASE ? AS archive", (str(archive_dir / "ledger_2024.db"),))
+    ledger.conn.execute("DELETE FROM archive.monthly_interest_accruals WHERE accrual_month = '2024-12'")
+    ledger.conn.commit()
+    ledger.conn.execute("DETACH DATABASE archive")
+
+    problems = verify_archive(ledger.conn, 2024, archive_dir)
+    assert len(problems) == 1 and problems[0].startswith("monthly_interest_accruals")
+
+
+def test_repair_anchors_on_the_archived_closing_balance(book, tmp_path):
+    ledger = _book_with_2024(book)
+    archive_year(ledger.conn, 2024, archive_dir=tmp_path / "archive", today=AFTER_2024)
+    closing = dict(ledger.rows("SELECT account_id, closing_balance_cents FROM archived_account_totals"))
+
+    # Backdated before every hot transaction: the repair has only the archive to anchor on
+    ledger.post('ACC-1', '2025-01-02', 25.00)
+
+    assert ledger.rows("""
+        SELECT value_date, running_balance_cents FROM transactions
+        WHERE account_id = 'ACC-1' ORDER BY value_date
+    """) == [('2025-01-02', closing['ACC-1'] + 2500), ('2025-01-10', closing['ACC-1'] + 12500)]
+    assert ledger.rows("SELECT balance_cents FROM accounts WHERE account_id = 'ACC-1'") == [
+        (closing['ACC-1'] + 12500,)]
@@ -0,0 +1,81 @@
+"""
+Plan-then-apply for monthly accruals: a saved plan posts exactly what a live
+run would, and is refused once anything it was computed from has changed.
+"""
+
+import sqlite3
+
+import pytest
+
+from batch_monthly_accruals import apply_posting_plan, process_monthly_accruals
+from ledger_repair import repair_running_balances
+
+MONTH = '2025-03'
+
+POSTINGS = "SELECT account_id, accrual_month, monthly_interest FROM monthly_interest_accruals ORDER BY 1, 2"
+
+
+def _planned_book(book, tmp_path):
+    """A book with a dry-run plan for MONTH saved next to it."""
+    planned = book()
+    planned.add_product('P-SAV', interest_rate=0.04)
+    planned.add_product('P-360', interest_rate=0.03, convention='ACT/360')
+    planned.open_account('ACC-1', 'P-SAV', '2025-01-06', 1500.00)
+    planned.open_account('ACC-2', 'P-360', '2025-02-11', 800.00)
+    planned.post('ACC-1', '2025-02-20', -200.00)
+    plan_path = tmp_path / f"plan_{id(planned)}.npz"
+    process_monthly_accruals(planned.conn, MONTH, dry_run=True, plan_path=plan_path)
+    return planned, plan_path
+
+
+def test_dry_run_commits_the_snapshot_refresh(book, tmp_path):
+    planned, _ = _planned_book(book, tmp_path)
+
+    assert not planned.conn.in_transaction
+    other = sqlite3.connect(planned.path, timeout=0)
+    other.execute("BEGIN IMMEDIATE")   # the dry run holds no write lock
+    other.rollback()
+    other.close()
+    assert planned.rows("SELECT COUNT(*) FROM monthly_interest_accruals") == [(0,)]
+
+
+def test_unchanged_plan_posts_what_a_live_run_would(book, tmp_path):
+    planned, plan_path = _planned_book(book, tmp_path)
+    live, _ = _planned_book(book, tmp_path)
+
+    apply_posting_plan(planned.conn, plan_path, MONTH)
+    process_monthly_accruals(live.conn, MONTH)
+
+    assert planned.rows(POSTINGS) == live.rows(POSTINGS)
+    assert len(planned.rows(POSTINGS)) == 3 + 2
+
+
+def _backdated_posting(planned):
+    planned.post('ACC-2', '2025-02-28', 50.00)
+
+
+def _rate_change(planned):
+    planned.conn.execute("UPDATE products SET interest_rate = 0.045 WHERE product_id = 'P-SAV'")
+    planned.conn.commit()
+
+
+def _corrected_amount(planned):
+    # An amendment rewrites existing rows: no new transaction, only new running balances
+    planned.conn.execute("""
+        UPDATE transactions SET amount = 250.00
+        WHERE account_id = 'ACC-1' AND value_date = '2025-02-20'
+    """)
+    repair_running_balances(planned.conn, [('ACC-1', '2025-02-20')])
+    planned.conn.commit()
+
+
+@pytest.mark.parametrize("change", [_backdated_posting, _rate_change, _corrected_amount])
+def test_plan_is_rejected_after_its_inputs_change(book, tmp_path, change):
+    planned, plan_path = _planned_book(book, tmp_path)
+    change(planned)
+
+    with pytest.raises(ValueError, match="stale"):
+        apply_posting_plan(planned.conn, plan_path, MONTH)
+
+    assert not planned.conn.in_transaction
+    assert planned.rows("SELECT COUNT(*) FROM monthly_interest_accruals") == [(0,)]
@@ -13,7 +13,6 @@ interface RunAccrualsResponse {
   months_processed: number;
   total_interest: number;
   results: AccrualResult[];
-  output: string;
 }
 
 interface AccrualHistoryItem {
@@ -131,21 +130,29 @@ export default function BatchProcesses() {
               </div>
             </div>
 
-            {showOutput && result.output && (
-              <div style={{ marginTop: '1.5rem' }}>
-                <h4>Detailed Output:</h4>
-                <pre style={{
-                  background: '#1a1a2e',
-                  color: '#fff',
-                  padding: '1rem',
-                  borderRadius: '6px',
-                  fontSize: '0.85rem',
-                  overflow: 'auto',
-                  maxHeight: '400px',
-                  lineHeight: '1.5'
-                }}>
-                  {result.output}
-                </pre>
+            {showOutput && result.results.length > 0 && (
+              <div style={{ marginTop: '1.5rem', overflow: 'auto', maxHeight: '400px' }}>
+                <h4>Accounts Processed:</h4>
+                <table>
+                  <thead>
+                    <tr>
+                      <th>Account</th>
+                      <th>Months</th>
+                      <th>Interest</th>
+                    </tr>
+                  </thead>
+                  <tbody>
+                    {result.results.map((item) => (
+                      <tr key={item.account_number}>
+                        <td style={{ fontFamily: 'monospace' }}>{item.account_number}</td>
+                        <td style={{ textAlign: 'right' }}>{item.months}</td>
+                        <td style={{ textAlign: 'right', fontFamily: 'monospace' }}>
+                          ${item.total_interest.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}
+                        </td>
+                      </tr>
+                    ))}
+                  </tbody>
+                </table>
               </div>
             )}
           </div>
@@ -60,9 +60,20 @@ fi
 # Store PIDs for cleanup
 echo $$ > .start.pid
 
-# Step 1: Start API Server (Port 6600)
+# Step 1: Start Batch Worker (Unix socket used by the API's batch endpoints)
 echo ""
-echo "1. Starting API Server (Port 6600)..."
+echo "1. Starting Batch Worker..."
+mkdir -p logs
+python3 -u Database/scripts/batch_worker.py > logs/batch_worker.log 2>&1 &
+WORKER_PID=$!
+echo $WORKER_PID > .batch_worker.pid
+echo -e "   Batch Worker PID: ${GREEN}$WORKER_PID${NC}"
+echo "   Socket: Database/batch_worker.sock"
+echo "   Logs: logs/batch_worker.log"
+
+# Step 2: Start API Server (Port 6600)
+echo ""
+echo "2. Starting API Server (Port 6600)..."
 cd API
 if [ ! -f .env ]; then
     echo -e "${YELLOW}WARNING:${NC} .env file not found, copying from .env.example"
@@ -88,9 +99,9 @@ else
     exit 1
 fi
 
-# Step 2: Start React UI (Port 6601)
+# Step 3: Start React UI (Port 6601)
 echo ""
-echo "2. Starting React UI (Port 6601)..."
+echo "3. Starting React UI (Port 6601)..."
 if [ -d "UI" ]; then
     cd UI
     if [ ! -d "node_modules" ]; then
@@ -130,12 +141,14 @@ echo "========================================="
 echo ""
 echo "Running Services:"
 echo "  • API Server:  http://localhost:6600 (PID: $API_PID)"
+echo "  • Batch Worker: Database/batch_worker.sock (PID: $WORKER_PID)"
 if [ -f .ui.pid ]; then
     echo "  • React UI:    http://localhost:6601 (PID: $(cat .ui.pid))"
 fi
 echo ""
 echo "Logs:"
 echo "  • API:  tail -f logs/api.log"
+echo "  • Batch Worker: tail -f logs/batch_worker.log"
 if [ -f .ui.pid ]; then
     echo "  • UI:   tail -f logs/ui.log"
 fi
@@ -86,6 +86,9 @@ stop_service ".api.pid" "API Server"
 # Stop React UI
 stop_service ".ui.pid" "React UI"
 
+# Stop Batch Worker
+stop_service ".batch_worker.pid" "Batch Worker"
+
 # Stop start script tracker
 if [ -f ".start.pid" ]; then
     rm .start.pid